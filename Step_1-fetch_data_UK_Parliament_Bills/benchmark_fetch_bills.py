@@ -0,0 +1,46 @@
+import math
+import time
+import argparse
+import requests
+
+from fetch_bills import fetch_all_bills, PAGE_SIZE
+from local_bills_server import serve_bills
+
+
+def fetch_sequential_no_session(base_url):
+    # The original fetch loop: one requests.get per page, no shared session
+    data = requests.get(base_url, params={"PageSize": PAGE_SIZE, "Skip": 0}).json()
+    bills = list(data.get("items", []))
+    for page in range(1, math.ceil(data.get("totalResults", 0) / PAGE_SIZE)):
+        response = requests.get(base_url, params={"PageSize": PAGE_SIZE, "Skip": page * PAGE_SIZE})
+        bills.extend(response.json().get("items", []))
+    return bills
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    bills = fn()
+    elapsed = time.perf_counter() - start
+    pages = math.ceil(len(bills) / PAGE_SIZE)
+    print(f"{label:<32} {len(bills):>6} bills  {elapsed:7.2f}s  {pages / elapsed:8.1f} pages/s")
+    return bills
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark fetch_bills.py against a local stand-in server")
+    parser.add_argument("--json", default="bills_data.json")
+    parser.add_argument("--latency", type=float, default=0.02, help="Simulated server latency per page")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of pages answered with 503")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16])
+    args = parser.parse_args()
+
+    with serve_bills(args.json, args.latency, args.fail_rate) as url:
+        print(f"📊 Local server at {url} (latency={args.latency}s, fail_rate={args.fail_rate})\n")
+        baseline = None
+        if not args.fail_rate:
+            baseline = timed("sequential, no session", lambda: fetch_sequential_no_session(url))
+        for concurrency in args.concurrency:
+            bills = timed(f"pooled, concurrency={concurrency}",
+                          lambda: fetch_all_bills(url, concurrency=concurrency, backoff=0.05))
+            if baseline is not None and bills != baseline:
+                print("❌ Result differs from sequential fetch")
@@ -0,0 +1,70 @@
+import time
+import argparse
+import tracemalloc
+import pandas as pd
+from supabase import create_client
+
+from local_postgrest_stub import serve_postgrest
+from supabase_export import iter_pages, export_dataframe, export_csv
+
+# Compares the old OFFSET loop with the keyset export against the local
+# PostgREST stub: requests sent, wall time and peak Python memory. The stub
+# answers every page at the same cost, so this understates the gap against
+# a real Postgres, where OFFSET pages get slower the deeper they are.
+
+
+def offset_loop(supabase, table_name, batch_size=1000):
+    # The loop add_policy_area.py / download_bills.py / upload_from_supabase.py used
+    offset = 0
+    all_rows = []
+    while True:
+        response = supabase.table(table_name).select("*").range(offset, offset + batch_size - 1).execute()
+        if not response.data:
+            break
+        all_rows.extend(response.data)
+        offset += batch_size
+    return pd.DataFrame(all_rows)
+
+
+def measure(label, stub, run):
+    # Timed without tracemalloc (it slows allocation-heavy code a lot), then run again for the memory peak
+    requests = stub.requests
+    start = time.perf_counter()
+    count = run()
+    elapsed = time.perf_counter() - start
+    requests = stub.requests - requests
+
+    tracemalloc.start()
+    run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{label:<30} {count:6d} rows  {requests:4d} requests  {elapsed:6.2f}s  peak {peak / 1e6:6.1f} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark Supabase exports against the local PostgREST stub")
+    parser.add_argument("--csv", default="../Step_2-Data-Augmentation/bills_with_policy_area_full.csv")
+    parser.add_argument("--copies", type=int, default=5, help="Repeat the dataset to make a bigger table")
+    parser.add_argument("--latency", type=float, default=0.05, help="Stub seconds per request")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.csv)
+    df = df.astype(object).where(df.notna(), None)
+    rows = df.to_dict(orient="records")
+    table = [{**row, "billId": row["billId"] + copy * 100000} for copy in range(args.copies) for row in rows]
+    # billIds are renumbered per copy to stay unique, so the key space is sparse
+    print(f"📊 {len(table)} rows, stub latency {args.latency}s\n")
+
+    with serve_postgrest(tables={"all_bills_uk": table}, latency=args.latency) as (url, key, stub):
+        supabase = create_client(url, key)
+        measure("offset loop -> DataFrame", stub, lambda: len(offset_loop(supabase, "all_bills_uk")))
+        measure("keyset, 1 worker -> DataFrame", stub,
+                lambda: len(export_dataframe(supabase, "all_bills_uk", workers=1)))
+        measure(f"keyset, {args.workers} workers -> DataFrame", stub,
+                lambda: len(export_dataframe(supabase, "all_bills_uk", workers=args.workers)))
+        measure(f"keyset, {args.workers} workers -> CSV", stub,
+                lambda: export_csv(iter_pages(supabase, "all_bills_uk", workers=args.workers), "/dev/null"))
+        measure("keyset, 2 columns -> CSV", stub,
+                lambda: export_csv(iter_pages(supabase, "all_bills_uk", ["billId", "policyArea"],
+                                              workers=args.workers), "/dev/null"))
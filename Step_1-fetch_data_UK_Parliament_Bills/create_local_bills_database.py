@@ -1,56 +1,191 @@
+import csv
 import sqlite3
-import pandas as pd
+import argparse
 
-# Load the CSV into a pandas DataFrame
-df = pd.read_csv("flat_bills.csv")
+# flat_bills.csv column -> bills.db column
+COLUMN_MAP = {
+    'billId': 'bill_id',
+    'shortTitle': 'short_title',
+    'currentHouse': 'current_house',
+    'originatingHouse': 'originating_house',
+    'lastUpdate': 'last_update',
+    'billWithdrawn': 'bill_withdrawn',
+    'isDefeated': 'is_defeated',
+    'isAct': 'is_act',
+    'currentStage_description': 'current_stage_description',
+    'currentStage_house': 'current_stage_house',
+    'currentStage_abbreviation': 'current_stage_abbreviation',
+    'policyArea': 'policy_area'  # only in the Step 2 enriched CSV
+}
+
+BOOLEAN_COLUMNS = {'is_defeated', 'is_act'}
 
-# Connect to SQLite database (creates 'bills.db' if it doesn't exist)
-conn = sqlite3.connect('bills.db')
-cursor = conn.cursor()
+BATCH_SIZE = 500
 
-# Create the table
-cursor.execute('''
+CREATE_TABLE_SQL = '''
     CREATE TABLE IF NOT EXISTS bills (
         bill_id INTEGER PRIMARY KEY,
         short_title TEXT,
         current_house TEXT,
         originating_house TEXT,
-        last_update TEXT,
-        bill_withdrawn BOOLEAN,
-        is_defeated BOOLEAN,
-        is_act BOOLEAN,
+        last_update TEXT,                   -- ISO 8601, sorts as text
+        bill_withdrawn TEXT,                -- date the bill was withdrawn, NULL if it wasn't
+        is_defeated INTEGER CHECK (is_defeated IN (0, 1)),
+        is_act INTEGER CHECK (is_act IN (0, 1)),
         current_stage_description TEXT,
         current_stage_house TEXT,
-        current_stage_abbreviation TEXT
+        current_stage_abbreviation TEXT,
+        policy_area TEXT
     )
-''')
+'''
+
+# The API servers filter on policyArea + lastUpdate; the rest back the analysis queries
+CREATE_INDEXES_SQL = [
+    'CREATE INDEX IF NOT EXISTS idx_bills_policy_area_last_update ON bills (policy_area, last_update)',
+    'CREATE INDEX IF NOT EXISTS idx_bills_is_act ON bills (is_act)',
+    'CREATE INDEX IF NOT EXISTS idx_bills_current_stage ON bills (current_stage_description)',
+    'CREATE INDEX IF NOT EXISTS idx_bills_last_update ON bills (last_update)',
+]
+
+PRAGMAS = [
+    'PRAGMA journal_mode = WAL',
+    'PRAGMA synchronous = NORMAL',   # safe with WAL, one fsync per checkpoint instead of per commit
+    'PRAGMA temp_store = MEMORY',
+    'PRAGMA cache_size = -64000',    # 64 MB
+    'PRAGMA mmap_size = 268435456',  # 256 MB
+]
+
+
+def connect(db_path='bills.db'):
+    conn = sqlite3.connect(db_path)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    init_schema(conn)
+    return conn
+
+
+def init_schema(conn):
+    # Older bills.db files were written by DataFrame.to_sql, which dropped the
+    # primary key; rebuild those in place before creating the indexes.
+    columns = {row[1]: row for row in conn.execute('PRAGMA table_info(bills)')}
+    if columns and not columns['bill_id'][5]:
+        print("🔧 Migrating bills table to the indexed schema...")
+        with conn:
+            conn.execute('BEGIN')
+            conn.execute('ALTER TABLE bills RENAME TO bills_legacy')
+            conn.execute(CREATE_TABLE_SQL)
+            shared = [name for name in columns if name in COLUMN_MAP.values()]
+            conn.execute(f"INSERT OR REPLACE INTO bills ({', '.join(shared)}) "
+                         f"SELECT {', '.join(shared)} FROM bills_legacy")
+            conn.execute('DROP TABLE bills_legacy')
+    elif columns and 'policy_area' not in columns:
+        conn.execute('ALTER TABLE bills ADD COLUMN policy_area TEXT')
+
+    with conn:
+        conn.execute(CREATE_TABLE_SQL)
+        for sql in CREATE_INDEXES_SQL:
+            conn.execute(sql)
+
+
+def to_db_value(column, value):
+    # Rows come either straight from the API (bools/None) or from a CSV (strings)
+    if value == '' or value is None:
+        return None
+    if column in BOOLEAN_COLUMNS:
+        if isinstance(value, str):
+            return 1 if value.strip().lower() in ('true', '1') else 0
+        return int(bool(value))
+    if column == 'bill_id':
+        return int(value)
+    return value
+
+
+def upsert_bills(conn, rows):
+    # Upsert flat bill dicts (CSV column names) with one executemany. Only the
+    # columns present in the rows are written, so loading Step 1 data doesn't
+    # wipe a policy_area added by Step 2. The caller owns the transaction.
+    if not rows:
+        return []
+
+    csv_columns = [column for column in COLUMN_MAP if column in rows[0]]
+    db_columns = [COLUMN_MAP[column] for column in csv_columns]
+    updates = ', '.join(f'{column} = excluded.{column}' for column in db_columns if column != 'bill_id')
+    sql = (f"INSERT INTO bills ({', '.join(db_columns)}) VALUES ({', '.join('?' * len(db_columns))}) "
+           f"ON CONFLICT (bill_id) DO UPDATE SET {updates}")
+    values = [
+        tuple(to_db_value(db_column, row.get(csv_column)) for csv_column, db_column in zip(csv_columns, db_columns))
+        for row in rows
+    ]
+    conn.executemany(sql, values)
+    return [value[0] for value in values]
+
+
+def load_bills(conn, rows, replace=False, batch_size=BATCH_SIZE):
+    # Stream rows into bills.db in executemany batches inside one transaction.
+    # With replace=True, bills that weren't loaded are removed, mirroring a full reload.
+    count = 0
+    with conn:
+        if replace:
+            conn.execute('CREATE TEMP TABLE IF NOT EXISTS loaded_ids (bill_id INTEGER PRIMARY KEY)')
+            conn.execute('DELETE FROM loaded_ids')
+
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                count += load_batch(conn, batch, replace)
+                batch = []
+        count += load_batch(conn, batch, replace)
+
+        if replace:
+            conn.execute('DELETE FROM bills WHERE bill_id NOT IN (SELECT bill_id FROM loaded_ids)')
+    return count
+
+
+def load_batch(conn, batch, replace):
+    bill_ids = upsert_bills(conn, batch)
+    if replace:
+        conn.executemany('INSERT OR IGNORE INTO loaded_ids VALUES (?)', [(bill_id,) for bill_id in bill_ids])
+    return len(bill_ids)
+
+
+def load_csv(csv_path='flat_bills.csv', db_path='bills.db', replace=True):
+    conn = connect(db_path)
+    with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+        count = load_bills(conn, csv.DictReader(f), replace=replace)
+    return conn, count
+
+
+def select_bills(conn, policy_area, since='2022-01-01'):
+    # Same filter the API servers send to Supabase, answered from the
+    # (policy_area, last_update) index. Rows use the CSV/Supabase column names.
+    csv_columns = {db_column: csv_column for csv_column, db_column in COLUMN_MAP.items()}
+    cursor = conn.execute('SELECT * FROM bills WHERE policy_area = ? AND last_update >= ?', (policy_area, since))
+    names = [csv_columns[description[0]] for description in cursor.description]
+    return [
+        {name: bool(value) if COLUMN_MAP[name] in BOOLEAN_COLUMNS and value is not None else value
+         for name, value in zip(names, row)}
+        for row in cursor
+    ]
 
-# Insert the data from DataFrame into the database
-df.rename(columns={
-    'billId': 'bill_id',
-    'shortTitle': 'short_title',
-    'currentHouse': 'current_house',
-    'originatingHouse': 'originating_house',
-    'lastUpdate': 'last_update',
-    'billWithdrawn': 'bill_withdrawn',
-    'isDefeated': 'is_defeated',
-    'isAct': 'is_act',
-    'currentStage_description': 'current_stage_description',
-    'currentStage_house': 'current_stage_house',
-    'currentStage_abbreviation': 'current_stage_abbreviation'
-}, inplace=True)
 
-df.to_sql('bills', conn, if_exists='replace', index=False)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load flat bills into the indexed bills.db")
+    parser.add_argument("--csv", default="flat_bills.csv",
+                        help="flat_bills.csv, or the Step 2 CSV to also load policyArea")
+    parser.add_argument("--db", default="bills.db")
+    parser.add_argument("--merge", action="store_true", help="Upsert only; keep bills that aren't in the CSV")
+    args = parser.parse_args()
 
-# Done!
-print("✅ Data successfully loaded into bills.db")
+    conn, count = load_csv(args.csv, args.db, replace=not args.merge)
 
-# Optional: test basic queries
-print("\nSample bills:")
-for row in cursor.execute("SELECT bill_id, short_title, current_house, is_act FROM bills LIMIT 5"):
-    print(row)
+    # Done!
+    print(f"✅ {count} bills upserted into {args.db}")
 
-# Close connection
-conn.commit()
-conn.close()
+    # Optional: test basic queries
+    print("\nSample bills:")
+    for row in conn.execute("SELECT bill_id, short_title, current_house, is_act FROM bills LIMIT 5"):
+        print(row)
 
+    # Close connection
+    conn.close()
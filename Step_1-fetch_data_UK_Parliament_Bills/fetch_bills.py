@@ -1,57 +1,164 @@
 import requests
+import sys
 import json
 import math
+import time
+import argparse
+from contextlib import redirect_stdout
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 
 BASE_URL = "https://bills-api.parliament.uk/api/v1/Bills"
+PAGE_SIZE = 20  # Doesn't matter what we ask for, API limits to 20
 
-all_bills = []
+DEFAULT_CONCURRENCY = 8
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5  # seconds, doubled on every retry
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
 
-# Step 1: First request to get totalResults
-params = {
-    "PageSize": 20,  # Doesn't matter, API limits to 20
-    "Skip": 0
-}
 
-print(f"Fetching first page to find total results...")
+def make_session(concurrency=DEFAULT_CONCURRENCY):
+    # One keep-alive connection pool shared by all worker threads
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
 
-response = requests.get(BASE_URL, params=params)
-if response.status_code != 200:
-    print(f"Failed to fetch data: {response.status_code}")
-    exit()
 
-data = response.json()
-total_results = data.get("totalResults", 0)
-print(f"Total bills found: {total_results}")
-
-# Save first 20 bills
-bills = data.get("items", [])
-all_bills.extend(bills)
-
-# Step 2: Calculate how many pages
-pages_needed = math.ceil(total_results / 20)
-print(f"Total pages needed: {pages_needed}")
-
-# Step 3: Fetch all other pages
-for page in range(1, pages_needed):
-    skip = page * 20
-    print(f"Fetching bills with skip={skip}...")
+def fetch_page(session, skip, base_url=BASE_URL, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF,
+               sort_order=None):
     params = {
-        "PageSize": 20,  # Always 20
+        "PageSize": PAGE_SIZE,
         "Skip": skip
     }
-    response = requests.get(BASE_URL, params=params)
-    if response.status_code != 200:
-        print(f"Failed to fetch data at skip={skip}: {response.status_code}")
-        break
+    if sort_order:
+        params["SortOrder"] = sort_order
+    error = None
+    for attempt in range(retries + 1):
+        try:
+            response = session.get(base_url, params=params, timeout=30)
+            if response.status_code == 200:
+                return response.json()
+            error = f"HTTP {response.status_code}"
+            if response.status_code not in RETRY_STATUS_CODES:
+                break
+        except requests.RequestException as e:
+            error = str(e)
+
+        if attempt < retries:
+            delay = backoff * 2 ** attempt
+            print(f"⚠️ skip={skip} failed ({error}), retrying in {delay:.1f}s...")
+            time.sleep(delay)
+
+    raise RuntimeError(f"Failed to fetch data at skip={skip}: {error}")
+
+
+def iter_bill_pages(base_url=BASE_URL, concurrency=DEFAULT_CONCURRENCY,
+                    retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF):
+    # Yield each page's bills in Skip order as soon as that page is ready
+    with make_session(concurrency) as session:
+        # Step 1: First request to get totalResults
+        print(f"Fetching first page to find total results...")
+        data = fetch_page(session, 0, base_url, retries, backoff)
+        total_results = data.get("totalResults", 0)
+        print(f"Total bills found: {total_results}")
+        yield data.get("items", [])
+
+        # Step 2: Calculate how many pages
+        pages_needed = math.ceil(total_results / PAGE_SIZE)
+        print(f"Total pages needed: {pages_needed} (concurrency={concurrency})")
+
+        # Step 3: Fetch all other pages concurrently. map() yields results in
+        # submission order, so bills stay in Skip order whatever finishes first.
+        skips = [page * PAGE_SIZE for page in range(1, pages_needed)]
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            pages = executor.map(lambda skip: fetch_page(session, skip, base_url, retries, backoff), skips)
+            for page in pages:
+                yield page.get("items", [])
+
+
+def fetch_all_bills(base_url=BASE_URL, concurrency=DEFAULT_CONCURRENCY,
+                    retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF):
+    all_bills = []
+    for bills in iter_bill_pages(base_url, concurrency, retries, backoff):
+        all_bills.extend(bills)
+    return all_bills
+
+
+def fetch_bills_updated_since(since, base_url=BASE_URL, concurrency=DEFAULT_CONCURRENCY,
+                              retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF):
+    # Page newest-first and stop at the first page that reaches bills updated
+    # before `since`. Pages are fetched in windows of `concurrency` so a small
+    # delta costs one window instead of the whole archive.
+    with make_session(concurrency) as session:
+        fetch = lambda skip: fetch_page(session, skip, base_url, retries, backoff, sort_order="DateUpdatedDescending")
+
+        data = fetch(0)
+        total_results = data.get("totalResults", 0)
+        pages = [data]
+        updated = []
+        next_skip = PAGE_SIZE
+        requests_made = 1
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            while True:
+                reached_mark = False
+                for page in pages:
+                    items = page.get("items", [])
+                    updated.extend(bill for bill in items if bill.get("lastUpdate", "") >= since)
+                    if not items or items[-1].get("lastUpdate", "") < since:
+                        reached_mark = True
+                        break
+                if reached_mark or next_skip >= total_results:
+                    break
+
+                skips = list(range(next_skip, min(next_skip + concurrency * PAGE_SIZE, total_results), PAGE_SIZE))
+                pages = list(executor.map(fetch, skips))
+                requests_made += len(skips)
+                next_skip = skips[-1] + PAGE_SIZE
+
+    print(f"🔄 {len(updated)} bills updated since {since} ({requests_made} requests)")
+    return updated
+
+
+def write_ndjson(pages, f):
+    # One bill per line, written as pages arrive, so the flatten step can start straight away
+    count = 0
+    for bills in pages:
+        for bill in bills:
+            f.write(json.dumps(bill, ensure_ascii=False) + "\n")
+            count += 1
+        f.flush()
+    return count
+
 
-    data = response.json()
-    bills = data.get("items", [])
-    all_bills.extend(bills)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Download all bills from the UK Parliament Bills API")
+    parser.add_argument("--base-url", default=BASE_URL, help="Bills endpoint (e.g. a local stand-in server)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Pages fetched in parallel")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES, help="Retries per page before giving up")
+    parser.add_argument("--backoff", type=float, default=DEFAULT_BACKOFF, help="Initial retry delay in seconds")
+    parser.add_argument("--format", choices=["json", "ndjson"], default="json",
+                        help="JSON array (default) or one bill per line")
+    parser.add_argument("--output", default="bills_data.json", help="Where to save the downloaded bills, '-' for stdout")
+    args = parser.parse_args()
 
-print(f"✅ Successfully fetched {len(all_bills)} bills total!")
+    if args.format == "ndjson":
+        # e.g. python fetch_bills.py --format ndjson --output - | python process_downloaded_data.py --input -
+        to_stdout = args.output == "-"
+        f = sys.stdout if to_stdout else open(args.output, "w", encoding="utf-8")
+        with redirect_stdout(sys.stderr if to_stdout else sys.stdout):  # keep progress out of the data stream
+            count = write_ndjson(iter_bill_pages(args.base_url, args.concurrency, args.retries, args.backoff), f)
+            if not to_stdout:
+                f.close()
+            print(f"✅ Streamed {count} bills to {args.output}!")
+    else:
+        all_bills = fetch_all_bills(args.base_url, args.concurrency, args.retries, args.backoff)
+        print(f"✅ Successfully fetched {len(all_bills)} bills total!")
 
-# Step 4: Save to JSON
-with open("bills_data.json", "w", encoding="utf-8") as f:
-    json.dump(all_bills, f, ensure_ascii=False, indent=2)
+        # Step 4: Save to JSON
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(all_bills, f, ensure_ascii=False, indent=2)
 
-print("✅ Bills data saved to bills_full_dataset.json!")
+        print(f"✅ Bills data saved to {args.output}!")
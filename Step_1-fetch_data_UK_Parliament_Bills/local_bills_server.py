@@ -0,0 +1,88 @@
+import json
+import time
+import random
+import argparse
+import threading
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+# Local stand-in for the Bills API: serves a saved bills_data.json in
+# PageSize/Skip pages so fetch_bills.py can be exercised and benchmarked offline.
+
+MAX_PAGE_SIZE = 20  # same cap as the real API
+
+
+def make_handler(bills, latency=0.0, fail_rate=0.0):
+    sorted_bills = {
+        "DateUpdatedDescending": sorted(bills, key=lambda b: b.get("lastUpdate", ""), reverse=True),
+        "DateUpdatedAscending": sorted(bills, key=lambda b: b.get("lastUpdate", ""))
+    }
+
+    class BillsHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+        disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+        def do_GET(self):
+            if latency:
+                time.sleep(latency)
+
+            if fail_rate and random.random() < fail_rate:
+                self.send_json({"error": "simulated failure"}, status=503)
+                return
+
+            query = parse_qs(urlparse(self.path).query)
+            page_size = min(int(query.get("PageSize", [MAX_PAGE_SIZE])[0]), MAX_PAGE_SIZE)
+            skip = int(query.get("Skip", [0])[0])
+            items = sorted_bills.get(query.get("SortOrder", [None])[0], bills)
+            self.send_json({
+                "items": items[skip:skip + page_size],
+                "totalResults": len(bills),
+                "itemsPerPage": page_size
+            })
+
+        def send_json(self, payload, status=200):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # keep benchmark output readable
+
+    return BillsHandler
+
+
+@contextmanager
+def serve_bills(json_path="bills_data.json", latency=0.0, fail_rate=0.0, port=0):
+    with open(json_path, "r", encoding="utf-8") as f:
+        bills = json.load(f)
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(bills, latency, fail_rate))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/api/v1/Bills"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a saved bills_data.json like the Bills API")
+    parser.add_argument("--json", default="bills_data.json", help="Saved bills to serve")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Artificial delay per request in seconds")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    args = parser.parse_args()
+
+    with serve_bills(args.json, args.latency, args.fail_rate, args.port) as url:
+        print(f"🌐 Serving {args.json} at {url} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,199 @@
+import json
+import time
+import random
+import argparse
+import threading
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qsl
+
+# Local, in-memory stand-in for the Supabase REST API (PostgREST) so uploads
+# and exports can be exercised offline with the real supabase client:
+#
+#     with serve_postgrest() as (url, key, tables):
+#         supabase = create_client(url, key)
+#
+# Supports insert/upsert (on_conflict + Prefer: resolution=merge-duplicates),
+# select with column lists, eq/neq/gt/gte/lt/lte/in filters, order, limit and
+# offset. Enough for this repo, not a full PostgREST.
+
+STUB_API_KEY = "stub.stub.stub"  # create_client only checks it looks like a JWT
+
+OPERATORS = {
+    "eq": lambda a, b: a == b,
+    "neq": lambda a, b: a != b,
+    "gt": lambda a, b: a is not None and a > b,
+    "gte": lambda a, b: a is not None and a >= b,
+    "lt": lambda a, b: a is not None and a < b,
+    "lte": lambda a, b: a is not None and a <= b,
+}
+
+
+def coerce(raw, like):
+    # Filter values arrive as strings; compare them as the column's type
+    if isinstance(like, bool):
+        return raw.lower() == "true"
+    if isinstance(like, int):
+        return int(raw)
+    if isinstance(like, float):
+        return float(raw)
+    return raw
+
+
+def predicate(column, expression):
+    # Parse a filter once; the raw value is coerced once per column type rather than once per row
+    operator, _, raw = expression.partition(".")
+    if operator == "is":
+        expected = None if raw == "null" else raw == "true"
+        return lambda row: row.get(column) is expected if expected is None else row.get(column) == expected
+    coerced = {}
+
+    def value_like(value):
+        kind = type(value)
+        if kind not in coerced:
+            if operator == "in":
+                coerced[kind] = {coerce(item, value) for item in raw.strip("()").split(",")}
+            else:
+                coerced[kind] = coerce(raw, value)
+        return coerced[kind]
+
+    if operator == "in":
+        return lambda row: row.get(column) is not None and row.get(column) in value_like(row.get(column))
+    if operator not in OPERATORS:
+        return lambda row: False
+    compare = OPERATORS[operator]
+    return lambda row: row.get(column) is not None and compare(row.get(column), value_like(row.get(column)))
+
+
+class PostgrestStub:
+    def __init__(self, primary_key="billId", latency=0.0, fail_rate=0.0):
+        self.primary_key = primary_key
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.tables = {}  # table -> {primary key: row}
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def rows(self, table):
+        return list(self.tables.get(table, {}).values())
+
+    def write(self, table, records, on_conflict, merge):
+        key = on_conflict or self.primary_key
+        with self.lock:
+            rows = self.tables.setdefault(table, {})
+            for record in records:
+                if record.get(key) in rows and not merge:
+                    return 409, {"code": "23505", "message": f"duplicate key value violates unique constraint ({key})"}
+            for record in records:
+                rows[record.get(key)] = {**rows.get(record.get(key), {}), **record}
+        return 201, records
+
+    def read(self, table, params):
+        rows = self.rows(table)
+        for column, expression in params:
+            if column not in ("select", "order", "limit", "offset"):
+                keep = predicate(column, expression)
+                rows = [row for row in rows if keep(row)]
+
+        query = dict(params)
+        for order in reversed(query.get("order", "").split(",") if query.get("order") else []):
+            column, _, direction = order.partition(".")
+            rows.sort(key=lambda row: (row.get(column) is None, row.get(column)), reverse=direction.startswith("desc"))
+
+        offset = int(query.get("offset", 0))
+        limit = int(query["limit"]) if "limit" in query else None
+        rows = rows[offset:offset + limit if limit is not None else None]
+
+        columns = query.get("select", "*")
+        if columns != "*":
+            names = [name.strip() for name in columns.split(",")]
+            rows = [{name: row.get(name) for name in names} for row in rows]
+        return 200, rows
+
+
+def make_handler(stub):
+    class PostgrestHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def route(self):
+            parsed = urlparse(self.path)
+            table = parsed.path.rsplit("/", 1)[-1]
+            return table, parse_qsl(parsed.query)
+
+        def before_request(self):
+            with stub.lock:
+                stub.requests += 1
+            if stub.latency:
+                time.sleep(stub.latency)
+            if stub.fail_rate and random.random() < stub.fail_rate:
+                self.send_json(503, {"message": "simulated failure"})
+                return False
+            return True
+
+        def do_GET(self):
+            if not self.before_request():
+                return
+            table, params = self.route()
+            self.send_json(*stub.read(table, params))
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if not self.before_request():
+                return
+            table, params = self.route()
+            records = json.loads(body or b"[]")
+            if isinstance(records, dict):
+                records = [records]
+            merge = "resolution=merge-duplicates" in self.headers.get("Prefer", "")
+            status, payload = stub.write(table, records, dict(params).get("on_conflict"), merge)
+            if status == 201 and "return=minimal" in self.headers.get("Prefer", ""):
+                payload = []
+            self.send_json(status, payload)
+
+        def send_json(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return PostgrestHandler
+
+
+@contextmanager
+def serve_postgrest(primary_key="billId", latency=0.0, fail_rate=0.0, port=0, tables=None):
+    stub = PostgrestStub(primary_key, latency, fail_rate)
+    for table, rows in (tables or {}).items():
+        stub.tables[table] = {row.get(primary_key): dict(row) for row in rows}
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(stub))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}", STUB_API_KEY, stub
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run an in-memory PostgREST stand-in for Supabase")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--latency", type=float, default=0.0, help="Artificial delay per request in seconds")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    args = parser.parse_args()
+
+    with serve_postgrest(latency=args.latency, fail_rate=args.fail_rate, port=args.port) as (url, key, _):
+        print(f"🌐 PostgREST stub at {url}")
+        print(f"   SUPABASE_URL={url} SUPABASE_API_KEY={key}")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
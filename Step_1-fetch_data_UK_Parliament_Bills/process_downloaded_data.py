@@ -1,14 +1,19 @@
+import sys
+import csv
 import json
-import pandas as pd
+import argparse
 
-# Load the JSON file
-with open("bills_data.json", "r", encoding="utf-8") as f:
-    bills = json.load(f)
+FLAT_COLUMNS = [
+    "billId", "shortTitle", "currentHouse", "originatingHouse", "lastUpdate",
+    "billWithdrawn", "isDefeated", "isAct",
+    "currentStage_description", "currentStage_house", "currentStage_abbreviation"
+]
 
-# Prepare a list of simplified bill dicts
-flat_bills = []
-for bill in bills:
-    flat_bills.append({
+
+def flatten_bill(bill):
+    # Simplified bill dict with one column per field we keep
+    stage = bill.get("currentStage") or {}
+    return {
         "billId": bill.get("billId"),
         "shortTitle": bill.get("shortTitle"),
         "currentHouse": bill.get("currentHouse"),
@@ -17,19 +22,122 @@ for bill in bills:
         "billWithdrawn": bill.get("billWithdrawn"),
         "isDefeated": bill.get("isDefeated"),
         "isAct": bill.get("isAct"),
-        "currentStage_description": bill.get("currentStage", {}).get("description"),
-        "currentStage_house": bill.get("currentStage", {}).get("house"),
-        "currentStage_abbreviation": bill.get("currentStage", {}).get("abbreviation")
-    })
+        "currentStage_description": stage.get("description"),
+        "currentStage_house": stage.get("house"),
+        "currentStage_abbreviation": stage.get("abbreviation")
+    }
+
+
+def iter_json_array(f, chunk_size=1 << 16):
+    # Yield the items of a top-level JSON array one at a time, reading the
+    # file in chunks, so memory is bounded by the largest item, not the file.
+    decoder = json.JSONDecoder()
+    buffer = ""
+    started = False
+    while True:
+        chunk = f.read(chunk_size)
+        buffer += chunk
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos == len(buffer):
+                break
+            if not started:
+                if buffer[pos] != "[":
+                    raise ValueError("Expected a JSON array of bills")
+                started = True
+                pos += 1
+                continue
+            if buffer[pos] == "]":
+                return
+            try:
+                item, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                break  # item continues in the next chunk
+            yield item
+        buffer = buffer[pos:]
+        if not chunk:
+            raise ValueError("Unexpected end of JSON array")
+
+
+def iter_ndjson(f):
+    for line in f:
+        if line.strip():
+            yield json.loads(line)
+
+
+def open_bills(path, input_format="auto"):
+    # Yield raw bills from a JSON array or NDJSON file ("-" reads stdin)
+    if input_format == "auto":
+        input_format = "ndjson" if path == "-" or path.endswith((".ndjson", ".jsonl")) else "json"
+    f = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+    try:
+        yield from iter_ndjson(f) if input_format == "ndjson" else iter_json_array(f)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+class SeenIds:
+    # Bitmap over billId: one bit per possible id instead of one int object per id
+
+    def __init__(self):
+        self.bits = bytearray()
+
+    def add(self, bill_id):
+        # Returns True the first time an id is seen
+        byte, bit = divmod(bill_id, 8)
+        if byte >= len(self.bits):
+            self.bits.extend(bytes(byte - len(self.bits) + 1024))
+        if self.bits[byte] & (1 << bit):
+            return False
+        self.bits[byte] |= 1 << bit
+        return True
+
+
+def iter_flat_bills(bills):
+    # Flatten and drop repeated billIds (first occurrence wins, like drop_duplicates)
+    seen = SeenIds()
+    for bill in bills:
+        row = flatten_bill(bill)
+        if isinstance(row["billId"], int) and not seen.add(row["billId"]):
+            continue
+        yield row
+
+
+def write_csv(rows, csv_path="flat_bills.csv"):
+    count = 0
+    with open(csv_path, "w", encoding="utf-8", newline="") as f:
+        # Same True/False/"" and \n output as DataFrame.to_csv
+        writer = csv.DictWriter(f, fieldnames=FLAT_COLUMNS, lineterminator="\n")
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def write_sqlite(rows, db_path="bills.db"):
+    from create_local_bills_database import connect, load_bills
 
-# Convert to pandas DataFrame
-df = pd.DataFrame(flat_bills)
+    conn = connect(db_path)
+    count = load_bills(conn, rows, replace=True)
+    conn.close()
+    return count
 
-# remove duplicates
-df = df.drop_duplicates(subset=["billId"])
 
-# Save to CSV (optional, good for SQL import)
-df.to_csv("flat_bills.csv", index=False)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Flatten downloaded bills into CSV or SQLite rows")
+    parser.add_argument("--input", default="bills_data.json", help="JSON array or NDJSON file, '-' for stdin")
+    parser.add_argument("--input-format", choices=["auto", "json", "ndjson"], default="auto")
+    parser.add_argument("--output", default="flat_bills.csv", help="CSV file, or a .db file to write SQLite rows")
+    args = parser.parse_args()
 
-print("Flattened bills saved to flat_bills.csv!")
+    rows = iter_flat_bills(open_bills(args.input, args.input_format))
+    if args.output.endswith((".db", ".sqlite")):
+        count = write_sqlite(rows, args.output)
+    else:
+        count = write_csv(rows, args.output)
 
+    print(f"Flattened {count} bills saved to {args.output}!")
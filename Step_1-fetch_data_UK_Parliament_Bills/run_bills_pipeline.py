@@ -1,24 +1,229 @@
-import subprocess
+import os
+import sys
+import json
+import time
+import hashlib
+import sqlite3
+import argparse
+import threading
 
-# Step 1: Fetch bills from Parliament API
-print("\n=== STEP 1: Fetching Bills ===")
-subprocess.run(["python", "fetch_bills.py"], check=True)
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
 
-# Step 2: Process downloaded bills (flatten and clean)
-print("\n=== STEP 2: Processing Downloaded Data ===")
-subprocess.run(["python", "process_downloaded_data.py"], check=True)
+from fetch_bills import fetch_all_bills
+from process_downloaded_data import iter_flat_bills, write_csv, write_sqlite
+from check_duplicates import check_duplicates
+from test_bills_db import verify_bills_db
+from sync_bills import sync_bills
+from create_local_bills_database import connect
 
-# Step 3: Create local SQLite database
-print("\n=== STEP 3: Creating Local Bills Database ===")
-subprocess.run(["python", "create_local_bills_database.py"], check=True)
+# Runs the Step 1 stages as functions in one process, passing data between
+# them in memory. A stage is skipped when the content hash of its inputs
+# matches the previous run and its output files still exist.
 
-# Step 4: (Optional) Check for duplicates
-print("\n=== STEP 4: Checking for Duplicates ===")
-subprocess.run(["python", "check_duplicates.py"], check=True)
+STATE_PATH = "pipeline_state.json"
+JSON_PATH = "bills_data.json"
+CSV_PATH = "flat_bills.csv"
+DB_PATH = "bills.db"
 
-# Step 5: Test the final bills database
-print("\n=== STEP 5: Testing Bills Database ===")
-subprocess.run(["python", "test_bills_db.py"], check=True)
 
-print("\n✅ Pipeline completed successfully!")
+class Stage:
+    def __init__(self, name, run, deps=(), outputs=(), input_files=(), load=None, always_run=False):
+        self.name = name
+        self.run = run                  # called with the values of deps, in order
+        self.deps = list(deps)
+        self.outputs = list(outputs)    # files the stage writes; skipped only if they exist
+        self.input_files = list(input_files)
+        self.load = load                # cheap way to get the value back when skipped
+        self.always_run = always_run    # e.g. network fetches, whose input we can't hash
 
+
+def content_hash(value):
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def current_rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def max_rss_mb():
+    if resource is None:
+        return None
+    # ru_maxrss is in KB on Linux and bytes on macOS
+    scale = 1e6 if sys.platform == "darwin" else 1e3
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+class PeakRss:
+    # Samples RSS in a background thread while a stage runs. Falls back to the
+    # process high-water mark (ru_maxrss) where /proc isn't available.
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak = None
+        self._stop = threading.Event()
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak or 0, current_rss_mb())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        if current_rss_mb() is not None:
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if current_rss_mb() is not None:
+            self._stop.set()
+            self._thread.join()
+            self.peak = max(self.peak or 0, current_rss_mb())
+        else:
+            self.peak = max_rss_mb()
+
+
+def run_pipeline(stages, state_path=STATE_PATH, force=False):
+    state = {}
+    if os.path.exists(state_path) and not force:
+        with open(state_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+
+    by_name = {stage.name: stage for stage in stages}
+    values = {}
+    output_hashes = {}
+    report = []
+
+    def value_of(name):
+        # A skipped stage's value is only needed if something downstream reruns
+        if name not in values:
+            stage = by_name[name]
+            values[name] = stage.load() if stage.load else stage.run(*[value_of(dep) for dep in stage.deps])
+        return values[name]
+
+    for number, stage in enumerate(stages, start=1):
+        print(f"\n=== STEP {number}: {stage.name} ===")
+        key = content_hash([stage.name]
+                           + [output_hashes[dep] for dep in stage.deps]
+                           + [file_hash(path) for path in stage.input_files])
+        previous = state.get(stage.name, {})
+
+        if (not stage.always_run and previous.get("key") == key
+                and all(os.path.exists(path) for path in stage.outputs)):
+            print("⏭️  Inputs unchanged, skipping")
+            output_hashes[stage.name] = previous["output"]
+            report.append((stage.name, "skipped", 0.0, None))
+            continue
+
+        with PeakRss() as rss:
+            start = time.perf_counter()
+            value = stage.run(*[value_of(dep) for dep in stage.deps])
+            elapsed = time.perf_counter() - start
+
+        values[stage.name] = value
+        # A connection isn't data; it's fingerprinted by the inputs that filled the database
+        output_hashes[stage.name] = key if isinstance(value, sqlite3.Connection) else content_hash(value)
+        state[stage.name] = {"key": key, "output": output_hashes[stage.name]}
+        report.append((stage.name, "ran", elapsed, rss.peak))
+
+    with open(state_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+
+    for value in values.values():
+        if isinstance(value, sqlite3.Connection):
+            value.close()
+
+    print("\n📊 Stage report:")
+    print(f"{'stage':<18} {'status':<8} {'wall (s)':>9} {'peak RSS (MB)':>14}")
+    for name, status, elapsed, peak in report:
+        peak_text = f"{peak:.1f}" if peak is not None else "-"
+        print(f"{name:<18} {status:<8} {elapsed:>9.3f} {peak_text:>14}")
+    return report
+
+
+def save_bills_json(bills, path=JSON_PATH):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(bills, f, ensure_ascii=False, indent=2)
+    return bills
+
+
+def load_bills_json(path=JSON_PATH):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def flatten(bills):
+    rows = list(iter_flat_bills(bills))
+    write_csv(rows, CSV_PATH)
+    print(f"Flattened {len(rows)} bills saved to {CSV_PATH}!")
+    return rows
+
+
+def load_db(rows):
+    count = write_sqlite(rows, DB_PATH)
+    print(f"✅ {count} bills loaded into {DB_PATH}")
+    return connect(DB_PATH)
+
+
+def sync(concurrency):
+    rows = sync_bills(concurrency=concurrency)
+    if rows is None:
+        raise SystemExit(1)
+    return rows
+
+
+def build_stages(offline=False, incremental=False, concurrency=8):
+    db_stages = [
+        Stage("dedupe-check", check_duplicates, deps=["load"]),
+        Stage("verify", verify_bills_db, deps=["load"]),
+    ]
+
+    if incremental:
+        # Fetch the delta and merge it by bill_id; the checks rerun only if something changed
+        return [
+            Stage("sync", lambda: sync(concurrency), always_run=True),
+            Stage("load", lambda rows: connect(DB_PATH), deps=["sync"], outputs=[DB_PATH],
+                  load=lambda: connect(DB_PATH)),
+        ] + db_stages
+
+    if offline:
+        fetch = Stage("fetch", load_bills_json, input_files=[JSON_PATH], load=load_bills_json)
+    else:
+        fetch = Stage("fetch", lambda: save_bills_json(fetch_all_bills(concurrency=concurrency)),
+                      outputs=[JSON_PATH], always_run=True, load=load_bills_json)
+
+    return [
+        fetch,
+        Stage("flatten", flatten, deps=["fetch"], outputs=[CSV_PATH]),
+        Stage("load", load_db, deps=["flatten"], outputs=[DB_PATH], load=lambda: connect(DB_PATH)),
+    ] + db_stages
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the Step 1 bills pipeline")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only fetch bills changed since the last run and merge them into bills.db / flat_bills.csv")
+    parser.add_argument("--offline", action="store_true",
+                        help="Reuse the saved bills_data.json instead of fetching from the API")
+    parser.add_argument("--force", action="store_true", help="Run every stage even if its inputs are unchanged")
+    parser.add_argument("--concurrency", type=int, default=8, help="Pages fetched in parallel")
+    args = parser.parse_args()
+
+    stages = build_stages(args.offline, args.incremental, args.concurrency)
+    run_pipeline(stages, force=args.force)
+
+    print("\n✅ Pipeline completed successfully!")
@@ -0,0 +1,227 @@
+import os
+import csv
+import time
+import queue
+import argparse
+import threading
+import pandas as pd
+from supabase import create_client
+from dotenv import load_dotenv
+
+from create_local_bills_database import connect, load_bills
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional, only needed for --format parquet
+    pa = pq = None
+
+# Export a Supabase table page by page without OFFSET paging:
+#
+#     WHERE billId > <last key seen> ORDER BY billId LIMIT 1000
+#
+# so every page costs the same however deep into the table it is. The key
+# space can be split into ranges read in parallel, and pages are streamed to
+# the sink (CSV, Parquet, the bills.db mirror or a DataFrame) as they arrive,
+# so only a few pages are ever held in memory.
+
+TABLE_NAME = "all_bills_uk"
+KEY_COLUMN = "billId"
+PAGE_SIZE = 1000  # PostgREST's default max-rows
+DEFAULT_WORKERS = 4
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 1.0  # seconds, doubled on every retry
+# Arrow types of the all_bills_uk columns that aren't strings, for pages where they're all null
+PARQUET_TYPES = {"billId": "int64", "isDefeated": "bool", "isAct": "bool"}
+
+
+def create_supabase_client():
+    load_dotenv()
+    return create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_API_KEY"))
+
+
+def execute(query, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF):
+    for attempt in range(retries + 1):
+        try:
+            return query.execute().data
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(backoff * 2 ** attempt)
+
+
+def select_columns(columns, key=KEY_COLUMN):
+    # Keyset paging needs the key in every page, even if the caller didn't ask for it
+    if columns is None or columns == "*":
+        return "*"
+    columns = [column.strip() for column in (columns.split(",") if isinstance(columns, str) else columns)]
+    return ",".join(columns if key in columns else [key] + columns)
+
+
+def key_bounds(supabase, table_name=TABLE_NAME, key=KEY_COLUMN):
+    # (lowest key, highest key), or None for an empty table
+    first = execute(supabase.table(table_name).select(key).order(key).limit(1))
+    if not first:
+        return None
+    last = execute(supabase.table(table_name).select(key).order(key, desc=True).limit(1))
+    return first[0][key], last[0][key]
+
+
+def split_key_range(low, high, parts):
+    # Split [low, high] into (after, upto] windows: WHERE key > after AND key <= upto
+    parts = max(1, min(parts, high - low + 1))
+    step = (high - low + 1) / parts
+    edges = [low - 1] + [low - 1 + round(step * i) for i in range(1, parts)] + [high]
+    return list(zip(edges, edges[1:]))
+
+
+def iter_key_range(supabase, table_name, columns, after=None, upto=None, key=KEY_COLUMN, page_size=PAGE_SIZE,
+                   retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF):
+    # Pages of rows with after < key <= upto (None = unbounded), in key order.
+    # A short page means the range is exhausted, so page_size must not exceed
+    # the server's max-rows or the export would stop early.
+    while True:
+        query = supabase.table(table_name).select(columns)
+        if after is not None:
+            query = query.gt(key, after)
+        if upto is not None:
+            query = query.lte(key, upto)
+        page = execute(query.order(key).limit(page_size), retries, backoff)
+        if not page:
+            return
+        yield page
+        after = page[-1][key]
+        if len(page) < page_size or (upto is not None and after >= upto):
+            return
+
+
+def iter_pages(supabase, table_name=TABLE_NAME, columns="*", key=KEY_COLUMN, page_size=PAGE_SIZE,
+               workers=DEFAULT_WORKERS, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF):
+    # Yields lists of row dicts. With workers > 1 the key space is split into
+    # that many ranges read at once; pages then arrive in no particular order
+    # across ranges. A bounded queue keeps at most a couple of pages per worker
+    # in memory if the sink is slower than the network.
+    columns = select_columns(columns, key)
+    if workers <= 1:
+        yield from iter_key_range(supabase, table_name, columns, None, None, key, page_size, retries, backoff)
+        return
+
+    # Two cheap indexed lookups to find the key space to split
+    bounds = key_bounds(supabase, table_name, key)
+    if bounds is None:
+        return
+    ranges = split_key_range(*bounds, workers)
+
+    pages = queue.Queue(maxsize=2 * len(ranges))
+    done = object()
+
+    def read_range(after, upto):
+        try:
+            for page in iter_key_range(supabase, table_name, columns, after, upto, key, page_size, retries, backoff):
+                pages.put(page)
+        except Exception as e:
+            pages.put(e)
+        pages.put(done)
+
+    threads = [threading.Thread(target=read_range, args=window, daemon=True) for window in ranges]
+    for thread in threads:
+        thread.start()
+
+    remaining = len(threads)
+    while remaining:
+        page = pages.get()
+        if page is done:
+            remaining -= 1
+        elif isinstance(page, Exception):
+            raise page
+        else:
+            yield page
+
+
+def iter_rows(pages):
+    for page in pages:
+        yield from page
+
+
+def export_dataframe(supabase, table_name=TABLE_NAME, columns="*", key=KEY_COLUMN, page_size=PAGE_SIZE,
+                     workers=DEFAULT_WORKERS):
+    # One small DataFrame per page, concatenated once, in key order like a plain select
+    frames = [pd.DataFrame(page) for page in iter_pages(supabase, table_name, columns, key, page_size, workers)]
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True).sort_values(key, ignore_index=True)
+
+
+def export_csv(pages, path):
+    count = 0
+    writer = None
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        for page in pages:
+            if writer is None:
+                writer = csv.DictWriter(f, fieldnames=list(page[0].keys()), lineterminator="\n")
+                writer.writeheader()
+            writer.writerows(page)
+            count += len(page)
+    return count
+
+
+def parquet_schema(page):
+    # The first page's schema, with every all-null column given a type up
+    # front: from PARQUET_TYPES if it's a known column, otherwise string
+    # (billWithdrawn, say, is a date string that is null unless the bill was
+    # withdrawn, so whole pages of it can be null)
+    return pa.schema([
+        pa.field(field.name, pa.type_for_alias(PARQUET_TYPES.get(field.name, "string")))
+        if pa.types.is_null(field.type) else field
+        for field in pa.Table.from_pylist(page).schema
+    ])
+
+
+def export_parquet(pages, path, schema=None):
+    # Each page becomes one row group, written with one schema: the one
+    # passed in, or parquet_schema() of the first page
+    if pa is None:
+        raise RuntimeError("Parquet export needs pyarrow: pip install pyarrow")
+    count = 0
+    writer = None
+    try:
+        for page in pages:
+            if writer is None:
+                schema = schema or parquet_schema(page)
+                writer = pq.ParquetWriter(path, schema)
+            writer.write_table(pa.Table.from_pylist(page, schema=schema))
+            count += len(page)
+    finally:
+        if writer is not None:
+            writer.close()
+    return count
+
+
+def export_sqlite(pages, db_path="bills.db", replace=True):
+    # Mirror into the indexed bills.db schema; replace=True drops bills Supabase no longer has
+    conn = connect(db_path)
+    try:
+        return load_bills(conn, iter_rows(pages), replace=replace)
+    finally:
+        conn.close()
+
+
+EXPORTERS = {"csv": export_csv, "parquet": export_parquet, "sqlite": export_sqlite}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export a Supabase table with keyset paging")
+    parser.add_argument("--table", default=TABLE_NAME)
+    parser.add_argument("--columns", default="*", help="Comma-separated columns to export")
+    parser.add_argument("--key", default=KEY_COLUMN, help="Integer column to page on")
+    parser.add_argument("--format", choices=sorted(EXPORTERS), default="csv")
+    parser.add_argument("--output", default="bills_export.csv", help="CSV/Parquet file or SQLite database")
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Key ranges read in parallel")
+    args = parser.parse_args()
+
+    supabase = create_supabase_client()
+    start = time.perf_counter()
+    pages = iter_pages(supabase, args.table, args.columns, args.key, args.page_size, args.workers)
+    count = EXPORTERS[args.format](pages, args.output)
+    print(f"✅ Exported {count} rows from '{args.table}' to {args.output} in {time.perf_counter() - start:.2f}s")
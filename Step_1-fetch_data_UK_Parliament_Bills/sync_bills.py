@@ -0,0 +1,88 @@
+import os
+import csv
+import json
+import argparse
+
+from fetch_bills import fetch_bills_updated_since, BASE_URL, DEFAULT_CONCURRENCY
+from process_downloaded_data import flatten_bill, FLAT_COLUMNS
+from create_local_bills_database import connect, load_bills
+
+# Incremental refresh: only fetch bills whose lastUpdate is at or after the
+# high-water mark of the previous run, then merge them into flat_bills.csv
+# and bills.db by bill_id instead of rebuilding both from a full crawl.
+
+STATE_PATH = "sync_state.json"
+CSV_PATH = "flat_bills.csv"
+DB_PATH = "bills.db"
+
+
+def load_high_water_mark(state_path=STATE_PATH, csv_path=CSV_PATH):
+    if os.path.exists(state_path):
+        with open(state_path, "r", encoding="utf-8") as f:
+            return json.load(f).get("lastUpdate")
+
+    # First incremental run after a full crawl: take the newest bill we already have
+    if os.path.exists(csv_path):
+        with open(csv_path, "r", encoding="utf-8", newline="") as f:
+            return max((row["lastUpdate"] for row in csv.DictReader(f) if row["lastUpdate"]), default=None)
+
+    return None
+
+
+def save_high_water_mark(mark, state_path=STATE_PATH):
+    with open(state_path, "w", encoding="utf-8") as f:
+        json.dump({"lastUpdate": mark}, f, indent=2)
+
+
+def merge_into_csv(rows, csv_path=CSV_PATH):
+    # Rewrite in place: changed bills keep their position, new bills go at the end.
+    # csv writes True/False/"" exactly as pandas did, so untouched rows don't change.
+    updates = {str(row["billId"]): row for row in rows}
+    merged = []
+    if os.path.exists(csv_path):
+        with open(csv_path, "r", encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                merged.append(updates.pop(row["billId"], row))
+    merged.extend(updates.values())
+
+    with open(csv_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FLAT_COLUMNS, lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(merged)
+
+
+def merge_into_db(rows, db_path=DB_PATH):
+    conn = connect(db_path)
+    load_bills(conn, rows)
+    conn.close()
+
+
+def sync_bills(base_url=BASE_URL, concurrency=DEFAULT_CONCURRENCY,
+               state_path=STATE_PATH, csv_path=CSV_PATH, db_path=DB_PATH):
+    since = load_high_water_mark(state_path, csv_path)
+    if since is None:
+        print("❌ No high-water mark found. Run the full pipeline once first.")
+        return None
+
+    print(f"🔄 Syncing bills updated since {since}...")
+    bills = fetch_bills_updated_since(since, base_url, concurrency)
+
+    # Newest-first paging can repeat a bill that moved between pages; keep its newest row
+    rows = list({bill.get("billId"): flatten_bill(bill) for bill in reversed(bills)}.values())
+    if rows:
+        merge_into_csv(rows, csv_path)
+        merge_into_db(rows, db_path)
+        since = max(since, max(row["lastUpdate"] for row in rows))
+
+    save_high_water_mark(since, state_path)
+    print(f"✅ Merged {len(rows)} changed bills into {csv_path} and {db_path} (mark: {since})")
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incrementally sync bills changed since the last run")
+    parser.add_argument("--base-url", default=BASE_URL, help="Bills endpoint (e.g. a local stand-in server)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Pages fetched in parallel")
+    args = parser.parse_args()
+
+    sync_bills(args.base_url, args.concurrency)
@@ -1,23 +1,30 @@
 import sqlite3
 
-conn = sqlite3.connect('bills.db')
-cursor = conn.cursor()
 
-# Count rows
-cursor.execute("SELECT COUNT(*) FROM bills;")
-print("Total bills:", cursor.fetchone()[0])
+def verify_bills_db(conn):
+    cursor = conn.cursor()
 
-# Preview 5 bills
-cursor.execute("SELECT bill_id, short_title, current_house FROM bills LIMIT 5;")
-for row in cursor.fetchall():
-    print(row)
+    # Count rows
+    cursor.execute("SELECT COUNT(*) FROM bills;")
+    total = cursor.fetchone()[0]
+    print("Total bills:", total)
 
-# Bills that became laws
-cursor.execute("SELECT bill_id, short_title FROM bills WHERE is_act = 1;")
-acts = cursor.fetchall()
-print("Bills that became Acts:")
-for act in acts:
-    print(act)
+    # Preview 5 bills
+    cursor.execute("SELECT bill_id, short_title, current_house FROM bills LIMIT 5;")
+    for row in cursor.fetchall():
+        print(row)
 
-conn.close()
+    # Bills that became laws
+    cursor.execute("SELECT bill_id, short_title FROM bills WHERE is_act = 1;")
+    acts = cursor.fetchall()
+    print("Bills that became Acts:")
+    for act in acts:
+        print(act)
 
+    return {"total": total, "acts": len(acts)}
+
+
+if __name__ == "__main__":
+    conn = sqlite3.connect('bills.db')
+    verify_bills_db(conn)
+    conn.close()
@@ -1,39 +1,121 @@
 import os
 import sys
+import json
+import time
+import argparse
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from supabase import create_client
 from dotenv import load_dotenv
 
+DEFAULT_CHUNK_SIZE = 500
+DEFAULT_WORKERS = 4
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 1.0  # seconds, doubled on every retry
 
-def upload_csv_to_supabase(csv_file_path, table_name):
-    load_dotenv()
 
-    url = os.getenv("SUPABASE_URL")
-    key = os.getenv("SUPABASE_API_KEY")
+def read_records(csv_file_path):
+    # NaN isn't valid JSON; send missing values as null
+    df = pd.read_csv(csv_file_path)
+    df = df.astype(object).where(df.notna(), None)
+    return df.to_dict(orient='records')
 
-    supabase = create_client(url, key)
 
-    # Read your CSV file into a DataFrame
-    df = pd.read_csv(csv_file_path)
+def upload_chunk(supabase, table_name, chunk, on_conflict, retries, backoff):
+    # The current client raises APIError (or an httpx error) instead of setting response.error
+    error = None
+    for attempt in range(retries + 1):
+        try:
+            query = supabase.table(table_name)
+            if on_conflict:
+                query = query.upsert(chunk, on_conflict=on_conflict, returning="minimal")
+            else:
+                query = query.insert(chunk, returning="minimal")
+            query.execute()
+            return None, attempt
+        except Exception as e:
+            error = str(e)
+            if attempt < retries:
+                time.sleep(backoff * 2 ** attempt)
+    return error, retries
 
-    # Convert DataFrame to list of dicts
-    data = df.to_dict(orient='records')
 
-    # Insert data into Supabase
-    for row in data:
-        response = supabase.table(table_name).insert(row).execute()
-        if response.error:
-            print(f"Error inserting row {row}: {response.error}")
-        else:
-            print(f"Inserted row: {row}")
+def upload_records(supabase, records, table_name, chunk_size=DEFAULT_CHUNK_SIZE, workers=DEFAULT_WORKERS,
+                   on_conflict="billId", retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF):
+    start = time.perf_counter()
+    chunks = [(i, records[i:i + chunk_size]) for i in range(0, len(records), chunk_size)]
 
+    failed = []
+    retried = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(upload_chunk, supabase, table_name, chunk, on_conflict, retries, backoff): (i, chunk)
+            for i, chunk in chunks
+        }
+        for future in as_completed(futures):
+            i, chunk = futures[future]
+            error, attempts = future.result()
+            retried += attempts
+            if error:
+                failed.append({"first_row": i, "rows": len(chunk), "error": error})
 
-if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print("Usage: python upload_to_supabase.py <csv_file_path> <table_name>")
-        sys.exit(1)
+    failed.sort(key=lambda f: f["first_row"])
+    return {
+        "table": table_name,
+        "rows": len(records),
+        "chunks": len(chunks),
+        "chunk_size": chunk_size,
+        "workers": workers,
+        "uploaded_rows": len(records) - sum(f["rows"] for f in failed),
+        "failed_chunks": failed,
+        "retries": retried,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+def print_report(report):
+    print(f"📤 {report['uploaded_rows']}/{report['rows']} rows uploaded to '{report['table']}' "
+          f"in {report['chunks']} chunks of {report['chunk_size']} "
+          f"({report['workers']} workers, {report['retries']} retries, {report['seconds']}s)")
+    for failure in report["failed_chunks"]:
+        print(f"❌ Rows {failure['first_row']}-{failure['first_row'] + failure['rows'] - 1}: {failure['error']}")
+
+
+def upload_csv_to_supabase(csv_file_path, table_name, chunk_size=DEFAULT_CHUNK_SIZE, workers=DEFAULT_WORKERS,
+                           on_conflict="billId", report_path="upload_report.json", supabase=None):
+    if supabase is None:
+        load_dotenv()
 
-    csv_file_path = sys.argv[1]
-    table_name = sys.argv[2]
+        url = os.getenv("SUPABASE_URL")
+        key = os.getenv("SUPABASE_API_KEY")
 
-    upload_csv_to_supabase(csv_file_path, table_name)
+        supabase = create_client(url, key)
+
+    # Read your CSV file into a list of dicts
+    records = read_records(csv_file_path)
+
+    report = upload_records(supabase, records, table_name, chunk_size, workers, on_conflict)
+    print_report(report)
+
+    if report_path:
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"📝 Report saved to {report_path}")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Upload a CSV to a Supabase table in batched upserts")
+    parser.add_argument("csv_file_path")
+    parser.add_argument("table_name")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows per request")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Chunks uploaded in parallel")
+    parser.add_argument("--on-conflict", default="billId",
+                        help="Upsert key; pass an empty string for plain inserts")
+    parser.add_argument("--report", default="upload_report.json", help="Where to write the summary report")
+    args = parser.parse_args()
+
+    report = upload_csv_to_supabase(args.csv_file_path, args.table_name, args.chunk_size, args.workers,
+                                    args.on_conflict or None, args.report)
+    if report["failed_chunks"]:
+        sys.exit(1)
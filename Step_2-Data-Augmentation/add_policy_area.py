@@ -1,61 +1,39 @@
 import os
-import pandas as pd
 from supabase import create_client
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import AsyncOpenAI
+import re
 import json
-import time
-
-# Load environment variables
-load_dotenv()
-
-# Connect to Supabase
-url = os.getenv("SUPABASE_URL")
-key = os.getenv("SUPABASE_API_KEY")
-supabase = create_client(url, key)
-
-# Set up OpenAI client
-openai_api_key = os.getenv("OPENAI_API_KEY")
-openai = OpenAI(api_key=openai_api_key)
-
-# Retrieve all rows from Supabase
-table_name = "all_bills_uk"
-batch_size = 1000
-offset = 0
-all_rows = []
-
-while True:
-    response = supabase.table(table_name).select("*").range(offset, offset + batch_size - 1).execute()
-    if not response.data:
-        break
-    all_rows.extend(response.data)
-    offset += batch_size
-
-df_bills = pd.DataFrame(all_rows)
-print(f"✅ Loaded {len(df_bills)} bills")
-
-# -- Removed filter to bills from 2020 onwards --
-# if 'lastUpdate' in df_bills.columns:
-#     df_bills['lastUpdate'] = pd.to_datetime(df_bills['lastUpdate'], errors='coerce')
-#     df_bills = df_bills[df_bills['lastUpdate'] >= '2020-01-01'].copy()
-#     print(f"📅 Filtered to {len(df_bills)} bills from 2020 onwards")
-# else:
-#     print("⚠️ 'lastUpdate' column missing from dataset")
-
-# Categorize shortTitles into policyArea using batch GPT calls
-if 'shortTitle' in df_bills.columns:
-    unique_titles = df_bills.dropna(subset=['shortTitle']).drop_duplicates(subset=['shortTitle'])[['billId', 'shortTitle']]
-    policy_map = {}
-    batch_size = 50
-
-    for i in range(0, len(unique_titles), batch_size):
-        # if i >= batch_size * 3:  # Limit to first 3 batches for testing
-        #     break
-
-        batch = unique_titles.iloc[i:i + batch_size]
-        title_dict = {str(bid): title for bid, title in zip(batch['billId'], batch['shortTitle'])}
-
-        prompt = f"""
+import asyncio
+import hashlib
+import argparse
+from datetime import datetime, timezone
+
+import step_paths
+from supabase_export import export_dataframe
+from classification_cache import ClassificationCache
+from local_classifier import PolicyAreaClassifier, MODEL_PATH, VALID_POLICY_AREAS
+from classification_engine import (
+    AdaptiveScheduler, estimate_tokens, plan_batches, run_batches,
+    DEFAULT_MAX_CONCURRENCY, DEFAULT_REQUESTS_PER_MINUTE, DEFAULT_TOKENS_PER_MINUTE
+)
+
+MODEL = "gpt-4o"
+TABLE_NAME = "all_bills_uk"
+BATCH_SIZE = 50  # upper bound; batches also stay under MAX_BATCH_TOKENS
+MAX_BATCH_TOKENS = 2000
+LOCAL_CONFIDENCE = 0.8  # local predictions below this go to GPT
+MAX_ROUNDS = 3  # first pass + follow-ups for missing/invalid IDs
+DEAD_LETTER_PATH = "policy_area_dead_letter.jsonl"
+
+# Accepted spellings (casefolded) -> exact policy area
+LABEL_ALIASES = {area.casefold(): area for area in VALID_POLICY_AREAS}
+LABEL_ALIASES.update({"defence": "Defense", "socialcare": "Social Care", "social-care": "Social Care"})
+
+# "1234": "Health" pairs, for reading responses that aren't valid JSON
+ID_LABEL_PAIR = re.compile(r'"(\d+)"\s*:\s*"([^"]*)"')
+
+PROMPT_TEMPLATE = """
 Given the following UK bill short titles, classify each into one of the following policy areas:
 Health, Education, Defense, Economy, Environment, Justice, Transport, Housing, Social Care, Other.
 
@@ -64,47 +42,227 @@ Return the result as a JSON object with the billId as key and policy area as val
 ❗Important: Use the exact billId provided for keys.
 
 Bills:
-{json.dumps(title_dict, indent=2)}
+{bills}
 """
-        try:
-            completion = openai.chat.completions.create(
-                model="gpt-4o",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.2,
-            )
-            content = completion.choices[0].message.content.strip()
-
-            # Sanitize GPT output
-            if content.startswith("```"):
-                content = content.strip("`").strip()
-                if content.startswith("json"):
-                    content = content[4:].strip()
-
-            # Attempt to parse JSON
-            result = json.loads(content)
-            policy_map.update(result)
-            print(f"✅ Processed batch {i // batch_size + 1}/{(len(unique_titles) + batch_size - 1) // batch_size}")
-            for bill_id, area in result.items():
-                title = title_dict.get(bill_id, "<Unknown>")
-                print(f"🔹 {title} ({bill_id}) -> {area}")
-            time.sleep(1.5)
-
-        except json.JSONDecodeError:
-            print(f"❌ JSON parsing error in batch {i // batch_size + 1}. Content was:\n{content}")
-        except Exception as e:
-            print(f"❌ Error in batch {i // batch_size + 1}: {e}")
-            continue
-
-    # Create mapping from shortTitle -> policyArea
-    bid_to_title = unique_titles.set_index('billId')['shortTitle'].to_dict()
-    short_title_to_policy = {bid_to_title[int(bid)]: area for bid, area in policy_map.items() if int(bid) in bid_to_title}
-
-    # Apply mapping to all rows using shortTitle
-    df_bills['policyArea'] = df_bills['shortTitle'].map(short_title_to_policy)
-    print("✅ Added 'policyArea' to full dataset")
-
-    # Save full updated dataset
-    df_bills.to_csv("bills_with_policy_area_full.csv", index=False)
-    print("💾 Saved full dataset with 'policyArea' to 'bills_with_policy_area_full.csv")
-else:
-    print("⚠️ 'shortTitle' column missing from dataset")
+
+# Cached labels are only reused for the exact prompt that produced them
+PROMPT_VERSION = hashlib.sha256(PROMPT_TEMPLATE.encode("utf-8")).hexdigest()[:12]
+
+
+def load_bills(supabase, table_name=TABLE_NAME):
+    # Retrieve all rows from Supabase (keyset pages, several key ranges at once)
+    return export_dataframe(supabase, table_name)
+
+
+def parse_response(content):
+    # Sanitize GPT output, then salvage what we can: if the JSON is broken
+    # (truncated, trailing text, ...), fall back to the "billId": "Area" pairs
+    # that are still readable.
+    content = content.strip()
+    if content.startswith("```"):
+        content = content.strip("`").strip()
+        if content.startswith("json"):
+            content = content[4:].strip()
+    try:
+        result = json.loads(content)
+        if isinstance(result, dict):
+            return {str(bill_id): area for bill_id, area in result.items()}
+    except json.JSONDecodeError:
+        pass
+    return dict(ID_LABEL_PAIR.findall(content))
+
+
+def normalize_label(area):
+    # Exact policy area name for a label GPT returned, or None if it isn't one
+    if not isinstance(area, str):
+        return None
+    area = " ".join(area.split()).casefold()
+    return LABEL_ALIASES.get(area)
+
+
+def validate_result(result, title_dict):
+    # Split a parsed response into {billId: area} we can keep and {billId: reason} to retry
+    valid, rejected = {}, {}
+    for bill_id in title_dict:
+        if bill_id not in result:
+            rejected[bill_id] = "missing from response"
+        elif normalize_label(result[bill_id]) is None:
+            rejected[bill_id] = f"invalid label {result[bill_id]!r}"
+        else:
+            valid[bill_id] = normalize_label(result[bill_id])
+    return valid, rejected
+
+
+async def classify_batch(openai, title_dict, model=MODEL):
+    prompt = PROMPT_TEMPLATE.format(bills=json.dumps(title_dict, indent=2))
+    completion = await openai.chat.completions.create(
+        model=model,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0.2,
+    )
+    return parse_response(completion.choices[0].message.content)
+
+
+def write_dead_letters(path, failed, items, rounds):
+    # Append-only record of titles we couldn't classify, with the last reason
+    now = datetime.now(timezone.utc).isoformat()
+    with open(path, "a", encoding="utf-8") as f:
+        for bill_id, reason in failed.items():
+            f.write(json.dumps({"billId": bill_id, "shortTitle": items[bill_id], "reason": reason,
+                                "rounds": rounds, "failedAt": now}, ensure_ascii=False) + "\n")
+
+
+def classify_locally(local_model, todo, confidence=LOCAL_CONFIDENCE):
+    # First tier: one vectorized pass over every title; keep the confident ones
+    if local_model is None or todo.empty:
+        return {}
+    labels, confidences = local_model.predict(todo['shortTitle'].tolist())
+    return {
+        title: label
+        for title, label, score in zip(todo['shortTitle'], labels, confidences)
+        if score >= confidence
+    }
+
+
+async def classify_titles_async(openai, unique_titles, cache, model=MODEL, max_batch_tokens=MAX_BATCH_TOKENS,
+                                scheduler=None, local_model=None, local_confidence=LOCAL_CONFIDENCE,
+                                dead_letter_path=DEAD_LETTER_PATH):
+    # Returns {shortTitle: policyArea}. Titles already in the cache are reused,
+    # confident local predictions are taken as-is, and only the rest go to GPT,
+    # several batches at a time, each finished batch cached straight away.
+    short_title_to_policy = cache.get_many(unique_titles['shortTitle'])
+    todo = unique_titles[~unique_titles['shortTitle'].isin(short_title_to_policy.keys())]
+
+    local = classify_locally(local_model, todo, local_confidence)
+    short_title_to_policy.update(local)
+    todo = todo[~todo['shortTitle'].isin(local.keys())]
+    print(f"🗄️  {len(short_title_to_policy) - len(local)} titles from cache, {len(local)} classified locally, "
+          f"{len(todo)} to classify with {model}")
+
+    items = {str(bid): title for bid, title in zip(todo['billId'], todo['shortTitle'])}
+    overhead_tokens = estimate_tokens(PROMPT_TEMPLATE)
+    scheduler = scheduler or AdaptiveScheduler()
+
+    # Round 1 sends everything; each later round re-sends only the IDs that
+    # came back missing, unparseable or with an invalid label, in smaller batches
+    pending = dict(items)
+    failed = {}
+    batch_size = BATCH_SIZE
+    for round_number in range(1, MAX_ROUNDS + 1):
+        batches = plan_batches(pending, overhead_tokens, max_batch_tokens, max_batch_size=batch_size)
+        failed = {}
+
+        def on_result(index, title_dict, result):
+            valid, rejected = validate_result(result, title_dict)
+            print(f"✅ Round {round_number}, batch {index + 1}/{len(batches)}: "
+                  f"{len(valid)}/{len(title_dict)} classified")
+            for bill_id, area in valid.items():
+                print(f"🔹 {title_dict[bill_id]} ({bill_id}) -> {area}")
+            classified = {title_dict[bill_id]: area for bill_id, area in valid.items()}
+            cache.put_many(classified)
+            short_title_to_policy.update(classified)
+            failed.update(rejected)
+
+        def on_error(index, title_dict, error):
+            print(f"❌ Error in round {round_number}, batch {index + 1}: {error}")
+            failed.update({bill_id: f"error: {error}" for bill_id in title_dict})
+
+        _, stats = await run_batches(
+            batches,
+            lambda title_dict: classify_batch(openai, title_dict, model),
+            scheduler=scheduler,
+            on_result=on_result,
+            on_error=on_error,
+        )
+        if not failed:
+            break
+        print(f"🔁 {len(failed)} titles left after round {round_number}")
+        pending = {bill_id: items[bill_id] for bill_id in failed}
+        batch_size = max(1, batch_size // 5)
+
+    print(f"📈 {stats['requests']} requests, {stats['rate_limited']} rate-limited, "
+          f"peak concurrency {stats['peak_concurrency']}")
+    if failed:
+        write_dead_letters(dead_letter_path, failed, items, round_number)
+        print(f"☠️  {len(failed)} titles still unclassified, written to {dead_letter_path}")
+    return short_title_to_policy
+
+
+def classify_titles(openai, unique_titles, cache, model=MODEL, max_batch_tokens=MAX_BATCH_TOKENS,
+                    max_concurrency=DEFAULT_MAX_CONCURRENCY, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE,
+                    tokens_per_minute=DEFAULT_TOKENS_PER_MINUTE, local_model=None,
+                    local_confidence=LOCAL_CONFIDENCE, dead_letter_path=DEAD_LETTER_PATH):
+    async def main():
+        scheduler = AdaptiveScheduler(max_concurrency, requests_per_minute, tokens_per_minute)
+        return await classify_titles_async(openai, unique_titles, cache, model, max_batch_tokens, scheduler,
+                                           local_model, local_confidence, dead_letter_path)
+
+    return asyncio.run(main())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Add a GPT-classified policyArea to every bill")
+    parser.add_argument("--cache", default="policy_area_cache.db", help="SQLite classification cache")
+    parser.add_argument("--output", default="bills_with_policy_area_full.csv")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY, help="Max batches in flight")
+    parser.add_argument("--rpm", type=int, default=DEFAULT_REQUESTS_PER_MINUTE, help="Request budget per minute")
+    parser.add_argument("--tpm", type=int, default=DEFAULT_TOKENS_PER_MINUTE, help="Token budget per minute")
+    parser.add_argument("--max-batch-tokens", type=int, default=MAX_BATCH_TOKENS,
+                        help="Estimated prompt + answer tokens per batch")
+    parser.add_argument("--local-model", default=MODEL_PATH,
+                        help="Local classifier tried before GPT (train with: python local_classifier.py train)")
+    parser.add_argument("--local-confidence", type=float, default=LOCAL_CONFIDENCE,
+                        help="Minimum local confidence to skip GPT")
+    parser.add_argument("--no-local", action="store_true", help="Send every title to GPT")
+    parser.add_argument("--dead-letter", default=DEAD_LETTER_PATH,
+                        help="Where titles that still fail after all retry rounds are recorded")
+    args = parser.parse_args()
+
+    # Load environment variables
+    load_dotenv()
+
+    # Connect to Supabase
+    url = os.getenv("SUPABASE_URL")
+    key = os.getenv("SUPABASE_API_KEY")
+    supabase = create_client(url, key)
+
+    # Set up OpenAI client
+    openai_api_key = os.getenv("OPENAI_API_KEY")
+    openai = AsyncOpenAI(api_key=openai_api_key)
+
+    df_bills = load_bills(supabase)
+    print(f"✅ Loaded {len(df_bills)} bills")
+
+    # -- Removed filter to bills from 2020 onwards --
+    # if 'lastUpdate' in df_bills.columns:
+    #     df_bills['lastUpdate'] = pd.to_datetime(df_bills['lastUpdate'], errors='coerce')
+    #     df_bills = df_bills[df_bills['lastUpdate'] >= '2020-01-01'].copy()
+    #     print(f"📅 Filtered to {len(df_bills)} bills from 2020 onwards")
+    # else:
+    #     print("⚠️ 'lastUpdate' column missing from dataset")
+
+    # Categorize shortTitles into policyArea using batch GPT calls
+    if 'shortTitle' in df_bills.columns:
+        unique_titles = df_bills.dropna(subset=['shortTitle']).drop_duplicates(subset=['shortTitle'])[['billId', 'shortTitle']]
+
+        local_model = None
+        if not args.no_local and os.path.exists(args.local_model):
+            local_model = PolicyAreaClassifier.load(args.local_model)
+
+        cache = ClassificationCache(args.cache, model=MODEL, prompt_version=PROMPT_VERSION)
+        short_title_to_policy = classify_titles(openai, unique_titles, cache, MODEL, args.max_batch_tokens,
+                                                args.concurrency, args.rpm, args.tpm,
+                                                local_model, args.local_confidence, args.dead_letter)
+        stats = cache.stats()
+        print(f"🗄️  Cache: {stats['hits']} hits, {stats['misses']} misses (hit rate {stats['hit_rate']:.1%})")
+        cache.close()
+
+        # Apply mapping to all rows using shortTitle
+        df_bills['policyArea'] = df_bills['shortTitle'].map(short_title_to_policy)
+        print("✅ Added 'policyArea' to full dataset")
+
+        # Save full updated dataset
+        df_bills.to_csv(args.output, index=False)
+        print(f"💾 Saved full dataset with 'policyArea' to '{args.output}'")
+    else:
+        print("⚠️ 'shortTitle' column missing from dataset")
@@ -0,0 +1,68 @@
+import io
+import time
+import asyncio
+import argparse
+import pandas as pd
+from contextlib import redirect_stdout
+
+from add_policy_area import classify_batch, classify_titles_async, BATCH_SIZE
+from classification_cache import ClassificationCache
+from classification_engine import AdaptiveScheduler
+from fake_llm import FakeAsyncLLM
+
+# Compares the old one-batch-at-a-time loop with the async engine against a
+# fake LLM, so the scheduling can be tuned without spending on the real API.
+
+
+async def sequential(llm, unique_titles, pause):
+    # The original loop: fixed batches of 50, one after another, sleeping between them
+    for i in range(0, len(unique_titles), BATCH_SIZE):
+        batch = unique_titles.iloc[i:i + BATCH_SIZE]
+        try:
+            await classify_batch(llm, {str(bid): title for bid, title in zip(batch['billId'], batch['shortTitle'])})
+        except Exception:
+            pass  # the old loop dropped the batch and moved on
+        await asyncio.sleep(pause)
+
+
+async def engine(llm, unique_titles, args):
+    cache = ClassificationCache(":memory:")
+    scheduler = AdaptiveScheduler(args.concurrency, args.rpm, args.tpm)
+    with redirect_stdout(io.StringIO()):
+        await classify_titles_async(llm, unique_titles, cache, scheduler=scheduler)
+    return scheduler.stats
+
+
+def report(label, llm, elapsed, titles):
+    print(f"{label:<34} {elapsed:7.2f}s  {titles / elapsed:8.1f} titles/s  "
+          f"{llm.calls:4d} calls  {llm.rate_limited:3d} x 429")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark batch classification against a fake LLM")
+    parser.add_argument("--csv", default="bills_with_policy_area_full.csv")
+    parser.add_argument("--limit", type=int, default=1000, help="Number of unique titles to classify")
+    parser.add_argument("--latency", type=float, default=0.5, help="Fake LLM seconds per call")
+    parser.add_argument("--fake-rpm", type=int, default=None, help="Fake LLM requests per --window before 429s")
+    parser.add_argument("--window", type=float, default=10.0, help="Fake LLM rate-limit window in seconds")
+    parser.add_argument("--pause", type=float, default=1.5, help="Sleep between batches in the old loop")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rpm", type=int, default=500)
+    parser.add_argument("--tpm", type=int, default=200000)
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.csv)
+    unique_titles = df.dropna(subset=['shortTitle']).drop_duplicates(subset=['shortTitle'])[['billId', 'shortTitle']]
+    unique_titles = unique_titles.head(args.limit)
+    print(f"📊 {len(unique_titles)} titles, fake latency {args.latency}s, fake limit {args.fake_rpm}/{args.window}s\n")
+
+    llm = FakeAsyncLLM(args.latency, requests_per_minute=args.fake_rpm, window=args.window)
+    start = time.perf_counter()
+    asyncio.run(sequential(llm, unique_titles, args.pause))
+    report(f"sequential (+{args.pause}s pause)", llm, time.perf_counter() - start, len(unique_titles))
+
+    llm = FakeAsyncLLM(args.latency, requests_per_minute=args.fake_rpm, window=args.window)
+    start = time.perf_counter()
+    stats = asyncio.run(engine(llm, unique_titles, args))
+    report(f"engine (max concurrency {args.concurrency})", llm, time.perf_counter() - start, len(unique_titles))
+    print(f"\npeak concurrency {stats['peak_concurrency']}, {stats['errors']} other errors")
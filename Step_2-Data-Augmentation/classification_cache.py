@@ -0,0 +1,82 @@
+import re
+import sqlite3
+import hashlib
+import unicodedata
+from datetime import datetime, timezone
+
+# On-disk cache of policyArea classifications so re-runs only pay for new or
+# changed titles. Entries are keyed by normalized title + model + prompt
+# version, so changing either one naturally misses instead of serving stale labels.
+
+
+def normalize_title(title):
+    title = unicodedata.normalize("NFKC", str(title))
+    return re.sub(r"\s+", " ", title).strip().casefold()
+
+
+class ClassificationCache:
+    def __init__(self, path="policy_area_cache.db", model="gpt-4o", prompt_version="v1"):
+        self.path = path
+        self.model = model
+        self.prompt_version = prompt_version
+        self.hits = 0
+        self.misses = 0
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS classifications (
+                key TEXT PRIMARY KEY,
+                title TEXT,
+                model TEXT,
+                prompt_version TEXT,
+                policy_area TEXT,
+                created_at TEXT
+            )
+        """)
+        self.conn.commit()
+
+    def key(self, title):
+        raw = "\x1f".join([normalize_title(title), self.model, self.prompt_version])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get_many(self, titles):
+        # Returns {title: policy_area} for the titles already classified
+        keys = {}
+        for title in titles:
+            keys.setdefault(self.key(title), []).append(title)
+
+        found = {}
+        key_list = list(keys)
+        for i in range(0, len(key_list), 500):  # stay under SQLite's variable limit
+            chunk = key_list[i:i + 500]
+            rows = self.conn.execute(
+                f"SELECT key, policy_area FROM classifications WHERE key IN ({', '.join('?' * len(chunk))})",
+                chunk
+            )
+            for key, area in rows:
+                for title in keys[key]:
+                    found[title] = area
+        self.hits += len(found)
+        self.misses += sum(len(group) for group in keys.values()) - len(found)
+        return found
+
+    def put_many(self, title_to_area):
+        # Committed straight away so a crash mid-run keeps every finished batch
+        now = datetime.now(timezone.utc).isoformat()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO classifications VALUES (?, ?, ?, ?, ?, ?)",
+                [(self.key(title), title, self.model, self.prompt_version, area, now)
+                 for title, area in title_to_area.items()]
+            )
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,151 @@
+import time
+import asyncio
+
+# Async scheduler for batched LLM calls. Several batches run at once; how
+# many is adapted to the request/token budgets and backed off on 429s
+# (honouring Retry-After). The client call is injected, so the engine can be
+# benchmarked against a fake LLM.
+
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_REQUESTS_PER_MINUTE = 500
+DEFAULT_TOKENS_PER_MINUTE = 30000
+DEFAULT_MAX_RETRIES = 5
+
+
+def estimate_tokens(text):
+    # ~4 characters per token for English; close enough for budgeting
+    return len(text) // 4 + 1
+
+
+def plan_batches(items, overhead_tokens, max_batch_tokens=2000, max_batch_size=50, output_tokens_per_item=12):
+    # Pack {id: text} into batches whose estimated prompt + answer size stays
+    # under max_batch_tokens, so long titles make smaller batches.
+    batches = []
+    batch, batch_tokens = {}, overhead_tokens
+    for item_id, text in items.items():
+        item_tokens = estimate_tokens(f'"{item_id}": "{text}",') + output_tokens_per_item
+        if batch and (batch_tokens + item_tokens > max_batch_tokens or len(batch) >= max_batch_size):
+            batches.append((batch, batch_tokens))
+            batch, batch_tokens = {}, overhead_tokens
+        batch[item_id] = text
+        batch_tokens += item_tokens
+    if batch:
+        batches.append((batch, batch_tokens))
+    return batches
+
+
+def retry_after_seconds(error, default=1.0):
+    # 429s from the OpenAI client (and our fakes) carry the response headers
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    for header in ("retry-after-ms", "retry-after"):
+        value = headers.get(header)
+        if value is not None:
+            try:
+                return float(value) / (1000 if header.endswith("ms") else 1)
+            except ValueError:
+                pass
+    return default
+
+
+def is_rate_limited(error):
+    return getattr(error, "status_code", None) == 429
+
+
+class TokenBucket:
+    def __init__(self, per_minute):
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def take(self, amount):
+        amount = min(amount, self.capacity)
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+
+class AdaptiveScheduler:
+    # AIMD concurrency: +1 slot after a run of successes, halve on a 429 and
+    # pause every new request until the Retry-After has passed.
+
+    def __init__(self, max_concurrency=DEFAULT_MAX_CONCURRENCY, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE,
+                 tokens_per_minute=DEFAULT_TOKENS_PER_MINUTE):
+        self.max_concurrency = max_concurrency
+        self.limit = max_concurrency
+        self.active = 0
+        self.successes = 0
+        self.paused_until = 0.0
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.condition = asyncio.Condition()
+        self.stats = {"requests": 0, "rate_limited": 0, "errors": 0, "peak_concurrency": 0}
+
+    async def acquire(self, estimated_tokens):
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.active < self.limit)
+            self.active += 1
+            self.stats["peak_concurrency"] = max(self.stats["peak_concurrency"], self.active)
+        delay = self.paused_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await self.requests.take(1)
+        await self.tokens.take(estimated_tokens)
+        self.stats["requests"] += 1
+
+    async def release(self, error=None):
+        async with self.condition:
+            self.active -= 1
+            if error is not None and is_rate_limited(error):
+                self.stats["rate_limited"] += 1
+                self.limit = max(1, self.limit // 2)
+                self.successes = 0
+                self.paused_until = max(self.paused_until, time.monotonic() + retry_after_seconds(error))
+            elif error is not None:
+                self.stats["errors"] += 1
+            else:
+                self.successes += 1
+                if self.successes >= self.limit and self.limit < self.max_concurrency:
+                    self.limit += 1
+                    self.successes = 0
+            self.condition.notify_all()
+
+
+async def run_batches(batches, call, scheduler=None, on_result=None, on_error=None,
+                      max_retries=DEFAULT_MAX_RETRIES, backoff=1.0):
+    # batches: list of (payload, estimated_tokens). call: async fn(payload) -> result.
+    # on_result(index, payload, result) runs as each batch finishes (e.g. to cache it);
+    # on_error(index, payload, error) runs once a batch has used up its retries.
+    scheduler = scheduler or AdaptiveScheduler()
+    results = [None] * len(batches)
+
+    async def run_one(index, payload, estimated_tokens):
+        for attempt in range(max_retries + 1):
+            await scheduler.acquire(estimated_tokens)
+            try:
+                result = await call(payload)
+            except Exception as e:
+                await scheduler.release(e)
+                if attempt == max_retries:
+                    if on_error:
+                        on_error(index, payload, e)
+                    return
+                if not is_rate_limited(e):
+                    await asyncio.sleep(backoff * 2 ** attempt)
+                continue
+            await scheduler.release()
+            results[index] = result
+            if on_result:
+                on_result(index, payload, result)
+            return
+
+    await asyncio.gather(*(run_one(i, payload, tokens) for i, (payload, tokens) in enumerate(batches)))
+    return results, scheduler.stats
@@ -0,0 +1,102 @@
+import re
+import json
+import time
+import random
+import asyncio
+from collections import deque
+from types import SimpleNamespace
+
+# Stand-in for openai.AsyncOpenAI with configurable latency and a requests-
+# per-minute limit that answers with 429 + Retry-After, for benchmarking the
+# classification engine offline. Labels come from a crude keyword lookup.
+# With stream=True the answer arrives word by word, token_delay apart, after
+# the usual latency (time to first token).
+
+KEYWORDS = {
+    "Health": ["health", "nhs", "medical", "hospital", "abortion", "care", "drug", "disease"],
+    "Education": ["school", "education", "university", "student", "teacher", "children"],
+    "Defense": ["armed forces", "defence", "defense", "military", "veterans"],
+    "Economy": ["finance", "tax", "bank", "budget", "appropriation", "business", "trade"],
+    "Environment": ["climate", "environment", "energy", "pollution", "animal", "wildlife", "air quality"],
+    "Justice": ["crime", "criminal", "court", "justice", "police", "offences", "sentenc", "prison"],
+    "Transport": ["transport", "rail", "road", "vehicle", "aviation", "airport", "bus"],
+    "Housing": ["housing", "homes", "tenant", "landlord", "rent", "leasehold"],
+    "Social Care": ["social care", "carers", "welfare", "disab", "pension", "benefit"],
+}
+
+
+def keyword_label(title):
+    lowered = title.lower()
+    for area, words in KEYWORDS.items():
+        if any(word in lowered for word in words):
+            return area
+    return "Other"
+
+
+class FakeRateLimitError(Exception):
+    status_code = 429
+
+    def __init__(self, retry_after):
+        super().__init__(f"Rate limit reached, retry after {retry_after:.2f}s")
+        self.response = SimpleNamespace(headers={"retry-after": f"{retry_after:.3f}"})
+
+
+def completion(content):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+class FakeStream:
+    def __init__(self, content, token_delay):
+        self.pieces = re.findall(r"\s*\S+", content)
+        self.token_delay = token_delay
+        self.closed = False
+
+    def __aiter__(self):
+        return self.chunks()
+
+    async def chunks(self):
+        for i, piece in enumerate(self.pieces):
+            if self.closed:
+                return
+            if i and self.token_delay:
+                await asyncio.sleep(self.token_delay)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))])
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeAsyncLLM:
+    def __init__(self, latency=0.5, jitter=0.1, requests_per_minute=None, window=60.0, answer=None, token_delay=0.0):
+        self.latency = latency
+        self.token_delay = token_delay
+        self.jitter = jitter
+        self.requests_per_minute = requests_per_minute
+        self.window = window  # shrink to make the rate limit bite in short benchmarks
+        self.answer = answer or self.answer_bills
+        self.sent = deque()
+        self.calls = 0
+        self.rate_limited = 0
+        self.chat = SimpleNamespace(completions=self)
+
+    async def create(self, model=None, messages=None, stream=False, **kwargs):
+        self.calls += 1
+        now = time.monotonic()
+        if self.requests_per_minute:
+            while self.sent and now - self.sent[0] > self.window:
+                self.sent.popleft()
+            if len(self.sent) >= self.requests_per_minute:
+                self.rate_limited += 1
+                raise FakeRateLimitError(self.window - (now - self.sent[0]))
+            self.sent.append(now)
+
+        await asyncio.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+        if stream:
+            return FakeStream(self.answer(messages[-1]["content"]), self.token_delay)
+        return completion(self.answer(messages[-1]["content"]))
+
+    @staticmethod
+    def answer_bills(prompt):
+        # Answers the add_policy_area prompt: {"billId": "Area", ...}
+        bills = json.loads(prompt.split("Bills:", 1)[1])
+        return "```json\n" + json.dumps({bill_id: keyword_label(title) for bill_id, title in bills.items()}) + "\n```"
@@ -0,0 +1,161 @@
+import re
+import time
+import zlib
+import argparse
+import numpy as np
+import pandas as pd
+
+# Cheap local first tier for policyArea: hashed word/character n-grams and a
+# softmax (multinomial logistic) regression, trained on the labels GPT has
+# already produced. Confident predictions are used as-is; only the rest go
+# to the LLM.
+
+VALID_POLICY_AREAS = [
+    "Defense", "Economy", "Education", "Environment", "Health",
+    "Housing", "Justice", "Other", "Social Care", "Transport"
+]
+
+N_FEATURES = 1 << 16
+MODEL_PATH = "policy_area_model.npz"
+
+# Words every title has; they carry no signal about the policy area
+NOISE = re.compile(r"\[hl\]|\(no\.? ?\d+\)|\b(bill|act|amendment|\d{4})\b")
+
+
+def tokenize(title):
+    words = re.findall(r"[a-z]+", NOISE.sub(" ", str(title).lower()))
+    features = [f"w:{word}" for word in words]
+    features += [f"b:{a}_{b}" for a, b in zip(words, words[1:])]
+    for word in words:
+        padded = f"<{word}>"
+        features += [f"c:{padded[i:i + 4]}" for i in range(max(1, len(padded) - 3))]
+    return features
+
+
+def featurize(titles, n_features=N_FEATURES):
+    # Padded (n_titles, max_features) index matrix; padding points at the
+    # extra all-zero row n_features. crc32 rather than hash() so the indices
+    # are stable across processes.
+    rows = [[zlib.crc32(feature.encode("utf-8")) % n_features for feature in tokenize(title)] for title in titles]
+    width = max((len(row) for row in rows), default=0) or 1
+    indices = np.full((len(rows), width), n_features, dtype=np.int64)
+    for i, row in enumerate(rows):
+        indices[i, :len(row)] = row
+    return indices
+
+
+class PolicyAreaClassifier:
+    def __init__(self, labels=VALID_POLICY_AREAS, n_features=N_FEATURES):
+        self.labels = list(labels)
+        self.n_features = n_features
+        self.weights = np.zeros((n_features + 1, len(self.labels)), dtype=np.float32)  # last row = padding
+        self.bias = np.zeros(len(self.labels), dtype=np.float32)
+
+    def scores(self, indices):
+        return self.weights[indices].sum(axis=1) + self.bias
+
+    def fit(self, titles, labels, epochs=60, learning_rate=0.5, l2=1e-4):
+        # Full-batch Adagrad on the softmax cross-entropy
+        indices = featurize(titles, self.n_features)
+        label_index = {label: i for i, label in enumerate(self.labels)}
+        targets = np.zeros((len(labels), len(self.labels)), dtype=np.float32)
+        targets[np.arange(len(labels)), [label_index[label] for label in labels]] = 1.0
+
+        flat_indices = indices.ravel()
+        grad_sq_w = np.full_like(self.weights, 1e-8)
+        grad_sq_b = np.full_like(self.bias, 1e-8)
+        for _ in range(epochs):
+            probabilities = softmax(self.scores(indices))
+            error = (probabilities - targets) / len(labels)
+
+            # X^T @ error, one bincount per class over the hashed feature indices
+            grad_w = np.stack([
+                np.bincount(flat_indices, weights=np.repeat(error[:, c], indices.shape[1]),
+                            minlength=self.n_features + 1)
+                for c in range(len(self.labels))
+            ], axis=1).astype(np.float32)
+            grad_w[-1] = 0.0
+            grad_w += l2 * self.weights
+            grad_b = error.sum(axis=0)
+
+            grad_sq_w += grad_w ** 2
+            grad_sq_b += grad_b ** 2
+            self.weights -= learning_rate * grad_w / np.sqrt(grad_sq_w)
+            self.bias -= learning_rate * grad_b / np.sqrt(grad_sq_b)
+        return self
+
+    def predict_proba(self, titles):
+        return softmax(self.scores(featurize(titles, self.n_features)))
+
+    def predict(self, titles):
+        # Returns (labels, confidences) for a whole batch of titles at once
+        probabilities = self.predict_proba(titles)
+        best = probabilities.argmax(axis=1)
+        return [self.labels[i] for i in best], probabilities[np.arange(len(best)), best]
+
+    def save(self, path=MODEL_PATH):
+        np.savez_compressed(path, weights=self.weights, bias=self.bias,
+                            labels=np.array(self.labels), n_features=self.n_features)
+
+    @classmethod
+    def load(cls, path=MODEL_PATH):
+        data = np.load(path)
+        model = cls([str(label) for label in data["labels"]], int(data["n_features"]))
+        model.weights = data["weights"]
+        model.bias = data["bias"]
+        return model
+
+
+def softmax(scores):
+    scores = scores - scores.max(axis=1, keepdims=True)
+    exp = np.exp(scores)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+def load_labelled_titles(csv_path="bills_with_policy_area_full.csv"):
+    df = pd.read_csv(csv_path, usecols=["shortTitle", "policyArea"])
+    df = df.dropna().drop_duplicates(subset=["shortTitle"])
+    df = df[df["policyArea"].isin(VALID_POLICY_AREAS)]
+    return df["shortTitle"].tolist(), df["policyArea"].tolist()
+
+
+def benchmark(csv_path, test_fraction=0.2, thresholds=(0.0, 0.5, 0.6, 0.7, 0.8, 0.9), seed=42):
+    titles, labels = load_labelled_titles(csv_path)
+    order = np.random.default_rng(seed).permutation(len(titles))
+    split = int(len(titles) * (1 - test_fraction))
+    train, test = order[:split], order[split:]
+
+    start = time.perf_counter()
+    model = PolicyAreaClassifier().fit([titles[i] for i in train], [labels[i] for i in train])
+    train_seconds = time.perf_counter() - start
+
+    test_titles = [titles[i] for i in test]
+    test_labels = np.array([labels[i] for i in test])
+    start = time.perf_counter()
+    predicted, confidence = model.predict(test_titles)
+    predict_seconds = time.perf_counter() - start
+    correct = np.array(predicted) == test_labels
+
+    print(f"📊 Trained on {len(train)} titles in {train_seconds:.2f}s; "
+          f"predicted {len(test)} in {predict_seconds * 1000:.1f} ms "
+          f"({predict_seconds / len(test) * 1e6:.1f} µs/title)\n")
+    print(f"{'confidence ≥':<14} {'kept locally':>13} {'accuracy':>9} {'sent to LLM':>12}")
+    for threshold in thresholds:
+        kept = confidence >= threshold
+        accuracy = correct[kept].mean() if kept.any() else float("nan")
+        print(f"{threshold:<14.2f} {kept.mean():>12.1%} {accuracy:>9.1%} {(~kept).sum():>12d}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train or benchmark the local policyArea classifier")
+    parser.add_argument("command", choices=["train", "benchmark"])
+    parser.add_argument("--csv", default="bills_with_policy_area_full.csv", help="Labelled titles")
+    parser.add_argument("--model", default=MODEL_PATH)
+    args = parser.parse_args()
+
+    if args.command == "train":
+        titles, labels = load_labelled_titles(args.csv)
+        PolicyAreaClassifier().fit(titles, labels).save(args.model)
+        print(f"💾 Trained on {len(titles)} labelled titles, saved to {args.model}")
+    else:
+        benchmark(args.csv)
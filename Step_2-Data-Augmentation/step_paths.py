@@ -0,0 +1,14 @@
+import os
+import sys
+
+# Puts Step 1 on the import path, once: the shared Supabase export and the
+# PostgREST stub live there. Scripts here `import step_paths` before
+# importing from it.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STEP_DIRS = ["Step_1-fetch_data_UK_Parliament_Bills"]
+
+for step_dir in STEP_DIRS:
+    path = os.path.join(ROOT, step_dir)
+    if path not in sys.path:
+        sys.path.append(path)
@@ -1,39 +1,174 @@
 import os
+import sys
+import json
+import time
+import argparse
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from supabase import create_client
 from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+import step_paths
+from supabase_export import iter_rows, iter_pages
 
-# Connect to Supabase
-url = os.getenv("SUPABASE_URL")
-key = os.getenv("SUPABASE_API_KEY")
-supabase = create_client(url, key)
+# Pushes policyArea back to Supabase. By default only the rows whose value
+# differs from what the table already holds are sent: the remote
+# billId -> policyArea map is fetched once (or read from a local snapshot of
+# it), diffed against the CSV, and the changes are upserted a few batches at
+# a time.
 
-# Load the enriched CSV file with policyArea
-csv_path = "bills_with_policy_area_full.csv"
-df = pd.read_csv(csv_path)
+TABLE_NAME = "all_bills_uk"
+CSV_PATH = "bills_with_policy_area_full.csv"
+SNAPSHOT_PATH = "policy_area_snapshot.json"
+BATCH_SIZE = 500
+DEFAULT_WORKERS = 4
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 1.0  # seconds, doubled on every retry
 
-if 'billId' not in df.columns or 'policyArea' not in df.columns:
-    print("❌ Missing 'billId' or 'policyArea' columns in CSV.")
-    exit(1)
 
-print(f"🔄 Preparing to update {len(df)} records with policyArea")
+def load_local_policy_areas(csv_path=CSV_PATH):
+    df = pd.read_csv(csv_path)
+    if 'billId' not in df.columns or 'policyArea' not in df.columns:
+        raise ValueError("Missing 'billId' or 'policyArea' columns in CSV.")
+    df = df[['billId', 'policyArea']].dropna(subset=['policyArea']).drop_duplicates(subset=['billId'], keep='last')
+    return dict(zip(df['billId'].astype(int), df['policyArea']))
 
-batch_size = 500
-table_name = "all_bills_uk"
 
-for i in range(0, len(df), batch_size):
-    batch = df.iloc[i:i + batch_size][['billId', 'policyArea']].dropna(subset=['policyArea'])
-    records = batch.to_dict(orient="records")
+def fetch_remote_policy_areas(supabase, table_name=TABLE_NAME, workers=DEFAULT_WORKERS):
+    # Only the two columns we diff on, read in parallel key ranges
+    pages = iter_pages(supabase, table_name, ["billId", "policyArea"], workers=workers)
+    return {int(row['billId']): row.get('policyArea') for row in iter_rows(pages)}
 
-    if not records:
-        print(f"⚠️ Skipping empty batch {i//batch_size + 1}")
-        continue
+
+def load_snapshot(path=SNAPSHOT_PATH):
+    with open(path, encoding="utf-8") as f:
+        return {int(bill_id): area for bill_id, area in json.load(f).items()}
+
+
+def save_snapshot(remote, path=SNAPSHOT_PATH):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({str(bill_id): area for bill_id, area in sorted(remote.items())}, f)
+
+
+def compute_changeset(local, remote):
+    # Rows to push: bills missing a remote policyArea or holding a different one
+    return [
+        {"billId": bill_id, "policyArea": area}
+        for bill_id, area in local.items()
+        if remote.get(bill_id) != area
+    ]
+
+
+def changeset_summary(local, remote, changes):
+    new = sum(1 for change in changes if remote.get(change["billId"]) is None)
+    return {
+        "local_rows": len(local),
+        "remote_rows": len(remote),
+        "unchanged": len(local) - len(changes),
+        "pending": len(changes),
+        "new": new,
+        "changed": len(changes) - new,
+    }
+
+
+def push_batch(supabase, table_name, batch, retries, backoff):
+    error = None
+    for attempt in range(retries + 1):
+        try:
+            supabase.table(table_name).upsert(batch, on_conflict="billId", returning="minimal").execute()
+            return None
+        except Exception as e:
+            error = str(e)
+            if attempt < retries:
+                time.sleep(backoff * 2 ** attempt)
+    return error
+
+
+def push_changes(supabase, changes, table_name=TABLE_NAME, batch_size=BATCH_SIZE, workers=DEFAULT_WORKERS,
+                 retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF):
+    # Returns the rows that made it, so the snapshot only records what Supabase has
+    batches = [changes[i:i + batch_size] for i in range(0, len(changes), batch_size)]
+    pushed = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(push_batch, supabase, table_name, batch, retries, backoff): (i, batch)
+            for i, batch in enumerate(batches)
+        }
+        for future in as_completed(futures):
+            i, batch = futures[future]
+            error = future.result()
+            if error:
+                print(f"❌ Failed batch {i + 1}/{len(batches)}: {error}")
+            else:
+                pushed.extend(batch)
+                print(f"✅ Updated batch {i + 1}/{len(batches)} ({len(batch)} records)")
+    return pushed
+
+
+def sync_policy_areas(supabase, csv_path=CSV_PATH, table_name=TABLE_NAME, snapshot_path=SNAPSHOT_PATH,
+                      use_snapshot=False, push_all=False, dry_run=False, batch_size=BATCH_SIZE,
+                      workers=DEFAULT_WORKERS):
+    local = load_local_policy_areas(csv_path)
+
+    if push_all:
+        remote = {}
+    elif use_snapshot and os.path.exists(snapshot_path):
+        remote = load_snapshot(snapshot_path)
+        print(f"📂 Read {len(remote)} remote policyAreas from {snapshot_path}")
+    else:
+        start = time.perf_counter()
+        remote = fetch_remote_policy_areas(supabase, table_name, workers)
+        print(f"🌐 Fetched {len(remote)} remote policyAreas in {time.perf_counter() - start:.2f}s")
+
+    changes = compute_changeset(local, remote)
+    summary = changeset_summary(local, remote, changes)
+    print(f"🔄 {summary['pending']} of {summary['local_rows']} rows to update "
+          f"({summary['changed']} changed, {summary['new']} new, {summary['unchanged']} unchanged)")
+
+    if dry_run:
+        for change in changes[:20]:
+            print(f"   {change['billId']}: {remote.get(change['billId'])!r} -> {change['policyArea']!r}")
+        if len(changes) > 20:
+            print(f"   ... and {len(changes) - 20} more")
+        return summary
+
+    pushed = push_changes(supabase, changes, table_name, batch_size, workers)
+    summary["pushed"] = len(pushed)
+    summary["failed"] = len(changes) - len(pushed)
+
+    if snapshot_path and not push_all:
+        remote.update({change["billId"]: change["policyArea"] for change in pushed})
+        save_snapshot(remote, snapshot_path)
+        print(f"📝 Snapshot saved to {snapshot_path}")
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Push changed policyArea values back to Supabase")
+    parser.add_argument("--csv", default=CSV_PATH, help="Enriched CSV with billId and policyArea")
+    parser.add_argument("--table", default=TABLE_NAME)
+    parser.add_argument("--snapshot", default=SNAPSHOT_PATH, help="Local copy of the remote billId -> policyArea map")
+    parser.add_argument("--use-snapshot", action="store_true",
+                        help="Diff against --snapshot instead of fetching the remote map")
+    parser.add_argument("--all", action="store_true", help="Push every row, like the old full upload")
+    parser.add_argument("--dry-run", action="store_true", help="Only report how many rows would be pushed")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Rows per upsert")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Key ranges read and upserts sent in parallel")
+    args = parser.parse_args()
+
+    # Load environment variables
+    load_dotenv()
+
+    # Connect to Supabase
+    url = os.getenv("SUPABASE_URL")
+    key = os.getenv("SUPABASE_API_KEY")
+    supabase = create_client(url, key)
 
     try:
-        supabase.table(table_name).upsert(records, on_conflict="billId").execute()
-        print(f"✅ Updated batch {i//batch_size + 1} ({len(records)} records)")
-    except Exception as e:
-        print(f"❌ Failed batch {i//batch_size + 1}: {e}")
+        summary = sync_policy_areas(supabase, args.csv, args.table, args.snapshot, args.use_snapshot, args.all,
+                                    args.dry_run, args.batch_size, args.workers)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    if summary.get("failed"):
+        sys.exit(1)
@@ -1,14 +1,14 @@
-import pandas as pd
+from bills_snapshot import load_bills
 
-# Load dataset
-df = pd.read_csv("bills_with_policy_area_full.csv")
+# Load dataset (only the columns we need, from the columnar snapshot)
+df = load_bills(["billId", "policyArea", "isAct"])
 
 # Drop rows without a policyArea (if any)
 df = df.dropna(subset=["policyArea"])
 
 # Count total and rejected bills per policy area
 summary = (
-    df.groupby("policyArea")
+    df.groupby("policyArea", observed=True)
     .agg(total_bills=("billId", "count"),
          rejected_bills=("isAct", lambda x: (~x).sum()))
     .reset_index()
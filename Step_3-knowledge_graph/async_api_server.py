@@ -0,0 +1,146 @@
+import json
+import asyncio
+import argparse
+from contextlib import aclosing
+from aiohttp import web
+from openai import AsyncOpenAI
+
+import kg_api_server as api
+
+# Async serving path for /analyze on aiohttp. One event loop holds any number
+# of requests while they wait on GPT, and /analyze/stream sends the answer as
+# server-sent events while GPT is still writing it:
+#
+#   event: meta    {"policy_area", "question", "routing", "context"}
+#   event: token   {"text": "..."}, the chunks GPT sent in the last 50ms
+#   event: done    {"answer", "cache"}
+#   event: error   {"error"}
+#
+# Routing, the bill/graph/answer caches and the prompts are shared with
+# kg_api_server.py. The local routing tiers take microseconds and run inline;
+# a GPT routing fallback is awaited on the async client. The cache lookups,
+# Supabase fetches and graph work are blocking, so they run in worker threads.
+
+PORT = 5070
+FLUSH_SECONDS = 0.05  # batch tokens per event; one write per chunk costs more CPU than the LLM saves
+
+client = AsyncOpenAI(api_key=api.OPENAI_API_KEY)
+
+
+async def gpt_infer_policy_and_question(query):
+    response = await client.chat.completions.create(
+        model=api.POLICY_MODEL,
+        messages=[{"role": "user", "content": api.policy_prompt(query)}],
+        max_tokens=150
+    )
+    return api.parse_policy_answer(response.choices[0].message.content, query)
+
+
+def sse(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n".encode("utf-8")
+
+
+async def analysis_events(query):
+    # (event, payload) pairs for one query, in the order they are sent
+    cached = await asyncio.to_thread(api.response_cache.get, query, api.bill_cache.version)
+    if cached is not None:
+        yield "meta", {key: cached[key] for key in ("policy_area", "question", "routing", "context")}
+        yield "token", {"text": cached["answer"]}
+        yield "done", {"answer": cached["answer"], "cache": cached["cache"]}
+        return
+
+    policy_area, question, routing = await api.policy_router.route_async(query, gpt_infer_policy_and_question)
+    facts, summary, context, version = await asyncio.to_thread(api.prepare_analysis, policy_area, question)
+    yield "meta", {"policy_area": policy_area, "question": question, "routing": routing, "context": context}
+
+    stream = await client.chat.completions.create(
+        model=api.ANSWER_MODEL,
+        messages=[{"role": "user", "content": api.analysis_prompt(facts, summary, question)}],
+        max_tokens=800,
+        stream=True
+    )
+    parts, pending, flushed = [], [], 0.0
+    loop = asyncio.get_running_loop()
+    try:
+        async for chunk in stream:
+            text = chunk.choices[0].delta.content if chunk.choices else None
+            if not text:
+                continue
+            parts.append(text)
+            pending.append(text)
+            if loop.time() - flushed >= FLUSH_SECONDS:
+                yield "token", {"text": "".join(pending)}
+                pending, flushed = [], loop.time()
+    finally:
+        # Also runs when the client disconnects mid-answer, so GPT stops generating
+        await stream.close()
+    if pending:
+        yield "token", {"text": "".join(pending)}
+
+    answer = "".join(parts).strip()
+    result = {"policy_area": policy_area, "question": question, "answer": answer, "context": context,
+              "routing": routing}
+    await asyncio.to_thread(api.response_cache.put, query, policy_area, version, result)
+    yield "done", {"answer": answer, "cache": {"hit": False}}
+
+
+async def analyze_stream(request):
+    query = request.query.get("query")
+    if not query:
+        return web.json_response({"error": "Query parameter is required."}, status=400)
+
+    response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+    await response.prepare(request)
+    try:
+        async with aclosing(analysis_events(query)) as events:
+            async for event, payload in events:
+                await response.write(sse(event, payload))
+    except ConnectionResetError:
+        return response
+    except Exception as e:
+        print(f"⚠️ Streaming an answer for {query!r} failed: {e}")
+        await response.write(sse("error", {"error": str(e)}))
+    await response.write_eof()
+    return response
+
+
+async def analyze(request):
+    # Same JSON as the Flask /analyze, served without holding a thread
+    query = request.query.get("query")
+    if not query:
+        return web.json_response({"error": "Query parameter is required."}, status=400)
+
+    result = {}
+    async for event, payload in analysis_events(query):
+        if event in ("meta", "done"):
+            result.update(payload)
+    return web.json_response(result)
+
+
+async def cache_stats(request):
+    return web.json_response({"bills": api.bill_cache.stats(), "graphs": api.graph_cache.stats(),
+                              "router": api.policy_router.stats(), "responses": api.response_cache.stats()})
+
+
+async def allow_any_origin(request, response):
+    response.headers["Access-Control-Allow-Origin"] = "*"
+
+
+def create_app():
+    app = web.Application()
+    app.router.add_get("/analyze", analyze)
+    app.router.add_get("/analyze/stream", analyze_stream)
+    app.router.add_get("/cache", cache_stats)
+    app.on_response_prepare.append(allow_any_origin)
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve /analyze asynchronously, with a streaming variant")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=PORT)
+    args = parser.parse_args()
+
+    api.bill_cache.start(api.VALID_POLICY_AREAS)
+    print(f"🌊 Async API on http://{args.host}:{args.port} (/analyze, /analyze/stream, /cache)")
+    web.run_app(create_app(), host=args.host, port=args.port, print=None)
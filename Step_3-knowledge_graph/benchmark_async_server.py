@@ -0,0 +1,196 @@
+import os
+import json
+import time
+import asyncio
+import argparse
+import threading
+import multiprocessing
+import numpy as np
+import pandas as pd
+import aiohttp
+from aiohttp import web
+from types import SimpleNamespace
+from concurrent.futures import ProcessPoolExecutor
+
+from bill_data_cache import TABLE_NAME
+from response_cache import ResponseCache, MemoryBackend, QUESTIONS
+
+import step_paths
+from local_postgrest_stub import serve_postgrest
+from fake_llm import FakeAsyncLLM, completion
+
+# Load test of /analyze/stream (async_api_server.py) against the Flask
+# /analyze (kg_api_server.py on its threaded server), both backed by the local
+# PostgREST stub and a fake LLM that takes --ttft to its first token and
+# --token-delay per word after that. The answer cache is disabled, so every
+# request routes, builds its context and waits on the LLM. The load comes
+# from a separate process, so the clients don't compete with the servers for
+# the GIL.
+
+
+def fake_answer(words):
+    text = " ".join(["The", "data", "shows"] + ["bills"] * (words - 3))
+    return lambda prompt: text
+
+
+class FakeOpenAI:
+    # Blocking client for the Flask app: the whole answer after ttft + one token_delay per word
+    def __init__(self, seconds, answer):
+        self.seconds = seconds
+        self.answer = answer
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, model=None, messages=None, **kwargs):
+        time.sleep(self.seconds)
+        return completion(self.answer(messages[-1]["content"]))
+
+
+def start_in_thread(serve):
+    # Runs serve(loop) on its own event loop thread and returns the loop once serve() has started
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+
+    def run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(serve(loop))
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True).start()
+    ready.wait()
+    return loop
+
+
+async def watch_loop_lag(lags, interval=0.01):
+    # How late the server loop wakes up: a blocking call in a handler shows up here
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+async def one_request(session, url, query, streaming):
+    start = time.perf_counter()
+    first = None
+    async with session.get(url, params={"query": query}) as response:
+        if streaming:
+            async for line in response.content:
+                if first is None and line.startswith(b"event: token"):
+                    first = time.perf_counter() - start
+                if line.startswith(b"event: error"):
+                    raise RuntimeError("server sent an error event")
+        else:
+            await response.json()
+        if response.status != 200:
+            raise RuntimeError(f"HTTP {response.status}")
+    total = time.perf_counter() - start
+    return first if first is not None else total, total
+
+
+async def load(url, concurrency, requests, streaming):
+    # requests in total, at most `concurrency` in flight
+    connector = aiohttp.TCPConnector(limit=0)
+    timeout = aiohttp.ClientTimeout(total=300)
+    queue = asyncio.Queue()
+    for i in range(requests):
+        queue.put_nowait(QUESTIONS[i % len(QUESTIONS)])
+    results, errors = [], []
+
+    async def worker(session):
+        while not queue.empty():
+            query = queue.get_nowait()
+            try:
+                results.append(await one_request(session, url, query, streaming))
+            except Exception as e:
+                errors.append(e)
+
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    first = np.array([r[0] for r in results]) if results else np.zeros(1)
+    total = np.array([r[1] for r in results]) if results else np.zeros(1)
+    return {"rps": len(results) / elapsed, "first_p50": np.median(first), "first_p95": np.percentile(first, 95),
+            "total_p50": np.median(total), "total_p95": np.percentile(total, 95), "errors": len(errors)}
+
+
+def run_load(url, concurrency, requests, streaming):
+    return asyncio.run(load(url, concurrency, requests, streaming))
+
+
+def report(label, concurrency, stats, lag=None):
+    lag_text = f"{lag * 1000:>9.1f}ms" if lag is not None else f"{'-':>11}"
+    print(f"{label:<8} {concurrency:>5d} {stats['rps']:>8.1f} {stats['first_p50'] * 1000:>9.0f}ms "
+          f"{stats['first_p95'] * 1000:>9.0f}ms {stats['total_p50'] * 1000:>9.0f}ms {stats['total_p95'] * 1000:>9.0f}ms "
+          f"{stats['errors']:>6d} {lag_text}")
+
+
+def benchmark(csv_path, levels, rounds, ttft, token_delay, words, flask):
+    df = pd.read_csv(csv_path)
+    rows = df.astype(object).where(df.notna(), None).to_dict(orient="records")
+    answer = fake_answer(words)
+
+    with serve_postgrest(tables={TABLE_NAME: rows}) as (url, key, stub):
+        os.environ.update(SUPABASE_URL=url, SUPABASE_API_KEY=key)
+        os.environ.setdefault("OPENAI_API_KEY", "offline")
+        import async_api_server as server
+        api = server.api
+
+        server.client = FakeAsyncLLM(latency=ttft, jitter=0.0, token_delay=token_delay, answer=answer)
+        api.client = FakeOpenAI(ttft + token_delay * (words - 1), answer)
+        api.response_cache = ResponseCache(MemoryBackend(0))
+        api.bill_cache.preload(api.VALID_POLICY_AREAS)
+
+        lags = []
+        runner = web.AppRunner(server.create_app())
+
+        async def serve_async(loop):
+            await runner.setup()
+            site = web.TCPSite(runner, "127.0.0.1", 0)
+            await site.start()
+            loop.create_task(watch_loop_lag(lags))
+
+        async_loop = start_in_thread(serve_async)
+        async_url = f"http://127.0.0.1:{runner.addresses[0][1]}/analyze/stream"
+
+        flask_url = None
+        if flask:
+            import logging
+            from werkzeug.serving import make_server
+            logging.getLogger("werkzeug").setLevel(logging.ERROR)
+            flask_server = make_server("127.0.0.1", 0, api.app, threaded=True)
+            threading.Thread(target=flask_server.serve_forever, daemon=True).start()
+            flask_url = f"http://127.0.0.1:{flask_server.server_port}/analyze"
+
+        print(f"fake LLM: {ttft * 1000:.0f}ms to first token, {words} words {token_delay * 1000:.0f}ms apart "
+              f"({(ttft + token_delay * (words - 1)) * 1000:.0f}ms per answer); {rounds} requests per client\n")
+        print(f"{'server':<8} {'conc':>5} {'req/s':>8} {'first p50':>11} {'first p95':>11} {'total p50':>11} "
+              f"{'total p95':>11} {'errors':>6} {'loop lag':>11}")
+        with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as clients:
+            for concurrency in levels:
+                requests = concurrency * rounds
+                if flask_url:
+                    report("flask", concurrency, clients.submit(run_load, flask_url, concurrency, requests, False).result())
+                lags.clear()
+                stats = clients.submit(run_load, async_url, concurrency, requests, True).result()
+                report("async", concurrency, stats, max(lags, default=0.0))
+
+        print(f"\nLLM calls: {server.client.calls} async, router: {json.dumps(api.policy_router.stats())}")
+        asyncio.run_coroutine_threadsafe(runner.cleanup(), async_loop).result()
+        if flask_url:
+            flask_server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the async streaming /analyze against the Flask one")
+    parser.add_argument("--csv", default="bills_with_policy_area_full.csv")
+    parser.add_argument("--concurrency", default="1,10,50,200", help="Comma-separated concurrent clients")
+    parser.add_argument("--rounds", type=int, default=3, help="Requests per client")
+    parser.add_argument("--ttft", type=float, default=0.3, help="Fake LLM seconds to the first token")
+    parser.add_argument("--token-delay", type=float, default=0.01, help="Fake LLM seconds between words")
+    parser.add_argument("--words", type=int, default=150, help="Words per answer")
+    parser.add_argument("--no-flask", action="store_true", help="Skip the Flask baseline")
+    args = parser.parse_args()
+
+    benchmark(args.csv, [int(c) for c in args.concurrency.split(",")], args.rounds, args.ttft, args.token_delay,
+              args.words, not args.no_flask)
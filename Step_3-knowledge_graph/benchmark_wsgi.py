@@ -0,0 +1,133 @@
+import os
+import time
+import socket
+import argparse
+import multiprocessing
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+from bill_data_cache import TABLE_NAME
+from response_cache import ResponseCache, MemoryBackend
+from benchmark_async_server import FakeOpenAI, fake_answer, run_load
+import wsgi
+
+import step_paths
+from local_postgrest_stub import serve_postgrest
+
+# Throughput of /analyze on the dev server (app.run(debug=True) without the
+# reloader) and on wsgi.py's pre-forked workers, for two workloads:
+#
+#   cached: repeated questions answered from the response cache (CPU bound)
+#   llm:    the response cache is off, and every request waits --llm-latency on
+#           a fake LLM (I/O bound)
+#
+# Data and graphs are preloaded once here, before any server forks. After
+# each pre-fork run, the workers' proportional (PSS) and private memory show
+# how much of the preloaded state they share.
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def memory_mb(pid):
+    # (PSS, private) in MB from /proc; None where it isn't available
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            fields = {line.split(":")[0]: int(line.split()[1]) for line in f if line.endswith("kB\n")}
+    except OSError:
+        return None
+    return fields["Pss"] / 1024, (fields["Private_Clean"] + fields["Private_Dirty"]) / 1024
+
+
+def worker_pids(pid):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(child) for child in f.read().split()]
+    except OSError:
+        return []
+
+
+def run_dev(app, port):
+    import logging
+    from werkzeug.serving import run_simple
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    run_simple("127.0.0.1", port, app, threaded=True, use_debugger=True, use_reloader=False)
+
+
+def run_prefork(app, port, workers, threads):
+    import logging
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    wsgi.serve(app, "127.0.0.1", port, workers, threads)
+
+
+def benchmark(app_module, csv_path, configs, concurrency, requests, llm_latency):
+    df = pd.read_csv(csv_path)
+    rows = df.astype(object).where(df.notna(), None).to_dict(orient="records")
+    fork = multiprocessing.get_context("fork")
+
+    with serve_postgrest(tables={TABLE_NAME: rows}) as (url, key, stub), \
+            ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as clients:
+        os.environ.update(SUPABASE_URL=url, SUPABASE_API_KEY=key)
+        os.environ.setdefault("OPENAI_API_KEY", "offline")
+        module = wsgi.importlib.import_module(app_module)
+        module.client = FakeOpenAI(llm_latency, fake_answer(150))
+
+        start = time.perf_counter()
+        app = wsgi.create_app(app_module)
+        print(f"preload before fork: {time.perf_counter() - start:.2f}s, parent PSS "
+              f"{memory_mb(os.getpid())[0] if memory_mb(os.getpid()) else 0:.0f}MB\n")
+        print(f"{'server':<14} {'workload':<8} {'req/s':>8} {'p50':>9} {'p95':>9} {'errors':>6} "
+              f"{'worker PSS':>11} {'private':>9}")
+
+        for workload in ("cached", "llm"):
+            for name, workers, threads in configs:
+                module.response_cache = ResponseCache(MemoryBackend() if workload == "cached" else MemoryBackend(0))
+                port = free_port()
+                if workers == 0:
+                    process = fork.Process(target=run_dev, args=(app, port), daemon=True)
+                else:
+                    process = fork.Process(target=run_prefork, args=(app, port, workers, threads), daemon=True)
+                process.start()
+                wait_for(port)
+                url = f"http://127.0.0.1:{port}/analyze"
+                clients.submit(run_load, url, concurrency, concurrency, False).result()  # warm every worker up
+                stats = clients.submit(run_load, url, concurrency, requests, False).result()
+
+                memory = [memory_mb(pid) for pid in worker_pids(process.pid)] if workers else [memory_mb(process.pid)]
+                memory = [m for m in memory if m]
+                pss = f"{sum(m[0] for m in memory) / len(memory):>9.0f}MB" if memory else f"{'-':>11}"
+                private = f"{sum(m[1] for m in memory) / len(memory):>7.0f}MB" if memory else f"{'-':>9}"
+                print(f"{name:<14} {workload:<8} {stats['rps']:>8.1f} {stats['total_p50'] * 1000:>7.0f}ms "
+                      f"{stats['total_p95'] * 1000:>7.0f}ms {stats['errors']:>6d} {pss} {private}")
+                process.terminate()
+                process.join()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Throughput of the dev server vs pre-forked workers")
+    parser.add_argument("--app", choices=["kg_api_server", "dynamically_build_kg_example"], default="kg_api_server")
+    parser.add_argument("--csv", default="bills_with_policy_area_full.csv")
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated worker counts to try")
+    parser.add_argument("--threads", type=int, default=wsgi.THREADS)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=1280)
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Fake LLM seconds per answer")
+    args = parser.parse_args()
+
+    configs = [("dev server", 0, 0)] + [(f"{w} x {args.threads} thr", int(w), args.threads)
+                                        for w in args.workers.split(",")]
+    benchmark(args.app, args.csv, configs, args.concurrency, args.requests, args.llm_latency)
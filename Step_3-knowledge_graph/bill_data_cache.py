@@ -0,0 +1,247 @@
+import json
+import time
+import hashlib
+import argparse
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# In-process cache of the bill rows the Flask APIs fetch per policy area
+# (policyArea = X, lastUpdate >= 2022-01-01). The data changes at most
+# daily, so /analyze shouldn't wait on Supabase:
+#
+#   - start() preloads every policy area and then refreshes them in the
+#     background every ttl / 2
+#   - an expired entry is still served; a background refresh is started
+#   - if Supabase is down the refresh fails and the stale rows keep serving
+#   - only an area that was never loaded is fetched inside the request
+#
+# The fetch function is injected, so the cache runs against the local
+# PostgREST stub as well as the real Supabase client.
+
+TABLE_NAME = "all_bills_uk"
+SINCE = "2022-01-01"
+DEFAULT_TTL = 6 * 60 * 60  # seconds
+DEFAULT_MAX_ENTRIES = 32   # 10 policy areas plus whatever else the LLM comes up with
+
+
+def fetch_policy_area(supabase, policy_area, table_name=TABLE_NAME, since=SINCE):
+    # The query both Flask apps used to run on every /analyze
+    response = supabase.table(table_name)\
+        .select("*")\
+        .eq("policyArea", policy_area)\
+        .gte("lastUpdate", since)\
+        .execute()
+    return response.data
+
+
+def data_version(rows):
+    # Content hash of the rows: changes exactly when the bills for an area do
+    digest = hashlib.sha256(json.dumps(rows, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+class BillDataCache:
+    def __init__(self, fetch, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES, clock=time.monotonic):
+        self.fetch = fetch                  # policy_area -> list of bill rows
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self.entries = OrderedDict()        # area -> {"data", "version", "fetched_at"}, least recently used first
+        self.lock = threading.Lock()
+        self.area_locks = {}                # one backend fetch per area at a time
+        self.refreshing = set()
+        self.counts = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "refresh_errors": 0,
+                       "evictions": 0}
+        self.stopped = threading.Event()
+        self.listeners = []                 # (area, version) callbacks, run when a refresh changes an area's bills
+
+    def on_change(self, listener):
+        self.listeners.append(listener)
+
+    def area_lock(self, area):
+        with self.lock:
+            return self.area_locks.setdefault(area, threading.Lock())
+
+    def store(self, area, data):
+        entry = {"data": data, "version": data_version(data), "fetched_at": self.clock()}
+        with self.lock:
+            previous = self.entries.get(area)
+            self.entries[area] = entry
+            self.entries.move_to_end(area)
+            self.counts["refreshes"] += 1
+            while len(self.entries) > self.max_entries:
+                evicted, _ = self.entries.popitem(last=False)
+                self.area_locks.pop(evicted, None)
+                self.counts["evictions"] += 1
+        if previous is not None and previous["version"] != entry["version"]:
+            for listener in self.listeners:
+                listener(area, entry["version"])
+        return entry
+
+    def refresh(self, area):
+        # Fetch one area now and replace its entry; raises if the backend fails
+        with self.area_lock(area):
+            return self.store(area, self.fetch(area))
+
+    def refresh_in_background(self, area):
+        with self.lock:
+            if area in self.refreshing:
+                return
+            self.refreshing.add(area)
+
+        def run():
+            try:
+                self.refresh(area)
+            except Exception as e:
+                with self.lock:
+                    self.counts["refresh_errors"] += 1
+                print(f"⚠️ Refreshing bills for {area} failed, serving cached data: {e}")
+            finally:
+                with self.lock:
+                    self.refreshing.discard(area)
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def entry(self, area):
+        with self.lock:
+            entry = self.entries.get(area)
+            if entry is not None:
+                self.entries.move_to_end(area)
+                expired = self.clock() - entry["fetched_at"] > self.ttl
+                self.counts["stale_hits" if expired else "hits"] += 1
+
+        if entry is None:
+            with self.area_lock(area):
+                # Another request may have loaded it while this one waited
+                with self.lock:
+                    entry = self.entries.get(area)
+                    if entry is None:
+                        self.counts["misses"] += 1
+                if entry is None:
+                    entry = self.store(area, self.fetch(area))
+        elif expired:
+            self.refresh_in_background(area)
+        return entry
+
+    def get(self, area):
+        return self.entry(area)["data"]
+
+    def version(self, area):
+        return self.entry(area)["version"]
+
+    def preload(self, areas, workers=4):
+        # Load several areas in parallel; returns {area: error} for the ones that failed
+        def load(area):
+            try:
+                self.refresh(area)
+                return area, None
+            except Exception as e:
+                return area, e
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            errors = {area: error for area, error in pool.map(load, areas) if error is not None}
+        for area, error in errors.items():
+            print(f"⚠️ Could not preload bills for {area}: {error}")
+        return errors
+
+    def start(self, areas, interval=None, preload=True):
+        # Preload, then keep every cached area at most `interval` old, all on a daemon thread.
+        # preload=False when the entries are already loaded, e.g. inherited from a pre-fork parent.
+        interval = interval or self.ttl / 2
+
+        def run():
+            if preload:
+                self.preload(areas)
+                print(f"📦 Bill cache warm: {len(self.entries)} policy areas")
+            while not self.stopped.wait(interval):
+                with self.lock:
+                    due = [area for area, entry in self.entries.items()
+                           if self.clock() - entry["fetched_at"] >= interval]
+                for area in due:
+                    self.refresh_in_background(area)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self.stopped.set()
+
+    def stats(self):
+        with self.lock:
+            counts = dict(self.counts)
+            now = self.clock()
+            entries = {area: {"rows": len(entry["data"]), "version": entry["version"],
+                              "age_seconds": round(now - entry["fetched_at"], 1)}
+                       for area, entry in self.entries.items()}
+        lookups = counts["hits"] + counts["stale_hits"] + counts["misses"]
+        counts["hit_rate"] = round((counts["hits"] + counts["stale_hits"]) / lookups, 4) if lookups else 0.0
+        return {**counts, "entries": entries}
+
+
+def benchmark(csv_path, latency, requests_per_area=20):
+    # Against the local PostgREST stub: per-request fetches vs the cache,
+    # then expiry (stale served, refreshed in the background) and an outage
+    import pandas as pd
+    from supabase import create_client
+
+    import step_paths
+    from local_postgrest_stub import serve_postgrest
+
+    df = pd.read_csv(csv_path)
+    rows = df.astype(object).where(df.notna(), None).to_dict(orient="records")
+    areas = sorted({row["policyArea"] for row in rows if row.get("policyArea")})
+
+    with serve_postgrest(tables={TABLE_NAME: rows}, latency=latency) as (url, key, stub):
+        supabase = create_client(url, key)
+        fetch = lambda area: fetch_policy_area(supabase, area)
+
+        start = time.perf_counter()
+        for _ in range(requests_per_area):
+            for area in areas:
+                fetch(area)
+        direct = (time.perf_counter() - start) / (requests_per_area * len(areas))
+
+        cache = BillDataCache(fetch, ttl=60)
+        start = time.perf_counter()
+        cache.preload(areas)
+        preload = time.perf_counter() - start
+        backend_requests = stub.requests
+        start = time.perf_counter()
+        for _ in range(requests_per_area):
+            for area in areas:
+                cache.get(area)
+        cached = (time.perf_counter() - start) / (requests_per_area * len(areas))
+        print(f"{len(areas)} policy areas, {len(rows)} bills, stub latency {latency}s")
+        print(f"{'fetch per request':<24} {direct * 1000:>9.2f}ms")
+        print(f"{'cached':<24} {cached * 1000:>9.4f}ms  ({stub.requests - backend_requests} backend requests, "
+              f"preload {preload:.2f}s)")
+
+        # Expire everything and take the backend down: requests still get the old rows straight away
+        cache.ttl = 0
+        stub.fail_rate = 1.0
+        start = time.perf_counter()
+        served = [len(cache.get(area)) for area in areas]
+        stale = (time.perf_counter() - start) / len(areas)
+        time.sleep(latency * 2 + 0.2)
+        print(f"{'expired, backend down':<24} {stale * 1000:>9.4f}ms  ({sum(served)} rows served, "
+              f"{cache.counts['refresh_errors']} failed background refreshes)")
+
+        stub.fail_rate = 0.0
+        cache.get(areas[0])
+        time.sleep(latency * 2 + 0.2)
+        stats = cache.stats()
+        print(f"{'backend back':<24} {areas[0]} refreshed in the background "
+              f"({stats['entries'][areas[0]]['age_seconds']}s old)")
+        print(json.dumps({key: value for key, value in stats.items() if key != "entries"}))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the policy-area bill cache against the local PostgREST stub")
+    parser.add_argument("--csv", default="bills_with_policy_area_full.csv")
+    parser.add_argument("--latency", type=float, default=0.1, help="Stub seconds per request")
+    parser.add_argument("--requests", type=int, default=5, help="Requests per policy area")
+    args = parser.parse_args()
+
+    benchmark(args.csv, args.latency, args.requests)
@@ -0,0 +1,268 @@
+import os
+import json
+import time
+import hashlib
+import argparse
+import tracemalloc
+import numpy as np
+import pandas as pd
+from datetime import datetime, timezone
+
+try:
+    import pyarrow as pa
+    from pyarrow import feather
+except ImportError:  # optional (not pinned in requirements.txt); without it the snapshot is plain .npy files
+    pa = feather = None
+
+# Columnar snapshot of the enriched bills dataset, so the Step 3 scripts
+# don't re-parse bills_with_policy_area_full.csv with type inference on
+# every run. With pyarrow installed it is one uncompressed Feather (Arrow
+# IPC) file; otherwise the same columns as .npy arrays:
+#
+#     bills_snapshot/
+#         manifest.json                  schema, categories, format, version stamp
+#         bills.arrow                    pyarrow: every column, dictionary-encoded categoricals
+#     or
+#         billId.npy, isAct.npy, ...     one fixed-width array per column
+#         policyArea.codes.npy           categoricals: integer codes
+#         shortTitle.data.npy            strings: NUL-separated utf-8 bytes
+#         shortTitle.valid.npy           ... and a not-null mask
+#
+# Either way the file is memory-mapped on load, and only the requested
+# columns are read at all.
+
+CSV_PATH = "bills_with_policy_area_full.csv"
+SNAPSHOT_DIR = "bills_snapshot"
+ARROW_FILE = "bills.arrow"
+SCHEMA_VERSION = 1
+
+# Explicit dtypes instead of inference. billWithdrawn is the withdrawal date
+# in the CSV; the snapshot keeps it as billWithdrawnDate and adds the boolean.
+SCHEMA = {
+    "billId": "int",
+    "shortTitle": "string",
+    "currentHouse": "category",
+    "originatingHouse": "category",
+    "lastUpdate": "timestamp",
+    "billWithdrawn": "bool",
+    "billWithdrawnDate": "timestamp",
+    "isDefeated": "bool",
+    "isAct": "bool",
+    "currentStage_description": "category",
+    "currentStage_house": "category",
+    "currentStage_abbreviation": "category",
+    "policyArea": "category",
+}
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def to_bool(series):
+    if series.dtype == bool:
+        return series.to_numpy()
+    return series.astype(str).str.strip().str.lower().isin(["true", "1"]).to_numpy()
+
+
+def to_timestamp(series):
+    # UTC, stored as int64 nanoseconds (NaT for missing), tz dropped for a plain datetime64 column
+    return pd.to_datetime(series, utc=True, errors="coerce", format="ISO8601").dt.tz_localize(None).to_numpy()
+
+
+def read_source(csv_path=CSV_PATH):
+    # The one place the CSV is parsed: everything as strings, then converted per SCHEMA
+    df = pd.read_csv(csv_path, dtype=str, keep_default_na=False, na_values=[""])
+    df["billWithdrawnDate"] = df["billWithdrawn"]
+    df["billWithdrawn"] = df["billWithdrawn"].notna()
+    return df
+
+
+def typed_columns(df):
+    # {name: values converted per SCHEMA}
+    columns = {}
+    for name, kind in SCHEMA.items():
+        series = df[name]
+        if kind == "int":
+            columns[name] = series.astype(np.int64).to_numpy()
+        elif kind == "bool":
+            columns[name] = to_bool(series)
+        elif kind == "timestamp":
+            columns[name] = to_timestamp(series).astype("datetime64[ns]")
+        elif kind == "category":
+            columns[name] = pd.Categorical(series)
+        else:
+            columns[name] = series.to_numpy(dtype=object)
+    return columns
+
+
+def write_arrow(columns, snapshot_dir):
+    # Uncompressed, so the file can be memory-mapped; renamed into place so a reader never sees half of it
+    table = pa.Table.from_pandas(pd.DataFrame(columns, copy=False), preserve_index=False)
+    path = os.path.join(snapshot_dir, ARROW_FILE)
+    feather.write_feather(table, path + ".tmp", compression="uncompressed")
+    os.replace(path + ".tmp", path)
+
+
+def write_npy(columns, snapshot_dir):
+    for name, values in columns.items():
+        path = os.path.join(snapshot_dir, name)
+        if SCHEMA[name] == "category":
+            np.save(f"{path}.codes.npy", values.codes)
+        elif SCHEMA[name] == "string":
+            text = "\0".join(value if isinstance(value, str) else "" for value in values)
+            np.save(f"{path}.data.npy", np.frombuffer(text.encode("utf-8"), dtype=np.uint8))
+            np.save(f"{path}.valid.npy", pd.notna(values))
+        else:
+            np.save(f"{path}.npy", values)
+
+
+def build_snapshot(csv_path=CSV_PATH, snapshot_dir=SNAPSHOT_DIR):
+    df = read_source(csv_path)
+    os.makedirs(snapshot_dir, exist_ok=True)
+
+    values = typed_columns(df)
+    snapshot_format = "arrow" if pa is not None else "npy"
+    if snapshot_format == "arrow":
+        write_arrow(values, snapshot_dir)
+    else:
+        write_npy(values, snapshot_dir)
+    columns = {
+        name: {"kind": kind, "categories": [str(c) for c in values[name].categories]} if kind == "category"
+        else {"kind": kind}
+        for name, kind in SCHEMA.items()
+    }
+
+    stat = os.stat(csv_path)
+    manifest = {
+        "schema_version": SCHEMA_VERSION,
+        "version": file_sha256(csv_path)[:16],
+        "rows": len(df),
+        "format": snapshot_format,
+        "source": {"path": os.path.abspath(csv_path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns},
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "columns": columns,
+    }
+    # Written last, so a half-written snapshot never looks valid
+    with open(os.path.join(snapshot_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def read_manifest(snapshot_dir=SNAPSHOT_DIR):
+    try:
+        with open(os.path.join(snapshot_dir, "manifest.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def is_stale(manifest, csv_path=CSV_PATH):
+    # Cheap check on size + mtime; the content hash is only recomputed when the snapshot is rebuilt
+    if manifest is None or manifest.get("schema_version") != SCHEMA_VERSION:
+        return True
+    if manifest.get("format") == "arrow" and feather is None:
+        return True  # written where pyarrow was installed; rebuild as .npy
+    if not os.path.exists(csv_path):
+        return False  # snapshot shipped without its CSV: use it as-is
+    stat = os.stat(csv_path)
+    source = manifest["source"]
+    return (stat.st_size, stat.st_mtime_ns) != (source["size"], source["mtime_ns"])
+
+
+def ensure_snapshot(csv_path=CSV_PATH, snapshot_dir=SNAPSHOT_DIR):
+    manifest = read_manifest(snapshot_dir)
+    if is_stale(manifest, csv_path):
+        print(f"📦 Building columnar snapshot of {csv_path} in {snapshot_dir}/")
+        manifest = build_snapshot(csv_path, snapshot_dir)
+    return manifest
+
+
+def snapshot_version(csv_path=CSV_PATH, snapshot_dir=SNAPSHOT_DIR):
+    return ensure_snapshot(csv_path, snapshot_dir)["version"]
+
+
+def read_column(snapshot_dir, name, spec, mmap=True):
+    path = os.path.join(snapshot_dir, name)
+    mmap_mode = "r" if mmap else None
+    kind = spec["kind"]
+    if kind in ("int", "bool", "timestamp"):
+        return np.load(f"{path}.npy", mmap_mode=mmap_mode)
+    if kind == "category":
+        codes = np.load(f"{path}.codes.npy", mmap_mode=mmap_mode)
+        return pd.Categorical.from_codes(codes, categories=spec["categories"])
+    # Strings can't be memory-mapped as Python objects; decode the whole buffer in one go
+    valid = np.load(f"{path}.valid.npy")
+    text = np.load(f"{path}.data.npy", mmap_mode=mmap_mode).tobytes().decode("utf-8")
+    values = np.array(text.split("\0") if len(valid) else [], dtype=object)
+    values[~valid] = np.nan
+    return values
+
+
+def load_bills(columns=None, csv_path=CSV_PATH, snapshot_dir=SNAPSHOT_DIR, mmap=True):
+    # DataFrame with only the requested columns (all of them by default),
+    # building or refreshing the snapshot first if the CSV has changed
+    manifest = ensure_snapshot(csv_path, snapshot_dir)
+    names = list(columns) if columns is not None else list(manifest["columns"])
+    unknown = [name for name in names if name not in manifest["columns"]]
+    if unknown:
+        raise KeyError(f"Columns not in the bills snapshot: {', '.join(unknown)}")
+    if manifest.get("format") == "arrow":
+        table = feather.read_table(os.path.join(snapshot_dir, ARROW_FILE), columns=names, memory_map=mmap)
+        df = table.to_pandas()
+    else:
+        df = pd.DataFrame({name: read_column(snapshot_dir, name, manifest["columns"][name], mmap) for name in names},
+                          copy=False)
+    df.attrs["version"] = manifest["version"]
+    return df
+
+
+def benchmark(csv_path=CSV_PATH, snapshot_dir=SNAPSHOT_DIR, columns=("policyArea", "isAct"), repeat=5):
+    ensure_snapshot(csv_path, snapshot_dir)
+    cases = [
+        ("read_csv (type inference)", lambda: pd.read_csv(csv_path)),
+        ("snapshot, all columns", lambda: load_bills(csv_path=csv_path, snapshot_dir=snapshot_dir)),
+        (f"snapshot, {', '.join(columns)}", lambda: load_bills(columns, csv_path, snapshot_dir)),
+    ]
+    print(f"{'load':<32} {'best of ' + str(repeat):>10} {'peak memory':>12}")
+    for label, load in cases:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            load()
+            timings.append(time.perf_counter() - start)
+        tracemalloc.start()
+        load()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{label:<32} {min(timings) * 1000:>8.1f}ms {peak / 1e6:>10.2f}MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or inspect the columnar bills snapshot")
+    parser.add_argument("command", choices=["build", "info", "benchmark"])
+    parser.add_argument("--csv", default=CSV_PATH)
+    parser.add_argument("--snapshot", default=SNAPSHOT_DIR)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        start = time.perf_counter()
+        manifest = build_snapshot(args.csv, args.snapshot)
+        print(f"✅ Snapshot {manifest['version']} with {manifest['rows']} rows written to {args.snapshot}/ "
+              f"in {time.perf_counter() - start:.2f}s")
+    elif args.command == "benchmark":
+        benchmark(args.csv, args.snapshot)
+    else:
+        manifest = read_manifest(args.snapshot)
+        if manifest is None:
+            print(f"❌ No snapshot in {args.snapshot}/")
+        else:
+            stale = " (stale, CSV has changed)" if is_stale(manifest, args.csv) else ""
+            print(f"📦 Snapshot {manifest['version']}{stale}: {manifest['rows']} rows "
+                  f"({manifest.get('format', 'npy')}), built {manifest['created_at']}")
+            for name, spec in manifest["columns"].items():
+                print(f"   {name:<28} {spec['kind']}")
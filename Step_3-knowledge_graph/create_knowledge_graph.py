@@ -1,52 +1,94 @@
-import pandas as pd
+import json
+import time
+import argparse
+import numpy as np
 import networkx as nx
 
-# Load your dataset
-csv_path = "bills_with_policy_area_full.csv"
-df = pd.read_csv(csv_path)
+from bills_snapshot import load_bills
+from graph_store import GraphStore, STORE_PATH, GRAPHML_PATH, JSON_PATH
 
-# Create a directed graph
-G = nx.DiGraph()
+BILL_COLUMNS = ["billId", "shortTitle", "policyArea", "isAct", "currentStage_description",
+                "billWithdrawn", "isDefeated"]
 
-# Iterate through each row and create nodes and edges
-for _, row in df.iterrows():
-    bill_id = str(row['billId'])
-    bill_title = row.get('shortTitle', f"Bill {bill_id}")
-    policy = row.get('policyArea', 'Unknown')
-    outcome = (
-        'Rejected' if not row.get('isAct', True) else 'Passed'
+
+def entity_keys(df, column, default="Unknown"):
+    # Missing values all share one "Unknown" entity instead of a "nan" node per column
+    if column not in df.columns:
+        return np.full(len(df), default, dtype=object)
+    return df[column].astype(object).where(df[column].notna(), default).astype(str).to_numpy()
+
+
+def build_knowledge_graph(df):
+    # Bill -> PolicyArea / Outcome / Stage / Sponsor. Each shared entity node is
+    # added once from the column's unique values, and each relation's edges
+    # go in with a single add_edges_from.
+    G = nx.DiGraph()
+
+    bill_ids = df["billId"].astype(str)
+    bills = ("bill_" + bill_ids).to_numpy()
+    titles = df["shortTitle"].astype(object).where(df["shortTitle"].notna(), "Bill " + bill_ids)
+    G.add_nodes_from(
+        (bill, {"label": "Bill", "title": title}) for bill, title in zip(bills, titles.to_numpy())
     )
-    stage = row.get('currentStage_description', 'Unknown')
-    sponsor = row.get('sponsor', 'Unknown')
-    withdrawn = row.get('billWithdrawn', False)
-    defeated = row.get('isDefeated', False)
-
-    # Add nodes
-    G.add_node(f"bill_{bill_id}", label="Bill", title=bill_title)
-    G.add_node(f"policy_{policy}", label="PolicyArea", name=policy)
-    G.add_node(f"outcome_{outcome}", label="Outcome", status=outcome)
-    G.add_node(f"stage_{stage}", label="Stage", name=stage)
-    G.add_node(f"sponsor_{sponsor}", label="Sponsor", name=sponsor)
-
-    # Add edges
-    G.add_edge(f"bill_{bill_id}", f"policy_{policy}", relation="HAS_POLICY")
-    G.add_edge(f"bill_{bill_id}", f"outcome_{outcome}", relation="HAS_OUTCOME")
-    G.add_edge(f"bill_{bill_id}", f"stage_{stage}", relation="WENT_THROUGH_STAGE")
-    G.add_edge(f"bill_{bill_id}", f"sponsor_{sponsor}", relation="SPONSORED_BY")
+
+    outcomes = np.where(df["isAct"].fillna(True).astype(bool).to_numpy(), "Passed", "Rejected").astype(object)
+    relations = [
+        ("policy", "PolicyArea", "name", "HAS_POLICY", entity_keys(df, "policyArea")),
+        ("outcome", "Outcome", "status", "HAS_OUTCOME", outcomes),
+        ("stage", "Stage", "name", "WENT_THROUGH_STAGE", entity_keys(df, "currentStage_description")),
+        ("sponsor", "Sponsor", "name", "SPONSORED_BY", entity_keys(df, "sponsor")),
+    ]
+    for prefix, label, attribute, relation, keys in relations:
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        unique_keys = [str(key) for key in unique_keys]  # GraphML only takes plain str, not numpy.str_
+        nodes = np.array([f"{prefix}_{key}" for key in unique_keys], dtype=object)
+        G.add_nodes_from((node, {"label": label, attribute: key}) for node, key in zip(nodes, unique_keys))
+        G.add_edges_from(zip(bills, nodes[inverse]), relation=relation)
 
     # Optional: tag as withdrawn/defeated
-    if withdrawn:
-        G.add_node(f"outcome_Withdrawn", label="Outcome", status="Withdrawn")
-        G.add_edge(f"bill_{bill_id}", f"outcome_Withdrawn", relation="HAS_OUTCOME")
-    if defeated:
-        G.add_node(f"outcome_Defeated", label="Outcome", status="Defeated")
-        G.add_edge(f"bill_{bill_id}", f"outcome_Defeated", relation="HAS_OUTCOME")
-
-# Save graph in multiple formats
-nx.write_graphml(G, "bills_knowledge_graph.graphml")
-nx.readwrite.json_graph.node_link_data(G)
-with open("bills_knowledge_graph.json", "w") as f:
-    import json
-    json.dump(nx.readwrite.json_graph.node_link_data(G), f, indent=2)
-
-print(f"✅ Graph saved with {G.number_of_nodes()} nodes and {G.number_of_edges()} edges")
+    for column, status in (("billWithdrawn", "Withdrawn"), ("isDefeated", "Defeated")):
+        if column not in df.columns:
+            continue
+        tagged = df[column].fillna(False).astype(bool).to_numpy()
+        if tagged.any():
+            G.add_node(f"outcome_{status}", label="Outcome", status=status)
+            G.add_edges_from(((bill, f"outcome_{status}") for bill in bills[tagged]), relation="HAS_OUTCOME")
+
+    return G
+
+
+def save_graph(G, store_path=STORE_PATH, graphml_path="", json_path=""):
+    # The binary store is what the query scripts load; graph_viewer.html
+    # fetches the JSON, so that is written on every build too. GraphML is
+    # only written on request
+    if store_path:
+        GraphStore.from_networkx(G).save(store_path)
+    if graphml_path:
+        nx.write_graphml(G, graphml_path)
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(nx.node_link_data(G, edges="links"), f, separators=(",", ":"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the bills knowledge graph from the enriched dataset")
+    parser.add_argument("--store", default=STORE_PATH, help="Binary graph store output (empty string to skip)")
+    parser.add_argument("--graphml", nargs="?", const=GRAPHML_PATH, default="",
+                        help=f"Also write GraphML (default path {GRAPHML_PATH})")
+    parser.add_argument("--json", default=JSON_PATH,
+                        help="Node-link JSON output read by graph_viewer.html (empty string to skip)")
+    args = parser.parse_args()
+
+    # Load your dataset (typed columns from the columnar snapshot)
+    start = time.perf_counter()
+    df = load_bills(BILL_COLUMNS)
+    loaded = time.perf_counter()
+    G = build_knowledge_graph(df)
+    built = time.perf_counter()
+
+    # Save graph in multiple formats
+    save_graph(G, args.store, args.graphml, args.json)
+    saved = time.perf_counter()
+
+    print(f"✅ Graph saved with {G.number_of_nodes()} nodes and {G.number_of_edges()} edges")
+    print(f"⏱️  load {loaded - start:.3f}s, build {built - loaded:.3f}s, save {saved - built:.3f}s")
@@ -1,8 +1,10 @@
 import os
-import pandas as pd
 from supabase import create_client
 from dotenv import load_dotenv
 
+import step_paths
+from supabase_export import iter_pages, export_csv
+
 # Load environment variables
 load_dotenv()
 
@@ -14,24 +16,27 @@ supabase = create_client(url, key)
 # Download all rows with policyArea
 print("🔄 Downloading records from Supabase...")
 table_name = "all_bills_uk"
-batch_size = 1000
-offset = 0
-all_rows = []
+output_file = "bills_with_policy_area_full.csv"
 
-while True:
-    response = supabase.table(table_name).select("*").range(offset, offset + batch_size - 1).execute()
-    if not response.data:
-        break
-    all_rows.extend(response.data)
-    offset += batch_size
+# Stream keyset pages into a temporary CSV, so the full table is never held in
+# memory. One worker reads the key space in order, so the file comes out in
+# billId order and stays diffable between runs. The existing CSV is only
+# replaced once the new one is known to be usable.
+pages = iter_pages(supabase, table_name, workers=1)
+tmp_file = output_file + ".tmp"
+count = export_csv(pages, tmp_file)
 
-# Convert to DataFrame
-df = pd.DataFrame(all_rows)
+header = []
+if count:
+    with open(tmp_file, encoding="utf-8") as f:
+        header = f.readline().rstrip("\n").split(",")
 
-if "policyArea" not in df.columns:
+if not count:
+    os.remove(tmp_file)
+    print(f"❌ No records in Supabase table; '{output_file}' left unchanged.")
+elif "policyArea" not in header:
+    os.remove(tmp_file)
     print("❌ 'policyArea' column missing from Supabase table.")
 else:
-    output_file = "bills_with_policy_area_full.csv"
-    df.to_csv(output_file, index=False)
-    print(f"✅ Downloaded {len(df)} records to '{output_file}'")
-
+    os.replace(tmp_file, output_file)
+    print(f"✅ Downloaded {count} records to '{output_file}'")
@@ -10,12 +10,23 @@ import re
 import sys
 from flask_cors import CORS
 
+from bill_data_cache import BillDataCache, fetch_policy_area
+from graph_cache import GraphCache, entry_triples
+from prompt_context import build_context, DEFAULT_TOKEN_BUDGET
+from policy_router import PolicyRouter, load_classifier, DEFAULT_THRESHOLD
+from response_cache import ResponseCache, open_backend, DEFAULT_TTL as RESPONSE_CACHE_DEFAULT_TTL
+
 # --- Load environment variables ---
 load_dotenv()
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_API_KEY")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", DEFAULT_TOKEN_BUDGET))
+ROUTER_THRESHOLD = float(os.getenv("ROUTER_THRESHOLD", DEFAULT_THRESHOLD))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", RESPONSE_CACHE_DEFAULT_TTL))
+RESPONSE_CACHE_DB = os.getenv("RESPONSE_CACHE_DB")  # SQLite file shared by all workers; in memory if unset
+ANSWER_MODEL = "gpt-4o"
 
 # --- Initialize clients ---
 client = OpenAI(api_key=OPENAI_API_KEY)
@@ -26,35 +37,34 @@ VALID_POLICY_AREAS = [
     "Housing", "Justice", "Other", "Social Care", "Transport"
 ]
 
-stored_graph = None
-simple_graph = None
+# Bills per policy area, kept in memory and refreshed in the background (see bill_data_cache.py)
+bill_cache = BillDataCache(lambda policy_area: fetch_policy_area(sb, policy_area))
 
 def fetch_bill_data(policy_area="Education"):
-    response = sb.table("all_bills_uk")\
-        .select("*")\
-        .eq("policyArea", policy_area)\
-        .gte("lastUpdate", "2022-01-01")\
-        .execute()
-    return response.data
+    return bill_cache.get(policy_area)
+
+def bill_triples(bill):
+    bill_uri = URIRef(f"Bill{bill['billId']}")
+    status_uri = URIRef(bill["currentStage_description"].replace(" ", "_"))
+    area_uri = URIRef(bill["policyArea"].replace(" ", "_"))
+    triples = [(bill_uri, URIRef("hasStatus"), status_uri), (bill_uri, URIRef("belongsTo"), area_uri)]
+    if bill.get("isAct") is True:
+        triples.append((bill_uri, URIRef("isApproved"), Literal(True)))
+    elif bill.get("isAct") is False:
+        triples.append((bill_uri, URIRef("isRejected"), Literal(True)))
+    if bill.get("currentHouse"):
+        house_uri = URIRef(bill["currentHouse"].replace(" ", "_"))
+        triples.append((bill_uri, URIRef("currentHouse"), house_uri))
+    if bill.get("originatingHouse"):
+        origin_uri = URIRef(bill["originatingHouse"].replace(" ", "_"))
+        triples.append((bill_uri, URIRef("originatingHouse"), origin_uri))
+    return triples
 
 def build_kg(data):
     g = Graph()
     for bill in data:
-        bill_uri = URIRef(f"Bill{bill['billId']}")
-        status_uri = URIRef(bill["currentStage_description"].replace(" ", "_"))
-        area_uri = URIRef(bill["policyArea"].replace(" ", "_"))
-        g.add((bill_uri, URIRef("hasStatus"), status_uri))
-        g.add((bill_uri, URIRef("belongsTo"), area_uri))
-        if bill.get("isAct") is True:
-            g.add((bill_uri, URIRef("isApproved"), Literal(True)))
-        elif bill.get("isAct") is False:
-            g.add((bill_uri, URIRef("isRejected"), Literal(True)))
-        if bill.get("currentHouse"):
-            house_uri = URIRef(bill["currentHouse"].replace(" ", "_"))
-            g.add((bill_uri, URIRef("currentHouse"), house_uri))
-        if bill.get("originatingHouse"):
-            origin_uri = URIRef(bill["originatingHouse"].replace(" ", "_"))
-            g.add((bill_uri, URIRef("originatingHouse"), origin_uri))
+        for triple in bill_triples(bill):
+            g.add(triple)
     return g
 
 def graph_to_json(g: Graph):
@@ -67,10 +77,17 @@ def graph_to_json(g: Graph):
         })
     return triples
 
+def fact_line(triple):
+    s, p, o = triple
+    return f"{s} → {p} → {o}"
+
 def prepare_prompt_from_graph(g: Graph):
-    facts = [f"{s} → {p} → {o}" for s, p, o in g]
+    facts = [fact_line(triple) for triple in g]
     return "\n".join(facts)
 
+# Graph, fact text and 5-bill preview per policy area, reused until the area's bills change (see graph_cache.py)
+graph_cache = GraphCache(bill_triples, fact_line)
+
 def generate_summary(data):
     total = len(data)
     defeated = sum(1 for b in data if b.get("isDefeated"))
@@ -100,13 +117,13 @@ Question:
 {question}
 """
     response = client.chat.completions.create(
-        model="gpt-4o",
+        model=ANSWER_MODEL,
         messages=[{"role": "user", "content": prompt}],
         max_tokens=800
     )
     return response.choices[0].message.content.strip()
 
-def infer_policy_area_and_question(user_input):
+def gpt_infer_policy_area_and_question(user_input):
     semantic_prompt = f"""
 Extract a valid policy area from this list: {", ".join(VALID_POLICY_AREAS)}
 
@@ -131,42 +148,79 @@ User query:
     question = parsed.get("question", user_input)
     return policy_area, question
 
-app = Flask(__name__)
-CORS(app, resources={r"/*": {"origins": "*"}})
+# Policy area from the query locally (lexicon, then the title classifier); GPT only when unsure
+policy_router = PolicyRouter(load_classifier(), fallback=gpt_infer_policy_area_and_question, threshold=ROUTER_THRESHOLD)
+
+def infer_policy_area_and_question(user_input):
+    policy_area, question, _ = policy_router.route(user_input)
+    return policy_area, question
+
+# Whole /analyze answers, dropped when the bills they were based on change (see response_cache.py)
+response_cache = ResponseCache(open_backend(RESPONSE_CACHE_DB), model=ANSWER_MODEL, ttl=RESPONSE_CACHE_TTL,
+                               prompt_version=f"budget={PROMPT_TOKEN_BUDGET},router={ROUTER_THRESHOLD}")
+bill_cache.on_change(response_cache.invalidate_area)
+
+def area_graph(policy_area):
+    # The cached graph entry of one policy area at its current dataset version
+    bills = bill_cache.entry(policy_area)
+    return graph_cache.get(policy_area, bills["data"], bills["version"])
+
+def create_app():
+    app = Flask(__name__)
+    CORS(app, resources={r"/*": {"origins": "*"}})
+
+    @app.route('/analyze', methods=['GET'])
+    def analyze():
+        user_input = request.args.get('query')
+        if not user_input:
+            return jsonify({"error": "query parameter required"}), 400
+
+        cached = response_cache.get(user_input, bill_cache.version)
+        if cached is not None:
+            return jsonify(cached)
+
+        policy_area, refined_question, routing = policy_router.route(user_input)
+        bills = bill_cache.entry(policy_area)
+        data = bills["data"]
+        kg = graph_cache.get(policy_area, data, bills["version"])
+        facts_text, context = build_context(entry_triples(kg), refined_question, PROMPT_TOKEN_BUDGET, kg["facts"])
+        summary_text = generate_summary(data)
+        answer = ask_gpt(facts_text, summary_text, refined_question)
+
+        result = {"policy_area": policy_area, "question": refined_question, "answer": answer,
+                  "context": context, "routing": routing}
+        response_cache.put(user_input, policy_area, bills["version"], result)
+        return jsonify({**result, "cache": {"hit": False}})
 
-@app.route('/analyze', methods=['GET'])
-def analyze():
-    global stored_graph, simple_graph
-    user_input = request.args.get('query')
-    if not user_input:
-        return jsonify({"error": "query parameter required"}), 400
+    @app.route('/graph', methods=['GET'])
+    def get_graph():
+        # The area is part of the request: /analyze returns it as policy_area
+        policy_area = request.args.get('policy_area')
+        if not policy_area:
+            return jsonify({"error": "policy_area parameter required (see policy_area in the /analyze response)."}), 400
+        if policy_area not in VALID_POLICY_AREAS:
+            return jsonify({"error": f"Unknown policy area: {policy_area}"}), 400
 
-    policy_area, refined_question = infer_policy_area_and_question(user_input)
-    data = fetch_bill_data(policy_area)
-    stored_graph = build_kg(data)
-    simple_graph = build_kg(data[:5])
-    facts_text = prepare_prompt_from_graph(stored_graph)
-    summary_text = generate_summary(data)
-    answer = ask_gpt(facts_text, summary_text, refined_question)
+        graph_json = graph_to_json(area_graph(policy_area)["preview"])
+        return jsonify(graph_json)
 
-    return jsonify({"policy_area": policy_area, "question": refined_question, "answer": answer})
+    @app.route('/cache', methods=['GET'])
+    def cache_stats():
+        return jsonify({"bills": bill_cache.stats(), "graphs": graph_cache.stats(), "router": policy_router.stats(),
+                        "responses": response_cache.stats()})
 
-@app.route('/graph', methods=['GET'])
-def get_graph():
-    global simple_graph
-    if simple_graph is None:
-        return jsonify({"error": "No graph generated yet. Run '/analyze' first."}), 400
+    return app
 
-    graph_json = graph_to_json(simple_graph)
-    return jsonify(graph_json)
+app = create_app()
 
 if __name__ == "__main__":
     if len(sys.argv) > 1:
         user_input = sys.argv[1]
         print(f"[DEBUG] Received CLI input: {user_input}")
 
-        policy_area, refined_question = infer_policy_area_and_question(user_input)
-        print(f"[DEBUG] Inferred policy area: {policy_area}")
+        policy_area, refined_question, routing = policy_router.route(user_input)
+        print(f"[DEBUG] Inferred policy area: {policy_area} (via {routing['source']}, "
+              f"confidence {routing['confidence']:.2f})")
         print(f"[DEBUG] Refined question: {refined_question}")
 
         data = fetch_bill_data(policy_area)
@@ -175,7 +229,10 @@ if __name__ == "__main__":
         graph = build_kg(data)
         print(f"[DEBUG] Knowledge graph constructed with {len(graph)} triples")
 
-        facts_text = prepare_prompt_from_graph(graph)
+        facts_text, context = build_context(graph, refined_question, PROMPT_TOKEN_BUDGET,
+                                            prepare_prompt_from_graph(graph))
+        print(f"[DEBUG] Graph facts compressed from {context['tokens_before']} to {context['tokens_after']} tokens "
+              f"({context['bills_listed']}/{context['bills']} bill IDs listed)")
         summary_text = generate_summary(data)
 
         prompt = f"""
@@ -196,4 +253,8 @@ Question:
         print("\n🤔 GPT Answer:\n", answer)
     else:
         print("[INFO] Starting Flask server...")
+        # debug=True runs this block again in the reloader's file watcher; only the
+        # serving child (WERKZEUG_RUN_MAIN) fetches bills and runs the refresh thread
+        if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+            bill_cache.start(VALID_POLICY_AREAS)
         app.run(debug=True, host='0.0.0.0', port=5050)
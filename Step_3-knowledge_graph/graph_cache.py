@@ -0,0 +1,207 @@
+import os
+import time
+import argparse
+import threading
+from collections import OrderedDict
+from rdflib import Graph
+
+# Per-policy-area rdflib graphs and their prompt fact text, kept between
+# /analyze requests. An entry is reused while the area's dataset version
+# (bill_data_cache.py) is unchanged; when it changes, only the triples of
+# added, removed or changed bills are applied to the cached graph instead of
+# building it again.
+#
+# The apps supply how one bill becomes triples and how one triple becomes a
+# fact line, so each keeps its own graph shape. Fact lines are kept per bill
+# and joined in bill order, so the text is updated with the graph.
+
+DEFAULT_MAX_ENTRIES = 32
+PREVIEW_BILLS = 5
+
+
+class GraphCache:
+    def __init__(self, bill_triples, fact_line, max_entries=DEFAULT_MAX_ENTRIES, preview_bills=PREVIEW_BILLS):
+        self.bill_triples = bill_triples    # bill row -> [(s, p, o), ...]
+        self.fact_line = fact_line          # (s, p, o) -> str
+        self.max_entries = max_entries
+        self.preview_bills = preview_bills
+        self.entries = OrderedDict()        # key -> entry, least recently used first
+        self.lock = threading.Lock()
+        self.key_locks = {}
+        self.counts = {"hits": 0, "builds": 0, "updates": 0, "triples_added": 0, "triples_removed": 0}
+
+    def key_lock(self, key):
+        with self.lock:
+            return self.key_locks.setdefault(key, threading.Lock())
+
+    def triples_by_bill(self, data, previous=None):
+        # {billId: triples}, in data order; a bill's triples all have the bill as subject.
+        # Bills whose row is unchanged since `previous` keep their triples.
+        previous_rows, previous_bills = previous or ({}, {})
+        bills = {}
+        for bill in data:
+            bill_id = bill["billId"]
+            if previous_rows.get(bill_id) == bill:
+                bills[bill_id] = previous_bills[bill_id]
+            else:
+                bills[bill_id] = list(dict.fromkeys(self.bill_triples(bill)))
+        return bills
+
+    def preview(self, bills):
+        # Small graph of the first few bills (the /graph endpoint)
+        g = Graph()
+        for triples in list(bills.values())[:self.preview_bills]:
+            for triple in triples:
+                g.add(triple)
+        return g
+
+    def facts(self, bills, lines):
+        return "\n".join(line for bill_id in bills for line in lines[bill_id])
+
+    def build(self, data, version):
+        bills = self.triples_by_bill(data)
+        g = Graph()
+        for triples in bills.values():
+            for triple in triples:
+                g.add(triple)
+        lines = {bill_id: [self.fact_line(triple) for triple in triples] for bill_id, triples in bills.items()}
+        self.counts["builds"] += 1
+        self.counts["triples_added"] += len(g)
+        return {"version": version, "graph": g, "rows": {bill["billId"]: bill for bill in data}, "bills": bills,
+                "lines": lines, "facts": self.facts(bills, lines), "preview": self.preview(bills)}
+
+    def update(self, entry, data, version):
+        # Apply the triple diff between the cached bills and the new data to the cached graph
+        old_bills, g = entry["bills"], entry["graph"]
+        bills = self.triples_by_bill(data, (entry["rows"], old_bills))
+        lines = dict(entry["lines"])
+        added = removed = 0
+        for bill_id in old_bills.keys() - bills.keys():
+            for triple in old_bills[bill_id]:
+                g.remove(triple)
+                removed += 1
+            del lines[bill_id]
+        for bill_id, triples in bills.items():
+            old = old_bills.get(bill_id)
+            if old is triples or old == triples:
+                continue
+            old = set(old or [])
+            for triple in old - set(triples):
+                g.remove(triple)
+                removed += 1
+            for triple in triples:
+                if triple not in old:
+                    g.add(triple)
+                    added += 1
+            lines[bill_id] = [self.fact_line(triple) for triple in triples]
+        self.counts["updates"] += 1
+        self.counts["triples_added"] += added
+        self.counts["triples_removed"] += removed
+        return {"version": version, "graph": g, "rows": {bill["billId"]: bill for bill in data}, "bills": bills,
+                "lines": lines, "facts": self.facts(bills, lines), "preview": self.preview(bills)}
+
+    def get(self, key, data, version):
+        # {"graph", "facts", "preview", "version"} for key (a policy area) at this dataset version.
+        # The graph is updated in place when the version changes; facts and preview are per-version snapshots.
+        with self.key_lock(key):
+            with self.lock:
+                entry = self.entries.get(key)
+                if entry is not None:
+                    self.entries.move_to_end(key)
+            if entry is not None and entry["version"] == version:
+                with self.lock:
+                    self.counts["hits"] += 1
+                return entry
+            entry = self.build(data, version) if entry is None else self.update(entry, data, version)
+            with self.lock:
+                self.entries[key] = entry
+                self.entries.move_to_end(key)
+                while len(self.entries) > self.max_entries:
+                    evicted, _ = self.entries.popitem(last=False)
+                    self.key_locks.pop(evicted, None)
+            return entry
+
+    def stats(self):
+        with self.lock:
+            counts = dict(self.counts)
+            counts["entries"] = {key: {"version": entry["version"], "triples": len(entry["graph"])}
+                                 for key, entry in self.entries.items()}
+        return counts
+
+
+def entry_triples(entry):
+    # All triples of a cached entry as plain tuples; safe to read while the graph itself is being patched
+    return [triple for triples in entry["bills"].values() for triple in triples]
+
+
+def import_app(app_module):
+    # The Flask apps create their API clients at import; placeholders are enough offline
+    import importlib
+
+    for name, value in (("SUPABASE_URL", "http://127.0.0.1:9"), ("SUPABASE_API_KEY", "stub.stub.stub"),
+                        ("OPENAI_API_KEY", "offline")):
+        os.environ.setdefault(name, value)
+    return importlib.import_module(app_module)
+
+
+def load_area_rows(csv_path, policy_area):
+    # One policy area's bills from the enriched CSV, shaped like the Supabase rows
+    import pandas as pd
+
+    df = pd.read_csv(csv_path)
+    df = df[df["policyArea"] == policy_area]
+    return df.astype(object).where(df.notna(), None).to_dict(orient="records")
+
+
+def benchmark(app_module, csv_path, policy_area, changed_fraction, repeat):
+    # Per request: build_kg + prepare_prompt_from_graph (what /analyze did) vs a
+    # cache hit, and a dataset refresh with some bills changed: rebuild vs diff
+    import random
+
+    app = import_app(app_module)
+    data = load_area_rows(csv_path, policy_area)
+    changed = [dict(bill) for bill in data]
+    for bill in random.Random(0).sample(changed, max(1, int(len(changed) * changed_fraction))):
+        bill["currentStage_description"] = "Royal Assent"
+        bill["isAct"] = True
+
+    def best(run):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    rebuild = best(lambda: app.prepare_prompt_from_graph(app.build_kg(data)))
+    cache = app.graph_cache
+    cache.get(policy_area, data, "v1")
+    hit = best(lambda: cache.get(policy_area, data, "v1"))
+
+    diff_timings = []
+    for i in range(repeat):
+        cache.get(policy_area, data, f"base-{i}")
+        start = time.perf_counter()
+        entry = cache.get(policy_area, changed, f"changed-{i}")
+        diff_timings.append(time.perf_counter() - start)
+    expected = app.prepare_prompt_from_graph(app.build_kg(changed))
+    assert sorted(entry["facts"].split("\n")) == sorted(expected.split("\n"))
+    assert set(entry["graph"]) == set(app.build_kg(changed))
+
+    print(f"{app_module}: {policy_area}, {len(data)} bills, {len(entry['graph'])} triples")
+    print(f"{'build_kg + facts per request':<36} {rebuild * 1000:>8.2f}ms")
+    print(f"{'cache hit':<36} {hit * 1000:>8.4f}ms")
+    print(f"{f'refresh, {changed_fraction:.0%} of bills changed':<36} {min(diff_timings) * 1000:>8.2f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the per-policy-area graph cache")
+    parser.add_argument("--app", choices=["kg_api_server", "dynamically_build_kg_example"],
+                        default="dynamically_build_kg_example")
+    parser.add_argument("--csv", default="bills_with_policy_area_full.csv")
+    parser.add_argument("--policy-area", default="Economy")
+    parser.add_argument("--changed", type=float, default=0.02, help="Fraction of bills changed by the refresh")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    benchmark(args.app, args.csv, args.policy_area, args.changed, args.repeat)
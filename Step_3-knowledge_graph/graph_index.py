@@ -0,0 +1,131 @@
+import os
+import json
+import numpy as np
+
+from graph_store import GraphStore
+
+# Secondary indexes over the knowledge graph (a GraphStore or a NetworkX
+# graph), built once per graph file and saved next to it
+# (bills_knowledge_graph.index.json), so the query CLI
+# answers summaries with dict lookups instead of scanning every node and
+# its neighbours. The index records the graph file's size and mtime and is
+# rebuilt when they change.
+
+INDEX_VERSION = 1
+
+# Bill -> entity groupings kept in the index: {label: attribute holding the entity's name}
+GROUPINGS = {"PolicyArea": "name", "Outcome": "status", "Stage": "name"}
+
+
+def index_path_for(graph_path):
+    return os.path.splitext(graph_path)[0] + ".index.json"
+
+
+def graph_stamp(graph_path):
+    # A binary graph store is a directory whose meta.json is rewritten last on every save
+    if os.path.isdir(graph_path):
+        graph_path = os.path.join(graph_path, "meta.json")
+    stat = os.stat(graph_path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def build_index(graph):
+    # labels:     label -> [nodes]
+    # PolicyArea / Outcome / Stage: name -> [bills]   (bills in graph order)
+    # bill_policy: bill -> policy area name
+    if isinstance(graph, GraphStore):
+        return build_index_from_store(graph)
+    G = graph
+    labels = {}
+    for node, attrs in G.nodes(data=True):
+        labels.setdefault(attrs.get("label", ""), []).append(node)
+
+    groups = {label: {} for label in GROUPINGS}
+    bill_policy = {}
+    for bill in labels.get("Bill", []):
+        for nbr in G.neighbors(bill):
+            nbr_attrs = G.nodes[nbr]
+            label = nbr_attrs.get("label")
+            if label in GROUPINGS:
+                name = nbr_attrs.get(GROUPINGS[label], "<Unknown>")
+                groups[label].setdefault(name, []).append(bill)
+                if label == "PolicyArea":
+                    bill_policy.setdefault(bill, name)
+
+    return {"version": INDEX_VERSION, "labels": labels, "groups": groups, "bill_policy": bill_policy}
+
+
+def build_index_from_store(store):
+    # Same index straight from the CSR arrays: decode the string tables once,
+    # then one pass over each relation's edges
+    node_ids = store.node_ids.tolist()
+    labels = {}
+    for node_id, code in zip(node_ids, store.labels.tolist()):
+        labels.setdefault(store.label_names[code], []).append(node_id)
+
+    bill_code = store.label_code("Bill")
+    codes = {store.label_code(label): (label, store.attributes[attribute].tolist())
+             for label, attribute in GROUPINGS.items() if attribute in store.attributes}
+    edges = []
+    for relation in store.relations:
+        sources, targets = store.relation_edges(relation)
+        keep = (store.labels[sources] == bill_code) & np.isin(store.labels[targets], list(codes))
+        edges.append(np.stack([sources[keep], targets[keep]], axis=1))
+    edges = np.concatenate(edges) if edges else np.empty((0, 2), dtype=np.int32)
+    edges = edges[np.argsort(edges[:, 0], kind="stable")]  # bills in graph order
+
+    groups = {label: {} for label in GROUPINGS}
+    bill_policy = {}
+    for source, target in edges.tolist():
+        label, names = codes[store.labels[target]]
+        name = names[target] if names[target] is not None else "<Unknown>"
+        groups[label].setdefault(name, []).append(node_ids[source])
+        if label == "PolicyArea":
+            bill_policy.setdefault(node_ids[source], name)
+
+    return {"version": INDEX_VERSION, "labels": labels, "groups": groups, "bill_policy": bill_policy}
+
+
+class GraphIndex:
+    def __init__(self, data):
+        self.labels = data["labels"]
+        self.groups = data["groups"]
+        self.bill_policy = data["bill_policy"]
+        self.bill_position = {bill: i for i, bill in enumerate(self.labels.get("Bill", []))}
+
+    def nodes_with_label(self, label):
+        return self.labels.get(label, [])
+
+    def bills(self, label, name):
+        # e.g. bills("PolicyArea", "Health"), bills("Outcome", "Rejected")
+        return self.groups.get(label, {}).get(name, [])
+
+    def counts(self, label):
+        return {name: len(bills) for name, bills in self.groups.get(label, {}).items()}
+
+    def bills_with_any(self, label, names):
+        # Union of several groups, each bill once, in graph order
+        found = {bill for name in names for bill in self.bills(label, name)}
+        return sorted(found, key=self.bill_position.get)
+
+    def policy_of(self, bill, default="<Unknown>"):
+        return self.bill_policy.get(bill, default)
+
+
+def load_index(graph, graph_path, index_path=None):
+    # Reuse the saved index if it was built from this exact graph file, otherwise rebuild and save it
+    index_path = index_path or index_path_for(graph_path)
+    stamp = graph_stamp(graph_path)
+    try:
+        with open(index_path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") == INDEX_VERSION and data.get("graph") == stamp:
+            return GraphIndex(data)
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+
+    data = build_index(graph)
+    data["graph"] = stamp
+    with open(index_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    return GraphIndex(data)
@@ -0,0 +1,410 @@
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import tracemalloc
+import numpy as np
+
+# Compact, integer-indexed form of the bills knowledge graph. Node IDs are
+# interned to 0..n-1, the node label ("Bill", "PolicyArea", ...) is a small
+# int code, attributes are string columns, and each edge relation
+# (HAS_POLICY, HAS_OUTCOME, ...) is its own CSR adjacency:
+#
+#     targets of node i = indices[indptr[i]:indptr[i + 1]]
+#
+# so a neighbour or "policy area of bill X" lookup is an O(degree) slice of
+# a NumPy array instead of a walk over per-node Python dicts. Each relation
+# also keeps every edge's position among its source's edges, so all of a
+# node's neighbours come back in the order the edges were added, as
+# G.neighbors() gave them.
+#
+# On disk it is a directory of .npy files plus meta.json (written last).
+# NumPy rather than Arrow IPC or msgpack because numpy is pinned in
+# requirements.txt and neither of those is, and the query scripts must run
+# with the pinned packages alone.
+# Loading memory-maps the arrays and decodes strings only when they're
+# read, and node IDs are found by binary search over a sorted key array,
+# so opening the graph to trace one bill touches a few pages, not the
+# whole file. networkx is only imported for the conversions.
+
+JSON_PATH = "bills_knowledge_graph.json"
+GRAPHML_PATH = "bills_knowledge_graph.graphml"
+STORE_PATH = "bills_knowledge_graph.graph"
+
+
+def save_array(path, array):
+    # Write to a temporary file and rename it into place: a process that has
+    # the old file memory-mapped keeps reading the old inode instead of a
+    # truncated one
+    with open(path + ".tmp", "wb") as f:
+        np.save(f, array)
+    os.replace(path + ".tmp", path)
+
+
+class StringTable:
+    # utf-8 bytes back to back plus offsets, like an Arrow string column.
+    # valid marks non-null entries. Searchable tables also keep the strings
+    # sorted as a fixed-width bytes array (keys) and the permutation that
+    # sorted them (order), so find() is one np.searchsorted.
+
+    def __init__(self, data, offsets, valid=None, order=None, keys=None):
+        self.data = data
+        self.offsets = offsets
+        self.valid = valid
+        self.order = order
+        self.keys = keys
+
+    @classmethod
+    def from_list(cls, values, sortable=False):
+        encoded = [value.encode("utf-8") if value is not None else b"" for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(value) for value in encoded], dtype=np.int64)
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        valid = np.array([value is not None for value in values], dtype=bool)
+        order = keys = None
+        if sortable:
+            keys = np.array(encoded, dtype=bytes)
+            order = np.argsort(keys, kind="stable").astype(np.int32)
+            keys = keys[order]
+        return cls(data, offsets, valid, order, keys)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def raw(self, i):
+        return self.data[self.offsets[i]:self.offsets[i + 1]].tobytes()
+
+    def __getitem__(self, i):
+        if self.valid is not None and not self.valid[i]:
+            return None
+        return self.raw(i).decode("utf-8")
+
+    def tolist(self):
+        blob = self.data.tobytes()
+        offsets = self.offsets.tolist()
+        values = [blob[start:end].decode("utf-8") for start, end in zip(offsets[:-1], offsets[1:])]
+        if self.valid is not None:
+            values = [value if ok else None for value, ok in zip(values, self.valid.tolist())]
+        return values
+
+    def find(self, value):
+        # Index of value, or -1
+        target = value.encode("utf-8")
+        position = int(np.searchsorted(self.keys, target))
+        if position < len(self.keys) and self.keys[position] == target:
+            return int(self.order[position])
+        return -1
+
+    def save(self, directory, name):
+        save_array(os.path.join(directory, f"{name}.data.npy"), self.data)
+        save_array(os.path.join(directory, f"{name}.offsets.npy"), self.offsets)
+        save_array(os.path.join(directory, f"{name}.valid.npy"), self.valid)
+        if self.order is not None:
+            save_array(os.path.join(directory, f"{name}.order.npy"), self.order)
+            save_array(os.path.join(directory, f"{name}.keys.npy"), self.keys)
+
+    @classmethod
+    def load(cls, directory, name, mmap_mode="r"):
+        def array(suffix):
+            path = os.path.join(directory, f"{name}.{suffix}.npy")
+            return np.load(path, mmap_mode=mmap_mode) if os.path.exists(path) else None
+        return cls(array("data"), array("offsets"), array("valid"), array("order"), array("keys"))
+
+
+def build_csr(sources, targets, n_nodes, ranks=None):
+    # Sort edges by source, then indptr[i] is where node i's targets start.
+    # ranks (one per edge) are put in the same order as the targets.
+    sources = np.asarray(sources, dtype=np.int32)
+    targets = np.asarray(targets, dtype=np.int32)
+    order = np.argsort(sources, kind="stable")
+    indptr = np.zeros(n_nodes + 1, dtype=np.int32)
+    np.cumsum(np.bincount(sources, minlength=n_nodes), out=indptr[1:])
+    if ranks is None:
+        return indptr, targets[order]
+    return indptr, targets[order], np.asarray(ranks, dtype=np.int32)[order]
+
+
+class GraphStore:
+    def __init__(self, node_ids, labels, label_names, attributes, relations, ranks=None):
+        self.node_ids = node_ids            # StringTable, position = node index
+        self.labels = labels                # int8 array of codes into label_names
+        self.label_names = label_names      # e.g. ["Bill", "Outcome", ...]
+        self.attributes = attributes        # {"title": StringTable, "name": ..., "status": ...}
+        self.relations = relations          # {"HAS_POLICY": (indptr, indices), ...}
+        self.ranks = ranks or {}            # {"HAS_POLICY": edge position among its source's edges, ...}
+        self._index = None
+
+    @property
+    def index(self):
+        # node id -> node index for bulk work; single lookups use node_ids.find
+        if self._index is None:
+            self._index = {node_id: i for i, node_id in enumerate(self.node_ids.tolist())}
+        return self._index
+
+    def node_index(self, node_id):
+        if self._index is not None:
+            return self._index.get(node_id, -1)
+        return self.node_ids.find(node_id)
+
+    def __len__(self):
+        return len(self.node_ids)
+
+    def has_node(self, node_id):
+        return self.node_index(node_id) >= 0
+
+    def label_code(self, label):
+        return self.label_names.index(label) if label in self.label_names else -1
+
+    def require_index(self, node):
+        # node_index, but an unknown node is a KeyError rather than -1 (which would index the last node)
+        i = self.node_index(node)
+        if i < 0:
+            raise KeyError(node)
+        return i
+
+    def node_label(self, node):
+        return self.label_names[self.labels[self.require_index(node)]]
+
+    def node_attributes(self, node):
+        return self.attributes_at(self.require_index(node))
+
+    def attributes_at(self, i):
+        attrs = {"label": self.label_names[self.labels[i]]}
+        for key, values in self.attributes.items():
+            value = values[i]
+            if value is not None:
+                attrs[key] = value
+        return attrs
+
+    def nodes_with_label(self, label):
+        return np.flatnonzero(self.labels == self.label_code(label))
+
+    def neighbor_indices(self, i, relation=None, label=None):
+        # Targets of node index i, optionally only one relation and/or one target label.
+        # Across relations they come back in the order the edges were added.
+        names = [name for name in ([relation] if relation else self.relations) if name in self.relations]
+        spans = [(name, self.relations[name][0][i], self.relations[name][0][i + 1]) for name in names]
+        parts = [self.relations[name][1][start:end] for name, start, end in spans]
+        targets = np.concatenate(parts) if parts else np.empty(0, dtype=np.int32)
+        if len(spans) > 1 and all(name in self.ranks for name in names):
+            ranks = np.concatenate([self.ranks[name][start:end] for name, start, end in spans])
+            targets = targets[np.argsort(ranks, kind="stable")]
+        if label is not None:
+            targets = targets[self.labels[targets] == self.label_code(label)]
+        return targets
+
+    def neighbors(self, node, relation=None, label=None):
+        return [self.node_ids[j] for j in self.neighbor_indices(self.require_index(node), relation, label)]
+
+    def neighbor_attribute(self, node, relation, attribute):
+        # e.g. neighbor_attribute("bill_3885", "HAS_POLICY", "name") -> "Justice"
+        indptr, indices = self.relations[relation]
+        i = self.require_index(node)
+        start = indptr[i]
+        return self.attributes[attribute][indices[start]] if start < indptr[i + 1] else None
+
+    def neighbor_attribute_many(self, nodes, relation, attribute):
+        # Same lookup for many nodes at once, as a handful of array operations
+        indptr, indices = self.relations[relation]
+        node_indices = np.fromiter((self.index[node] for node in nodes), dtype=np.int64)
+        starts = indptr[node_indices]
+        found = starts < indptr[node_indices + 1]
+        values = self.attributes[attribute].tolist()  # one decode of the column instead of one per node
+        targets = indices[starts[found]].tolist()
+        result = [None] * len(node_indices)
+        for position, target in zip(np.flatnonzero(found).tolist(), targets):
+            result[position] = values[target]
+        return result
+
+    def relation_edges(self, relation):
+        # (source index, target index) arrays for one relation
+        indptr, indices = self.relations[relation]
+        return np.repeat(np.arange(len(indptr) - 1, dtype=np.int32), np.diff(indptr)), indices
+
+    def edges(self):
+        node_ids = self.node_ids.tolist()
+        for name in self.relations:
+            sources, targets = self.relation_edges(name)
+            for source, target in zip(sources.tolist(), targets.tolist()):
+                yield node_ids[source], node_ids[target], name
+
+    @classmethod
+    def from_networkx(cls, G):
+        node_ids = [str(node) for node in G.nodes]
+        index = {node: i for i, node in enumerate(G.nodes)}
+        label_names = sorted({attrs.get("label", "") for _, attrs in G.nodes(data=True)})
+        label_codes = {label: code for code, label in enumerate(label_names)}
+        labels = np.array([label_codes[attrs.get("label", "")] for _, attrs in G.nodes(data=True)], dtype=np.int8)
+
+        keys = sorted({key for _, attrs in G.nodes(data=True) for key in attrs if key != "label"})
+        attributes = {key: [None] * len(node_ids) for key in keys}
+        for i, (_, attrs) in enumerate(G.nodes(data=True)):
+            for key, value in attrs.items():
+                if key != "label" and value is not None:
+                    attributes[key][i] = str(value)
+
+        edges = {}
+        for source, neighbours in G.adjacency():
+            for rank, (target, attrs) in enumerate(neighbours.items()):
+                sources, targets, ranks = edges.setdefault(attrs.get("relation", ""), ([], [], []))
+                sources.append(index[source])
+                targets.append(index[target])
+                ranks.append(rank)
+        csr = {name: build_csr(sources, targets, len(node_ids), ranks)
+               for name, (sources, targets, ranks) in edges.items()}
+        return cls(StringTable.from_list(node_ids, sortable=True), labels, label_names,
+                   {key: StringTable.from_list(values) for key, values in attributes.items()},
+                   {name: (indptr, indices) for name, (indptr, indices, _) in csr.items()},
+                   {name: ranks for name, (_, _, ranks) in csr.items()})
+
+    def to_networkx(self):
+        import networkx as nx
+
+        node_ids = self.node_ids.tolist()
+        G = nx.DiGraph()
+        G.add_nodes_from((node_id, self.attributes_at(i)) for i, node_id in enumerate(node_ids))
+        for name in self.relations:
+            sources, targets = self.relation_edges(name)
+            G.add_edges_from(((node_ids[source], node_ids[target])
+                              for source, target in zip(sources.tolist(), targets.tolist())), relation=name)
+        return G
+
+    def save(self, path=STORE_PATH):
+        os.makedirs(path, exist_ok=True)
+        save_array(os.path.join(path, "labels.npy"), self.labels)
+        self.node_ids.save(path, "node_ids")
+        for key, values in self.attributes.items():
+            values.save(path, f"attr.{key}")
+        for name, (indptr, indices) in self.relations.items():
+            save_array(os.path.join(path, f"rel.{name}.indptr.npy"), indptr)
+            save_array(os.path.join(path, f"rel.{name}.indices.npy"), indices)
+            if name in self.ranks:
+                save_array(os.path.join(path, f"rel.{name}.rank.npy"), self.ranks[name])
+        meta = {"nodes": len(self), "label_names": self.label_names, "attributes": list(self.attributes),
+                "relations": list(self.relations)}
+        # Written last, so a half-written store never looks complete
+        with open(os.path.join(path, "meta.json.tmp"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(os.path.join(path, "meta.json.tmp"), os.path.join(path, "meta.json"))
+
+    @classmethod
+    def load(cls, path=STORE_PATH, mmap=True):
+        mmap_mode = "r" if mmap else None
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        relations = {
+            name: (np.load(os.path.join(path, f"rel.{name}.indptr.npy"), mmap_mode=mmap_mode),
+                   np.load(os.path.join(path, f"rel.{name}.indices.npy"), mmap_mode=mmap_mode))
+            for name in meta["relations"]
+        }
+        # Stores written before ranks were kept list neighbours relation by relation
+        ranks = {name: np.load(os.path.join(path, f"rel.{name}.rank.npy"), mmap_mode=mmap_mode)
+                 for name in meta["relations"] if os.path.exists(os.path.join(path, f"rel.{name}.rank.npy"))}
+        return cls(StringTable.load(path, "node_ids", mmap_mode),
+                   np.load(os.path.join(path, "labels.npy"), mmap_mode=mmap_mode),
+                   meta["label_names"],
+                   {key: StringTable.load(path, f"attr.{key}", mmap_mode) for key in meta["attributes"]},
+                   relations, ranks)
+
+
+def load_json_graph(path=JSON_PATH):
+    import networkx as nx
+
+    with open(path) as f:
+        return nx.node_link_graph(json.load(f), edges="links")
+
+
+def load_graphml_graph(path=GRAPHML_PATH):
+    import networkx as nx
+
+    return nx.read_graphml(path)
+
+
+def convert(source_path, store_path=STORE_PATH):
+    # Node-link JSON or GraphML from older create_knowledge_graph.py runs -> binary store
+    G = load_graphml_graph(source_path) if source_path.endswith(".graphml") else load_json_graph(source_path)
+    store = GraphStore.from_networkx(G)
+    store.save(store_path)
+    return store
+
+
+def best_of(load, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = load()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    load()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, min(timings), peak
+
+
+def cli_seconds(args, repeat=3):
+    # Wall time of a fresh interpreter, imports included
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], check=True, stdout=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def benchmark(json_path=JSON_PATH, graphml_path=GRAPHML_PATH, store_path=STORE_PATH, repeat=3):
+    G, json_seconds, json_peak = best_of(lambda: load_json_graph(json_path), repeat)
+    GraphStore.from_networkx(G).save(store_path)
+
+    print(f"{'load':<32} {'time':>9} {'peak memory':>12}")
+    print(f"{'JSON -> NetworkX':<32} {json_seconds * 1000:>7.1f}ms {json_peak / 1e6:>10.1f}MB")
+    if graphml_path and os.path.exists(graphml_path):
+        _, graphml_seconds, graphml_peak = best_of(lambda: load_graphml_graph(graphml_path), repeat)
+        print(f"{'GraphML -> NetworkX':<32} {graphml_seconds * 1000:>7.1f}ms {graphml_peak / 1e6:>10.1f}MB")
+    _, eager_seconds, eager_peak = best_of(lambda: GraphStore.load(store_path, mmap=False), repeat)
+    print(f"{'GraphStore, read into memory':<32} {eager_seconds * 1000:>7.1f}ms {eager_peak / 1e6:>10.1f}MB")
+    store, open_seconds, open_peak = best_of(lambda: GraphStore.load(store_path), repeat)
+    print(f"{'GraphStore, mmap':<32} {open_seconds * 1000:>7.1f}ms {open_peak / 1e6:>10.1f}MB")
+    _, store_nx_seconds, _ = best_of(lambda: GraphStore.load(store_path).to_networkx(), repeat)
+    print(f"{'GraphStore -> NetworkX':<32} {store_nx_seconds * 1000:>7.1f}ms")
+
+    # "Policy area of bill X" for every bill, both ways
+    bills = [node for node, attrs in G.nodes(data=True) if attrs.get("label") == "Bill"]
+    start = time.perf_counter()
+    nx_areas = [
+        next((G.nodes[nbr].get("name") for nbr in G.neighbors(bill) if G.nodes[nbr].get("label") == "PolicyArea"),
+             None)
+        for bill in bills
+    ]
+    nx_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    store_areas = [store.neighbor_attribute(bill, "HAS_POLICY", "name") for bill in bills]
+    store_lookup_seconds = time.perf_counter() - start
+    store.index  # batched lookups go through the node id dict; build it outside the timing
+    start = time.perf_counter()
+    batch_areas = store.neighbor_attribute_many(bills, "HAS_POLICY", "name")
+    batch_seconds = time.perf_counter() - start
+    assert nx_areas == store_areas == batch_areas
+    print(f"\npolicy area of {len(bills)} bills: NetworkX {nx_seconds * 1000:.1f}ms, "
+          f"GraphStore {store_lookup_seconds * 1000:.1f}ms one by one, {batch_seconds * 1000:.1f}ms batched")
+
+    if os.path.exists("query_knowledge_graph.py"):
+        print(f"\n{'fresh process':<44} {'wall':>7}")
+        for args in (["-c", "import numpy"], ["query_knowledge_graph.py", "--trace", bills[0]]):
+            print(f"{'python ' + ' '.join(args):<44} {cli_seconds(args):>6.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert or benchmark the binary graph store")
+    parser.add_argument("command", choices=["convert", "benchmark"])
+    parser.add_argument("--source", default=JSON_PATH, help="Node-link JSON or GraphML to convert")
+    parser.add_argument("--store", default=STORE_PATH)
+    args = parser.parse_args()
+
+    if args.command == "convert":
+        store = convert(args.source, args.store)
+        print(f"✅ {len(store)} nodes, {sum(len(indices) for _, indices in store.relations.values())} edges "
+              f"converted from {args.source} to {args.store}/")
+    else:
+        benchmark(JSON_PATH if args.source.endswith(".graphml") else args.source, GRAPHML_PATH, args.store)
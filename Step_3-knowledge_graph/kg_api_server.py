@@ -6,11 +6,23 @@ from dotenv import load_dotenv
 import os, json, re
 from collections import Counter
 
+from bill_data_cache import BillDataCache, fetch_policy_area
+from graph_cache import GraphCache, entry_triples
+from prompt_context import build_context, DEFAULT_TOKEN_BUDGET
+from policy_router import PolicyRouter, load_classifier, DEFAULT_THRESHOLD
+from response_cache import ResponseCache, open_backend, DEFAULT_TTL as RESPONSE_CACHE_DEFAULT_TTL
+
 load_dotenv()
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_API_KEY")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", DEFAULT_TOKEN_BUDGET))
+ROUTER_THRESHOLD = float(os.getenv("ROUTER_THRESHOLD", DEFAULT_THRESHOLD))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", RESPONSE_CACHE_DEFAULT_TTL))
+RESPONSE_CACHE_DB = os.getenv("RESPONSE_CACHE_DB")  # SQLite file shared by all workers; in memory if unset
+ANSWER_MODEL = "gpt-4o-mini"
+POLICY_MODEL = "gpt-4o-mini"
 
 client = OpenAI(api_key=OPENAI_API_KEY)
 sb = create_client(SUPABASE_URL, SUPABASE_KEY)
@@ -20,31 +32,38 @@ VALID_POLICY_AREAS = [
     "Housing", "Justice", "Other", "Social Care", "Transport"
 ]
 
-app = Flask(__name__)
+# Bills per policy area, kept in memory and refreshed in the background (see bill_data_cache.py)
+bill_cache = BillDataCache(lambda policy_area: fetch_policy_area(sb, policy_area))
 
 def fetch_bill_data(policy_area="Education"):
-    response = sb.table("all_bills_uk")\
-        .select("*")\
-        .eq("policyArea", policy_area)\
-        .gte("lastUpdate", "2022-01-01")\
-        .execute()
-    return response.data
+    return bill_cache.get(policy_area)
+
+ns = Namespace("http://example.org/legislation/")
+
+def bill_triples(bill):
+    bill_uri = URIRef(ns[f"Bill{bill['billId']}"])
+    status_uri = URIRef(ns[bill["currentStage_description"].replace(" ", "_")])
+    area_uri = URIRef(ns[bill["policyArea"].replace(" ", "_")])
+    return [(bill_uri, ns["hasStatus"], status_uri), (bill_uri, ns["belongsTo"], area_uri)]
 
 def build_kg(data):
     g = Graph()
-    ns = Namespace("http://example.org/legislation/")
     for bill in data:
-        bill_uri = URIRef(ns[f"Bill{bill['billId']}"])
-        status_uri = URIRef(ns[bill["currentStage_description"].replace(" ", "_")])
-        area_uri = URIRef(ns[bill["policyArea"].replace(" ", "_")])
-        g.add((bill_uri, ns["hasStatus"], status_uri))
-        g.add((bill_uri, ns["belongsTo"], area_uri))
+        for triple in bill_triples(bill):
+            g.add(triple)
     return g
 
+def fact_line(triple):
+    s, p, o = triple
+    return f"{s.split('/')[-1]} → {p.split('/')[-1]} → {o.split('/')[-1] if isinstance(o, URIRef) else o}"
+
 def prepare_prompt_from_graph(g):
-    facts = [f"{s.split('/')[-1]} → {p.split('/')[-1]} → {o.split('/')[-1] if isinstance(o, URIRef) else o}" for s, p, o in g]
+    facts = [fact_line(triple) for triple in g]
     return "\n".join(facts)
 
+# Graph + fact text per policy area, reused until the area's bills change (see graph_cache.py)
+graph_cache = GraphCache(bill_triples, fact_line)
+
 def generate_summary(data):
     total = len(data)
     defeated = sum(1 for b in data if b.get("isDefeated"))
@@ -54,8 +73,8 @@ def generate_summary(data):
     stage_summary = "\n".join([f"{stage}: {count}" for stage, count in stage_counts.items()])
     return f"Total bills: {total}\nDefeated: {defeated}\nWithdrawn: {withdrawn}\nActs passed: {acts}\n\nStage distribution:\n{stage_summary}"
 
-def ask_gpt(facts, summary, question):
-    prompt = f"""
+def analysis_prompt(facts, summary, question):
+    return f"""
     You are an AI policy analyst. Here is a knowledge graph and summary:
 
     Summary:
@@ -67,45 +86,91 @@ def ask_gpt(facts, summary, question):
     Based on the data, answer:
     {question}
     """
+
+def ask_gpt(facts, summary, question):
     response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "user", "content": prompt}],
+        model=ANSWER_MODEL,
+        messages=[{"role": "user", "content": analysis_prompt(facts, summary, question)}],
         max_tokens=800
     )
     return response.choices[0].message.content.strip()
 
-def infer_policy_and_question(query):
-    semantic_prompt = f"""Extract a valid policy_area and question from the query.
+def prepare_analysis(policy_area, question):
+    # Everything the answering call needs: (facts, summary, context stats, dataset version)
+    bills = bill_cache.entry(policy_area)
+    data = bills["data"]
+    kg = graph_cache.get(policy_area, data, bills["version"])
+    facts, context = build_context(entry_triples(kg), question, PROMPT_TOKEN_BUDGET, kg["facts"])
+    return facts, generate_summary(data), context, bills["version"]
+
+def policy_prompt(query):
+    return f"""Extract a valid policy_area and question from the query.
     Policy areas: {', '.join(VALID_POLICY_AREAS)}.
     Response as JSON: {{"policy_area": "...", "question": "..."}}
 
     Query: {query}"""
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "user", "content": semantic_prompt}],
-        max_tokens=150
-    )
-    raw_response = response.choices[0].message.content.strip()
-    cleaned = re.sub(r"^```(?:json)?\s*|\s*```$", "", raw_response, flags=re.MULTILINE).strip()
+
+def parse_policy_answer(raw_response, query):
+    cleaned = re.sub(r"^```(?:json)?\s*|\s*```$", "", raw_response.strip(), flags=re.MULTILINE).strip()
     parsed = json.loads(cleaned)
     policy_area = parsed.get("policy_area", "Education")
     question = parsed.get("question", query)
     return policy_area, question
 
-@app.route('/analyze', methods=['GET'])
-def analyze():
-    query = request.args.get('query')
-    if not query:
-        return jsonify({"error": "Query parameter is required."}), 400
+def gpt_infer_policy_and_question(query):
+    response = client.chat.completions.create(
+        model=POLICY_MODEL,
+        messages=[{"role": "user", "content": policy_prompt(query)}],
+        max_tokens=150
+    )
+    return parse_policy_answer(response.choices[0].message.content, query)
+
+# Policy area from the query locally (lexicon, then the title classifier); GPT only when unsure
+policy_router = PolicyRouter(load_classifier(), fallback=gpt_infer_policy_and_question, threshold=ROUTER_THRESHOLD)
+
+def infer_policy_and_question(query):
+    policy_area, question, _ = policy_router.route(query)
+    return policy_area, question
+
+# Whole /analyze answers, dropped when the bills they were based on change (see response_cache.py)
+response_cache = ResponseCache(open_backend(RESPONSE_CACHE_DB), model=ANSWER_MODEL, ttl=RESPONSE_CACHE_TTL,
+                               prompt_version=f"budget={PROMPT_TOKEN_BUDGET},router={ROUTER_THRESHOLD}")
+bill_cache.on_change(response_cache.invalidate_area)
+
+def create_app():
+    app = Flask(__name__)
+
+    @app.route('/analyze', methods=['GET'])
+    def analyze():
+        query = request.args.get('query')
+        if not query:
+            return jsonify({"error": "Query parameter is required."}), 400
+
+        cached = response_cache.get(query, bill_cache.version)
+        if cached is not None:
+            return jsonify(cached)
+
+        policy_area, question, routing = policy_router.route(query)
+        facts, summary, context, version = prepare_analysis(policy_area, question)
+        answer = ask_gpt(facts, summary, question)
+
+        result = {"policy_area": policy_area, "question": question, "answer": answer, "context": context,
+                  "routing": routing}
+        response_cache.put(query, policy_area, version, result)
+        return jsonify({**result, "cache": {"hit": False}})
+
+    @app.route('/cache', methods=['GET'])
+    def cache_stats():
+        return jsonify({"bills": bill_cache.stats(), "graphs": graph_cache.stats(), "router": policy_router.stats(),
+                        "responses": response_cache.stats()})
 
-    policy_area, question = infer_policy_and_question(query)
-    data = fetch_bill_data(policy_area)
-    graph = build_kg(data)
-    facts = prepare_prompt_from_graph(graph)
-    summary = generate_summary(data)
-    answer = ask_gpt(facts, summary, question)
+    return app
 
-    return jsonify({"policy_area": policy_area, "question": question, "answer": answer})
+app = create_app()
 
 if __name__ == '__main__':
+    # debug=True runs this block again in the reloader's file watcher; only the
+    # serving child (WERKZEUG_RUN_MAIN) fetches bills and runs the refresh thread
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        bill_cache.start(VALID_POLICY_AREAS)
     app.run(host='0.0.0.0', port=5050, debug=True)
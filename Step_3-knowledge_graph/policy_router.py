@@ -0,0 +1,203 @@
+import os
+import re
+import sys
+import time
+import argparse
+import threading
+import numpy as np
+
+import step_paths
+from local_classifier import PolicyAreaClassifier, VALID_POLICY_AREAS, load_labelled_titles
+
+# Local replacement for the first GPT call in /analyze, which only maps the
+# query to one of the 10 policy areas:
+#
+#   1. lexicon: the query names an area or an alias ("NHS" -> Health,
+#      "defence" -> Defense) and the classifier picks the same area
+#   2. classifier: the Step 2 title classifier, trained on the bill titles
+#      per area, is confident enough
+#   3. otherwise the LLM, as before, including a lexicon match that the
+#      classifier disagrees with
+#
+# Tiers 1 and 2 take well under a millisecond. The routed question is the
+# query itself; only the LLM tier rewrites it. The classifier is trained by
+# `python policy_router.py train`; without a saved model every query that
+# isn't a lexicon match goes to the LLM.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MODEL_PATH = os.path.join(HERE, "policy_router_model.npz")
+CSV_PATH = os.path.join(HERE, "bills_with_policy_area_full.csv")
+DEFAULT_THRESHOLD = 0.9  # see `python policy_router.py benchmark`
+
+LEXICON = {
+    "Defense": ["defense", "defence", "military", "armed forces", "army", "navy", "royal air force", "veterans"],
+    "Economy": ["economy", "economic", "tax", "taxes", "taxation", "finance", "financial", "budget", "trade",
+                "business", "businesses"],
+    "Education": ["education", "school", "schools", "university", "universities", "students", "teachers"],
+    "Environment": ["environment", "environmental", "climate", "energy", "pollution", "wildlife", "net zero"],
+    "Health": ["health", "nhs", "hospital", "hospitals", "medical", "medicine", "patients"],
+    "Housing": ["housing", "homes", "tenants", "landlords", "renters", "rent", "leasehold"],
+    "Justice": ["justice", "crime", "criminal", "courts", "police", "policing", "prison", "prisons", "sentencing"],
+    "Social Care": ["social care", "welfare", "carers", "pensions", "benefits", "disability", "disabled"],
+    "Transport": ["transport", "rail", "railways", "roads", "vehicles", "aviation", "buses", "trains"],
+}
+LEXICON_PATTERNS = {
+    area: re.compile(r"\b(" + "|".join(re.escape(term) for term in terms) + r")\b")
+    for area, terms in LEXICON.items()
+}
+
+
+def lexicon_match(query):
+    # The one area whose terms appear most in the query, or None if nothing (or a tie) matches
+    lowered = query.lower()
+    hits = {area: len(pattern.findall(lowered)) for area, pattern in LEXICON_PATTERNS.items()}
+    hits = {area: count for area, count in hits.items() if count}
+    if not hits:
+        return None
+    ranked = sorted(hits.values(), reverse=True)
+    if len(ranked) > 1 and ranked[0] == ranked[1]:
+        return None
+    return max(hits, key=hits.get)
+
+
+def load_classifier(model_path=MODEL_PATH):
+    # The model saved by `python policy_router.py train`, or None if there isn't one yet
+    if not os.path.exists(model_path):
+        print(f"⚠️ No policy router model at {model_path}, routing with the lexicon and LLM only "
+              f"(run `python policy_router.py train`)", file=sys.stderr)
+        return None
+    return PolicyAreaClassifier.load(model_path)
+
+
+def train_classifier(model_path=MODEL_PATH, csv_path=CSV_PATH):
+    # ~3s on the labelled bill titles
+    titles, labels = load_labelled_titles(csv_path)
+    model = PolicyAreaClassifier().fit(titles, labels)
+    model.save(model_path)
+    print(f"💾 Policy router trained on {len(titles)} bill titles, saved to {model_path}")
+    return model
+
+
+class PolicyRouter:
+    def __init__(self, classifier, fallback=None, threshold=DEFAULT_THRESHOLD):
+        self.classifier = classifier
+        self.fallback = fallback        # query -> (policy_area, question), e.g. the GPT call
+        self.threshold = threshold
+        self.counts = {"lexicon": 0, "classifier": 0, "llm": 0}
+        self.lock = threading.Lock()    # one router serves every request thread
+
+    def classify(self, query):
+        if self.classifier is None:
+            return "Other", 0.0
+        labels, confidence = self.classifier.predict([query])
+        return labels[0], float(confidence[0])
+
+    def local(self, query, fallback=True):
+        # (area, confidence, source) from the local tiers; source "llm" means the fallback should decide
+        matched = lexicon_match(query)
+        area, confidence = self.classify(query)
+        if matched is not None:
+            if matched == area or self.classifier is None or not fallback:
+                return matched, 1.0, "lexicon"
+            return matched, confidence, "llm"
+        if confidence < self.threshold and fallback:
+            return area, confidence, "llm"
+        return area, confidence, "classifier"
+
+    def routed(self, area, question, source, confidence, start):
+        with self.lock:
+            self.counts[source] += 1
+        return area, question, {"source": source, "confidence": round(confidence, 4),
+                                "seconds": round(time.perf_counter() - start, 6)}
+
+    def route(self, query):
+        # -> (policy_area, question, {"source", "confidence", "seconds"})
+        start = time.perf_counter()
+        area, confidence, source = self.local(query, self.fallback is not None)
+        question = query
+        if source == "llm":
+            llm_area, question = self.fallback(query)
+            if llm_area in VALID_POLICY_AREAS:
+                area = llm_area
+        return self.routed(area, question, source, confidence, start)
+
+    async def route_async(self, query, fallback):
+        # route() with an async fallback (async_api_server.py); the local tiers take microseconds, so run inline
+        start = time.perf_counter()
+        area, confidence, source = self.local(query)
+        question = query
+        if source == "llm":
+            llm_area, question = await fallback(query)
+            if llm_area in VALID_POLICY_AREAS:
+                area = llm_area
+        return self.routed(area, question, source, confidence, start)
+
+    def stats(self):
+        with self.lock:
+            counts = dict(self.counts)
+        total = sum(counts.values())
+        return {**counts, "local_rate": round(1 - counts["llm"] / total, 4) if total else 0.0}
+
+
+TEMPLATES = [
+    "What happened to the {title}?",
+    "Was the {title} passed?",
+    "How far did the {title} get?",
+]
+
+
+def benchmark(csv_path=CSV_PATH, test_fraction=0.2, seed=42, thresholds=(0.5, 0.7, 0.8, 0.9, 0.95)):
+    # Queries built from held-out bill titles, routed by a router trained on the rest
+    titles, labels = load_labelled_titles(csv_path)
+    order = np.random.default_rng(seed).permutation(len(titles))
+    split = int(len(titles) * (1 - test_fraction))
+    model = PolicyAreaClassifier().fit([titles[i] for i in order[:split]], [labels[i] for i in order[:split]])
+
+    queries, expected = [], []
+    for n, i in enumerate(order[split:]):
+        queries.append(TEMPLATES[n % len(TEMPLATES)].format(title=titles[i]))
+        expected.append(labels[i])
+    queries += [f"How many {area} bills were rejected?" for area in VALID_POLICY_AREAS if area != "Other"]
+    expected += [area for area in VALID_POLICY_AREAS if area != "Other"]
+
+    def run(threshold):
+        # The fallback stands in for the LLM and keeps the local area, so only local answers are scored
+        router = PolicyRouter(model, fallback=lambda query: (None, query), threshold=threshold)
+        routed = [router.route(query) for query in queries]
+        correct = np.array([area == label for (area, _, _), label in zip(routed, expected)])
+        sources = np.array([info["source"] for _, _, info in routed])
+        return correct, sources
+
+    start = time.perf_counter()
+    correct, sources = run(DEFAULT_THRESHOLD)
+    seconds = (time.perf_counter() - start) / len(queries)
+    lexicon = sources == "lexicon"
+    print(f"📊 {len(queries)} queries, {seconds * 1e6:.0f} µs per query locally")
+    print(f"lexicon tier: {lexicon.mean():.1%} of queries, {correct[lexicon].mean():.1%} correct\n")
+    print(f"{'threshold':<10} {'answered locally':>17} {'accuracy':>9} {'LLM calls':>10}")
+    for threshold in thresholds:
+        correct, sources = run(threshold)
+        local = sources != "llm"
+        print(f"{threshold:<10.2f} {local.mean():>16.1%} {correct[local].mean():>9.1%} {(~local).sum():>10d}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train, try or benchmark the local policy-area router")
+    parser.add_argument("command", choices=["train", "route", "benchmark"])
+    parser.add_argument("query", nargs="?", help="Query for the route command")
+    parser.add_argument("--csv", default=CSV_PATH)
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args()
+
+    if args.command == "train":
+        train_classifier(args.model, args.csv)
+    elif args.command == "route":
+        router = PolicyRouter(load_classifier(args.model), fallback=lambda query: (None, query),
+                              threshold=args.threshold)
+        area, question, info = router.route(args.query or "")
+        llm = " (/analyze would ask the LLM)" if info["source"] == "llm" else ""
+        print(f"🧭 {area} via {info['source']}, confidence {info['confidence']:.2f}, "
+              f"{info['seconds'] * 1e6:.0f} µs{llm}")
+    else:
+        benchmark(args.csv)
@@ -0,0 +1,191 @@
+import re
+import time
+import argparse
+from collections import defaultdict
+
+try:
+    import tiktoken
+except ImportError:  # optional; without it tokens are estimated at ~4 characters each
+    tiktoken = None
+
+# Compact LLM context from a bills knowledge graph. Instead of one
+# "subject → predicate → object" line per triple, attributes every bill
+# shares are stated once and bills with identical remaining attributes are
+# grouped into one record:
+#
+#     All 382 bills: belongsTo Health
+#     hasStatus 2nd_reading, isRejected, currentHouse Commons (211 bills): Bill3885, Bill3902, ..., +180 more
+#
+# Records are ranked by word overlap with the question, then bill IDs are
+# listed in that order until the token budget is spent. Each record keeps
+# its exact bill count even when IDs are cut, and the generate_summary()
+# statistics go into the prompt unchanged. The budget covers every line,
+# including the note on groups left out; only a budget too small for the
+# header and that note is exceeded.
+
+DEFAULT_TOKEN_BUDGET = 1500
+ENCODING_MODEL = "gpt-4o"
+
+STOP_WORDS = {"the", "and", "are", "was", "were", "which", "what", "how", "many", "much", "have", "has", "been",
+              "does", "did", "with", "for", "that", "this", "bill", "bills", "policy", "area", "most", "often"}
+
+# Question word stems -> words used in the graph's predicates and objects
+SYNONYMS = {
+    "fail": "rejected", "faile": "rejected", "faili": "rejected", "defea": "rejected",
+    "pass": "approved", "passe": "approved", "passi": "approved", "act": "approved", "acts": "approved",
+    "law": "approved", "laws": "approved", "stuck": "status", "stage": "status",
+}
+
+_encoding = None
+
+
+def count_tokens(text):
+    global _encoding
+    if tiktoken is None:
+        return len(text) // 4 + 1
+    if _encoding is None:
+        _encoding = tiktoken.encoding_for_model(ENCODING_MODEL)
+    return len(_encoding.encode(text))
+
+
+def short(term):
+    # URIRef("http://example.org/legislation/2nd_reading") -> "2nd_reading", Literal(True) -> "true"
+    return str(term).rstrip("/").split("/")[-1]
+
+
+def words(text):
+    # "isRejected 2nd_reading" -> {"rejec", "2nd", "readi"}: split camelCase/underscores, drop stop words, 5-letter stems
+    text = re.sub(r"([a-z])([A-Z])", r"\1 \2", text)
+    tokens = [word for word in re.findall(r"[a-z0-9]+", text.lower()) if len(word) > 2 and word not in STOP_WORDS]
+    return {word[:5] for word in tokens}
+
+
+def question_words(question):
+    found = words(question)
+    return found | {SYNONYMS[word][:5] for word in found if word in SYNONYMS}
+
+
+def describe(attributes):
+    # [("hasStatus", "2nd_reading"), ("isRejected", "true")] -> "hasStatus 2nd_reading, isRejected"
+    return ", ".join(predicate if value.lower() == "true" else f"{predicate} {value}" for predicate, value in attributes)
+
+
+def group_records(triples):
+    # Attributes shared by every bill, and [(attributes, [bills])] for the rest
+    attributes = defaultdict(set)
+    for s, p, o in triples:
+        attributes[short(s)].add((short(p), short(o)))
+    if not attributes:
+        return [], []
+    common = set.intersection(*attributes.values())
+    groups = defaultdict(list)
+    for bill, attrs in attributes.items():
+        groups[frozenset(attrs - common)].append(bill)
+    return sorted(common), [(sorted(attrs), bills) for attrs, bills in groups.items()]
+
+
+def build_context(triples, question, token_budget=DEFAULT_TOKEN_BUDGET, full_facts=None):
+    # -> (context text, stats). triples can be an rdflib Graph, but plain tuples
+    # (graph_cache.entry_triples) are much faster to walk. full_facts is the
+    # one-line-per-triple text this replaces, for the before count.
+    triples = list(triples)
+    common, groups = group_records(triples)
+    total = sum(len(bills) for _, bills in groups)
+    query = question_words(question)
+    ranked = sorted(groups, key=lambda group: (-len(query & words(describe(group[0]))), -len(group[1]),
+                                               describe(group[0])))
+
+    header = f"All {total} bills: {describe(common)}" if common else f"{total} bills"
+    used = count_tokens(header)
+
+    # Bills in ranked[i:], for the note that stands in for the records left out
+    bills_from = [0] * (len(ranked) + 1)
+    for i in range(len(ranked) - 1, -1, -1):
+        bills_from[i] = bills_from[i + 1] + len(ranked[i][1])
+
+    def omitted_note(start):
+        if start >= len(ranked):
+            return ""
+        return f"+{len(ranked) - start} less relevant groups ({bills_from[start]} bills) not listed"
+
+    # Every record's description and exact count first, most relevant first.
+    # A record only goes in if the note for the records after it still fits.
+    records = []
+    for position, (attrs, bills) in enumerate(ranked):
+        line = f"{describe(attrs) or 'no other attributes'} ({len(bills)} bills)"
+        cost = count_tokens(line) + 1
+        note = omitted_note(position + 1)
+        reserve = count_tokens(note) + 1 if note else 0
+        if used + cost + reserve > token_budget:
+            break
+        records.append({"line": line, "bills": bills, "shown": []})
+        used += cost
+    note = omitted_note(len(records))
+    if note:
+        used += count_tokens(note) + 1
+
+    # Then bill IDs, in the same order, while the budget lasts
+    for record in records:
+        bills, shown = record["bills"], record["shown"]
+        for bill in bills:
+            cost = count_tokens(f", {bill}")
+            remaining = len(bills) - len(shown) - 1
+            more = count_tokens(f", +{remaining} more") if remaining else 0
+            if used + cost + more > token_budget:
+                break
+            shown.append(bill)
+            used += cost
+        if len(shown) < len(bills):
+            break
+
+    lines = [header]
+    for record in records:
+        line = record["line"]
+        if record["shown"]:
+            line += ": " + ", ".join(record["shown"])
+            if len(record["shown"]) < len(record["bills"]):
+                line += f", +{len(record['bills']) - len(record['shown'])} more"
+        lines.append(line)
+    if note:
+        lines.append(note)
+    context = "\n".join(lines)
+
+    if full_facts is None:
+        full_facts = "\n".join(f"{short(s)} → {short(p)} → {short(o)}" for s, p, o in triples)
+    stats = {
+        "tokens_before": count_tokens(full_facts),
+        "tokens_after": count_tokens(context),
+        "token_budget": token_budget,
+        "bills": total,
+        "bills_listed": sum(len(record["shown"]) for record in records),
+        "groups": len(groups),
+        "groups_listed": len(records),
+        "tokenizer": ENCODING_MODEL if tiktoken is not None else "estimate",
+    }
+    return context, stats
+
+
+if __name__ == "__main__":
+    from graph_cache import import_app, load_area_rows, entry_triples
+
+    parser = argparse.ArgumentParser(description="Show the compressed prompt context for one policy area")
+    parser.add_argument("--app", choices=["kg_api_server", "dynamically_build_kg_example"],
+                        default="dynamically_build_kg_example")
+    parser.add_argument("--csv", default="bills_with_policy_area_full.csv")
+    parser.add_argument("--policy-area", default="Health")
+    parser.add_argument("--question", default="Which Health bills were rejected and at what stage did they stop?")
+    parser.add_argument("--budget", type=int, default=DEFAULT_TOKEN_BUDGET)
+    args = parser.parse_args()
+
+    app = import_app(args.app)
+    data = load_area_rows(args.csv, args.policy_area)
+    entry = app.graph_cache.get(args.policy_area, data, "cli")
+
+    start = time.perf_counter()
+    context, stats = build_context(entry_triples(entry), args.question, args.budget, entry["facts"])
+    elapsed = time.perf_counter() - start
+
+    print(context)
+    print(f"\n📉 {stats['tokens_before']} -> {stats['tokens_after']} tokens ({stats['tokenizer']}), "
+          f"{stats['bills_listed']}/{stats['bills']} bill IDs listed, "
+          f"{stats['groups_listed']}/{stats['groups']} groups, built in {elapsed * 1000:.1f}ms")
@@ -1,102 +1,210 @@
-import networkx as nx
+import os
+import sys
 import json
 import argparse
+import threading
 from collections import Counter
 
-# Load the graph
-with open("bills_knowledge_graph.json") as f:
-    data = json.load(f)
-    G = nx.node_link_graph(data, edges="links")  # Explicitly define 'links' to suppress warning
+from graph_store import GraphStore, STORE_PATH, JSON_PATH, convert
+from graph_index import load_index, graph_stamp
+
+STORE_STAMP = None
+_graph = None
+_lock = threading.Lock()
+
+
+class GraphSnapshot:
+    # One store and the index built from it. A query takes a snapshot once and
+    # uses it throughout, so refresh_graph() swapping in a rebuilt graph can't
+    # hand it nodes from one build and index entries from another.
+
+    def __init__(self, store):
+        self.store = store
+        self._index = None
+        self._lock = threading.Lock()
+
+    @property
+    def index(self):
+        # label/policy/outcome/stage -> nodes, saved next to the graph and rebuilt when it changes.
+        # Only the summaries need it, so --trace never reads it.
+        with self._lock:
+            if self._index is None:
+                self._index = load_index(self.store, STORE_PATH)
+            return self._index
+
+
+def current_graph():
+    # Open the graph on first use (memory-mapped binary store; converted once
+    # from the JSON of older runs), so importing this module reads nothing
+    global _graph, STORE_STAMP
+    with _lock:
+        if _graph is None:
+            if not os.path.exists(os.path.join(STORE_PATH, "meta.json")):
+                print(f"📦 Converting {JSON_PATH} to {STORE_PATH}/", file=sys.stderr)
+                convert(JSON_PATH, STORE_PATH)
+            _graph, STORE_STAMP = GraphSnapshot(GraphStore.load(STORE_PATH)), graph_stamp(STORE_PATH)
+        return _graph
+
+
+def graph_index():
+    return current_graph().index
+
+
+def refresh_graph():
+    # For long-running callers (query_server.py): reopen the store if
+    # create_knowledge_graph.py has rebuilt it since it was loaded. Queries
+    # already running keep the snapshot they started with.
+    global _graph, STORE_STAMP
+    if _graph is None:
+        current_graph()
+        return False
+    stamp = graph_stamp(STORE_PATH)
+    if stamp == STORE_STAMP:
+        return False
+    with _lock:
+        _graph, STORE_STAMP = GraphSnapshot(GraphStore.load(STORE_PATH)), stamp
+    return True
+
+
+# Queries return plain data (JSON-ready); the CLI prints it and query_server.py sends it as JSON.
+# Each takes the graph snapshot to read (the current one by default).
+
+def policy_area_summary(graph=None):
+    index = (graph or current_graph()).index
+    counter = Counter(index.counts("PolicyArea"))
+    return {
+        "bills": len(index.nodes_with_label("Bill")),
+        "policy_areas": dict(counter.most_common()),
+    }
+
+
+def rejected_bills(graph=None):
+    # [{policy_area, count, bills: [{id, title}]}], biggest areas first, bills in graph order
+    graph = graph or current_graph()
+    store, index = graph.store, graph.index
+    titles = store.attributes["title"] if "title" in store.attributes else None
+    rejected = {}
+    for node in index.bills_with_any("Outcome", ["Rejected", "Withdrawn"]):
+        title = titles[store.node_index(node)] if titles is not None else None
+        rejected.setdefault(index.policy_of(node), []).append({"id": node, "title": title or node})
+    return [
+        {"policy_area": area, "count": len(bills), "bills": bills}
+        for area, bills in sorted(rejected.items(), key=lambda x: -len(x[1]))
+    ]
+
+
+def bill_trace(bill_id, graph=None):
+    # Attributes and neighbours of one bill, or None if it isn't in the graph
+    store = (graph or current_graph()).store
+    i = store.node_index(bill_id)
+    if i < 0:
+        return None
+    attrs = store.attributes_at(i)
+    connections = [{"node": store.node_ids[j], **store.attributes_at(j)} for j in store.neighbor_indices(i)]
+    return {
+        "bill": bill_id,
+        "title": attrs.get("title"),
+        "policy_area": next((c.get("name") for c in connections if c["label"] == "PolicyArea"), None),
+        "outcomes": [c.get("status") for c in connections if c["label"] == "Outcome"],
+        "stage": next((c.get("name") for c in connections if c["label"] == "Stage"), None),
+        "connections": connections,
+    }
+
+
+def trace_bills(bill_ids, graph=None):
+    graph = graph or current_graph()
+    return {bill_id: bill_trace(bill_id, graph) for bill_id in bill_ids}
+
+
+def validate_query(query):
+    # run_query() input comes from HTTP bodies and REPL lines; a wrong shape is a ValueError, not a crash
+    if not isinstance(query, dict):
+        raise ValueError("Expected a JSON object")
+    trace = query.get("trace")
+    if trace and not (isinstance(trace, str) or
+                      isinstance(trace, list) and all(isinstance(bill, str) for bill in trace)):
+        raise ValueError('"trace" must be a bill ID or a list of bill IDs')
+
+
+def run_query(query, graph=None):
+    # One batched request: {"summary": true, "rejected": true, "trace": ["bill_1", ...]},
+    # answered from a single snapshot of the graph
+    validate_query(query)
+    graph = graph or current_graph()
+    result = {}
+    if query.get("summary"):
+        result["summary"] = policy_area_summary(graph)
+    if query.get("rejected"):
+        result["rejected"] = rejected_bills(graph)
+    if query.get("trace"):
+        trace = query["trace"]
+        result["trace"] = trace_bills([trace] if isinstance(trace, str) else trace, graph)
+    return result
+
 
 def summarize_policy_areas():
-    bill_nodes = [(node, attrs) for node, attrs in G.nodes(data=True) if attrs.get("label") == "Bill"]
-    print(f"\n📦 Found {len(bill_nodes)} bill nodes")
+    summary = policy_area_summary()
+    print(f"\n📦 Found {summary['bills']} bill nodes")
 
-    if not bill_nodes:
+    if not summary["bills"]:
         print("⚠️ No bill nodes found. Check if 'label' attribute is present.")
         print("🔍 First few nodes in graph for inspection:")
-        for i, (node, attrs) in enumerate(G.nodes(data=True)):
-            print(f"{node}: {attrs}")
-            if i >= 5:
-                break
+        store = current_graph().store
+        for i in range(min(len(store), 6)):
+            print(f"{store.node_ids[i]}: {store.attributes_at(i)}")
         return
 
-    counter = Counter()
-    for _, attrs in bill_nodes:
-        for nbr in G.neighbors(_):
-            nbr_attrs = G.nodes[nbr]
-            if nbr_attrs.get("label") == "PolicyArea":
-                counter[nbr_attrs.get("name", "<Unknown>")] += 1
-
     print("\n📊 Bills per Policy Area:\n")
-    for area, count in counter.most_common():
+    for area, count in summary["policy_areas"].items():
         print(f"{area:<20} {count}")
 
 def rejected_bills_by_policy():
-    rejected = {}
-    for node, attrs in G.nodes(data=True):
-        if attrs.get("label") == "Bill":
-            outcomes = []
-            for nbr in G.neighbors(node):
-                nbr_attrs = G.nodes[nbr]
-                if nbr_attrs.get("label") == "Outcome" and nbr_attrs.get("status") in ["Rejected", "Withdrawn"]:
-                    outcomes.append(nbr_attrs.get("status"))
-
-            if outcomes:
-                title = attrs.get("title", node)
-                policy_area = "<Unknown>"
-                for second_nbr in G.neighbors(node):
-                    second_attrs = G.nodes[second_nbr]
-                    if second_attrs.get("label") == "PolicyArea":
-                        policy_area = second_attrs.get("name", policy_area)
-                        break
-                rejected.setdefault(policy_area, []).append(title)
-
     print("\n❌ Rejected Bills per Policy Area:")
-    for area, bills in sorted(rejected.items(), key=lambda x: -len(x[1])):
-        print(f"\n{area} ({len(bills)} rejected):")
-        for title in bills[:5]:  # print only top 5 per area
-            print(f"  - {title}")
-        if len(bills) > 5:
+    for group in rejected_bills():
+        print(f"\n{group['policy_area']} ({group['count']} rejected):")
+        for bill in group["bills"][:5]:  # print only top 5 per area
+            print(f"  - {bill['title']}")
+        if group["count"] > 5:
             print("  ...")
 
 def trace_bill(bill_id):
-    if not G.has_node(bill_id):
+    trace = bill_trace(bill_id)
+    if trace is None:
         print(f"❌ Bill ID {bill_id} not found in graph")
         return
-    attrs = G.nodes[bill_id]
-    print(f"\n🔎 Bill {bill_id} - {attrs.get('title', 'No title')}")
-
-    for nbr in G.neighbors(bill_id):
-        nbr_attrs = G.nodes[nbr]
-        if nbr_attrs.get("label") == "PolicyArea":
-            print(f"  Policy Area: {nbr_attrs.get('name')}")
-        elif nbr_attrs.get("label") == "Outcome":
-            print(f"  Outcome: {nbr_attrs.get('status')}")
-        elif nbr_attrs.get("label") == "Stage":
-            print(f"  Last Stage: {nbr_attrs.get('name')}")
+    print(f"\n🔎 Bill {bill_id} - {trace['title'] or 'No title'}")
+
+    for nbr in trace["connections"]:
+        if nbr["label"] == "PolicyArea":
+            print(f"  Policy Area: {nbr.get('name')}")
+        elif nbr["label"] == "Outcome":
+            print(f"  Outcome: {nbr.get('status')}")
+        elif nbr["label"] == "Stage":
+            print(f"  Last Stage: {nbr.get('name')}")
 
     print("\n🔗 Connections:")
-    for neighbor in G.neighbors(bill_id):
-        edge_data = G.get_edge_data(bill_id, neighbor)
-        neighbor_data = G.nodes[neighbor]
-        label = neighbor_data.get("label", "?")
-        print(f"  - {label}: {neighbor}")
+    for neighbor in trace["connections"]:
+        print(f"  - {neighbor.get('label', '?')}: {neighbor['node']}")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--summary", action="store_true", help="Show summary of bills per policy area")
     parser.add_argument("--rejected", action="store_true", help="Show rejected bills per policy area")
-    parser.add_argument("--trace", type=str, help="Trace connections of a specific bill by ID")
+    parser.add_argument("--trace", type=str, nargs="+", help="Trace connections of one or more bills by ID")
+    parser.add_argument("--json", action="store_true", help="Print the results as one JSON document")
 
     args = parser.parse_args()
 
-    if args.summary:
-        summarize_policy_areas()
-    if args.rejected:
-        rejected_bills_by_policy()
-    if args.trace:
-        trace_bill(args.trace)
+    if args.json and any([args.summary, args.rejected, args.trace]):
+        print(json.dumps(run_query({"summary": args.summary, "rejected": args.rejected, "trace": args.trace}),
+                         ensure_ascii=False, indent=2))
+    else:
+        if args.summary:
+            summarize_policy_areas()
+        if args.rejected:
+            rejected_bills_by_policy()
+        for bill_id in args.trace or []:
+            trace_bill(bill_id)
 
     if not any([args.summary, args.rejected, args.trace]):
         parser.print_help()
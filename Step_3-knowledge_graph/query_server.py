@@ -0,0 +1,192 @@
+import sys
+import json
+import time
+import argparse
+import threading
+import subprocess
+import http.client
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import query_knowledge_graph as queries
+
+# Long-running front end for query_knowledge_graph.py: the graph store and
+# its index are loaded once and every query after that is a lookup.
+#
+#     python query_server.py serve              HTTP on 127.0.0.1:5060
+#         GET  /summary
+#         GET  /rejected
+#         GET  /trace?bill=bill_1&bill=bill_2   (or ?bills=bill_1,bill_2)
+#         POST /query   {"summary": true, "rejected": true, "trace": ["bill_1", ...]}
+#
+#     python query_server.py repl               one query per line on stdin, one JSON line out:
+#         summary | rejected | trace bill_1 bill_2 ... | {"trace": [...]}
+#
+# Both reopen the store when create_knowledge_graph.py rebuilds it.
+
+DEFAULT_PORT = 5060
+
+
+def parse_command(line):
+    # REPL line -> run_query() dict
+    line = line.strip()
+    if line.startswith("{"):
+        return json.loads(line)
+    command, *args = line.split()
+    if command in ("summary", "rejected"):
+        return {command: True}
+    if command == "trace" and args:
+        return {"trace": args}
+    raise ValueError(f"Unknown command: {line!r} (summary | rejected | trace <bill id> ... | JSON query)")
+
+
+def make_handler():
+    class QueryHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            parsed = urlparse(self.path)
+            params = parse_qs(parsed.query)
+            if parsed.path == "/health":
+                self.send_json(200, {"status": "ok", "nodes": len(queries.current_graph().store)})
+            elif parsed.path in ("/summary", "/rejected"):
+                self.answer({parsed.path.strip("/"): True})
+            elif parsed.path == "/trace":
+                bills = params.get("bill", []) + [b for value in params.get("bills", []) for b in value.split(",") if b]
+                if not bills:
+                    self.send_json(400, {"error": "Pass ?bill=<id> (repeatable) or ?bills=<id>,<id>"})
+                else:
+                    self.answer({"trace": bills})
+            else:
+                self.send_json(404, {"error": f"Unknown path {parsed.path}"})
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if urlparse(self.path).path != "/query":
+                self.send_json(404, {"error": f"Unknown path {self.path}"})
+                return
+            try:
+                query = json.loads(body or b"{}")
+            except json.JSONDecodeError as e:
+                self.send_json(400, {"error": f"Invalid JSON: {e}"})
+                return
+            self.answer(query)
+
+        def answer(self, query):
+            queries.refresh_graph()
+            try:
+                result = queries.run_query(query)
+            except ValueError as e:
+                self.send_json(400, {"error": str(e)})
+                return
+            self.send_json(200, result)
+
+        def send_json(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return QueryHandler
+
+
+@contextmanager
+def serve_queries(host="127.0.0.1", port=0):
+    queries.graph_index()  # build/load the index before the first request
+    server = ThreadingHTTPServer((host, port), make_handler())
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server.server_address[1]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def repl(stdin=sys.stdin, stdout=sys.stdout):
+    interactive = stdin.isatty()
+    while True:
+        if interactive:
+            print("kg> ", end="", file=sys.stderr, flush=True)
+        line = stdin.readline()
+        if not line:
+            break
+        if not line.strip():
+            continue
+        try:
+            queries.refresh_graph()
+            result = queries.run_query(parse_command(line))
+        except ValueError as e:  # also json.JSONDecodeError
+            result = {"error": str(e)}
+        stdout.write(json.dumps(result, ensure_ascii=False) + "\n")
+        stdout.flush()
+
+
+def request_json(connection, method, path, body=None):
+    connection.request(method, path, body=body, headers={"Content-Type": "application/json"} if body else {})
+    response = connection.getresponse()
+    return json.loads(response.read())
+
+
+def benchmark(count=500, cli_runs=20):
+    # N traces: one CLI process each vs one keep-alive GET each vs one batched POST
+    bills = queries.graph_index().nodes_with_label("Bill")[:count]
+    count = len(bills)
+
+    start = time.perf_counter()
+    for bill in bills[:cli_runs]:
+        subprocess.run([sys.executable, "query_knowledge_graph.py", "--trace", bill], check=True,
+                       stdout=subprocess.DEVNULL)
+    cli_seconds = (time.perf_counter() - start) / min(cli_runs, count) * count
+
+    with serve_queries() as port:
+        connection = http.client.HTTPConnection("127.0.0.1", port)
+        start = time.perf_counter()
+        single = [request_json(connection, "GET", f"/trace?bill={bill}")["trace"][bill] for bill in bills]
+        single_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        batched = request_json(connection, "POST", "/query", json.dumps({"trace": bills}))["trace"]
+        batch_seconds = time.perf_counter() - start
+        connection.close()
+
+    start = time.perf_counter()
+    direct = queries.trace_bills(bills)
+    direct_seconds = time.perf_counter() - start
+    assert single == [batched[bill] for bill in bills] == [direct[bill] for bill in bills]
+
+    print(f"{count} bill traces")
+    print(f"{'CLI process per bill':<30} {cli_seconds:>8.2f}s  (extrapolated from {min(cli_runs, count)} runs)")
+    print(f"{'HTTP GET per bill':<30} {single_seconds:>8.2f}s")
+    print(f"{'HTTP POST, one batch':<30} {batch_seconds:>8.2f}s")
+    print(f"{'in-process trace_bills()':<30} {direct_seconds:>8.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Keep the knowledge graph loaded and answer queries as JSON")
+    parser.add_argument("command", choices=["serve", "repl", "benchmark"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--count", type=int, default=500, help="Bills to trace in the benchmark")
+    args = parser.parse_args()
+
+    if args.command == "repl":
+        repl()
+    elif args.command == "benchmark":
+        benchmark(args.count)
+    else:
+        with serve_queries(args.host, args.port) as port:
+            print(f"🌐 Knowledge graph queries at http://{args.host}:{port} ({len(queries.current_graph().store)} nodes loaded)")
+            try:
+                while True:
+                    time.sleep(1)
+            except KeyboardInterrupt:
+                pass
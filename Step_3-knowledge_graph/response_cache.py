@@ -0,0 +1,304 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import unicodedata
+import argparse
+import threading
+from collections import OrderedDict
+
+# Cache of whole /analyze responses. Dashboards ask the same few questions
+# many times a day; a hit skips policy routing, the graph context and both
+# GPT calls.
+#
+# Entries are keyed by the normalized query, the answering model and a
+# prompt version (token budget, router threshold). Each entry remembers the
+# policy area and dataset version (bill_data_cache.py) it was answered from:
+#
+#   - an entry older than ttl is a miss
+#   - an entry whose area now has a different dataset version is a miss and
+#     is dropped; with invalidate_area() registered via
+#     BillDataCache.on_change, a refresh drops them straight away
+#
+# MemoryBackend is a per-process LRU. SQLiteBackend survives restarts and is
+# shared by every process pointed at the same file.
+
+DEFAULT_TTL = 6 * 60 * 60  # seconds
+DEFAULT_MAX_ENTRIES = 1024
+DB_PATH = "analyze_responses.db"
+
+
+def normalize_query(query):
+    # "  Rejection rate for HEALTH bills? " -> "rejection rate for health bills"
+    query = unicodedata.normalize("NFKC", str(query))
+    return re.sub(r"\s+", " ", query).strip().casefold().rstrip("?!. ")
+
+
+class MemoryBackend:
+    name = "memory"
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()    # key -> {"area", "version", "created_at", "response"}, least recently used first
+        self.lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def delete_area(self, area, version):
+        # Drop the area's entries answered from any other dataset version; returns how many
+        with self.lock:
+            stale = [key for key, entry in self.entries.items() if entry["area"] == area and entry["version"] != version]
+            for key in stale:
+                del self.entries[key]
+        return len(stale)
+
+    def delete_older(self, created_before):
+        with self.lock:
+            old = [key for key, entry in self.entries.items() if entry["created_at"] < created_before]
+            for key in old:
+                del self.entries[key]
+        return len(old)
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class SQLiteBackend:
+    name = "sqlite"
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.pid = None
+        self.conn = None
+        with self.connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    area TEXT,
+                    version TEXT,
+                    created_at REAL,
+                    response TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_area ON responses (area)")
+
+    def connection(self):
+        # One connection per process: a connection opened before fork must not be used by the children
+        if self.pid != os.getpid():
+            self.conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode = WAL")
+            self.pid = os.getpid()
+        return self.conn
+
+    def get(self, key):
+        with self.lock:
+            row = self.connection().execute(
+                "SELECT area, version, created_at, response FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        area, version, created_at, response = row
+        return {"area": area, "version": version, "created_at": created_at, "response": json.loads(response)}
+
+    def put(self, key, entry):
+        with self.lock, self.connection() as conn:
+            conn.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                         (key, entry["area"], entry["version"], entry["created_at"], json.dumps(entry["response"])))
+
+    def delete(self, key):
+        with self.lock, self.connection() as conn:
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def delete_area(self, area, version):
+        with self.lock, self.connection() as conn:
+            return conn.execute("DELETE FROM responses WHERE area = ? AND version != ?", (area, version)).rowcount
+
+    def delete_older(self, created_before):
+        with self.lock, self.connection() as conn:
+            return conn.execute("DELETE FROM responses WHERE created_at < ?", (created_before,)).rowcount
+
+    def __len__(self):
+        with self.lock:
+            return self.connection().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+def open_backend(path=None, max_entries=DEFAULT_MAX_ENTRIES):
+    # SQLite when a file is given, otherwise in memory
+    return SQLiteBackend(path) if path else MemoryBackend(max_entries)
+
+
+class ResponseCache:
+    def __init__(self, backend=None, model="gpt-4o", prompt_version="v1", ttl=DEFAULT_TTL, clock=time.time):
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.model = model
+        self.prompt_version = prompt_version
+        self.ttl = ttl
+        self.clock = clock              # wall clock, so SQLite entries age correctly across processes
+        self.lock = threading.Lock()
+        self.counts = {"hits": 0, "misses": 0, "expired": 0, "invalidated": 0, "stores": 0}
+        self.backend.delete_older(self.clock() - ttl)
+
+    def key(self, query):
+        raw = "\x1f".join([normalize_query(query), self.model, self.prompt_version])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counts[name] += n
+
+    def get(self, query, current_version):
+        # The cached response for query, or None. current_version: policy area -> its dataset version now
+        key = self.key(query)
+        entry = self.backend.get(key)
+        if entry is None:
+            self.count("misses")
+            return None
+        age = self.clock() - entry["created_at"]
+        if age > self.ttl:
+            self.backend.delete(key)
+            self.count("expired")
+            self.count("misses")
+            return None
+        if current_version(entry["area"]) != entry["version"]:
+            self.backend.delete(key)
+            self.count("invalidated")
+            self.count("misses")
+            return None
+        self.count("hits")
+        return {**entry["response"], "cache": {"hit": True, "age_seconds": round(age, 1), "version": entry["version"]}}
+
+    def put(self, query, area, version, response):
+        self.backend.put(self.key(query), {"area": area, "version": version, "created_at": self.clock(),
+                                           "response": response})
+        self.count("stores")
+
+    def invalidate_area(self, area, version):
+        # BillDataCache.on_change listener: drop the area's answers based on older bills
+        removed = self.backend.delete_area(area, version)
+        if removed:
+            self.count("invalidated", removed)
+
+    def stats(self):
+        with self.lock:
+            counts = dict(self.counts)
+        lookups = counts["hits"] + counts["misses"]
+        counts["hit_rate"] = round(counts["hits"] / lookups, 4) if lookups else 0.0
+        return {**counts, "backend": self.backend.name, "entries": len(self.backend), "ttl_seconds": self.ttl}
+
+
+QUESTIONS = [
+    "What is the rejection rate for Health bills?",
+    "How many Economy bills became law?",
+    "Which Housing bills were rejected?",
+    "Which stages do Transport bills get stuck in?",
+    "How many Education bills were withdrawn?",
+]
+
+
+def benchmark(app_module, csv_path, requests, llm_latency, db_path):
+    # A dashboard-like workload (a few questions, phrased slightly differently)
+    # through /analyze, with the PostgREST stub and a fake OpenAI client
+    import random
+    import pandas as pd
+    from types import SimpleNamespace
+    from graph_cache import import_app
+    from bill_data_cache import TABLE_NAME, SINCE
+
+    import step_paths
+    from local_postgrest_stub import serve_postgrest
+    from fake_llm import completion
+
+    class FakeOpenAI:
+        def __init__(self):
+            self.calls = 0
+            self.chat = SimpleNamespace(completions=self)
+
+        def create(self, model=None, messages=None, **kwargs):
+            self.calls += 1
+            time.sleep(llm_latency)
+            if "policy_area" in messages[-1]["content"]:
+                return completion('{"policy_area": "Other", "question": "?"}')
+            return completion("Answer from the fake LLM.")
+
+    df = pd.read_csv(csv_path)
+    rows = df.astype(object).where(df.notna(), None).to_dict(orient="records")
+    rng = random.Random(0)
+    variants = [lambda q: q, lambda q: q.lower(), lambda q: q.rstrip("?"), lambda q: f"  {q.upper()} "]
+    workload = [rng.choice(variants)(rng.choice(QUESTIONS)) for _ in range(requests)]
+
+    with serve_postgrest(tables={TABLE_NAME: rows}) as (url, key, stub):
+        os.environ.update(SUPABASE_URL=url, SUPABASE_API_KEY=key)
+        app = import_app(app_module)
+        app.client = llm = FakeOpenAI()
+        http = app.app.test_client()
+
+        def run(cache):
+            app.response_cache = cache
+            app.bill_cache.listeners = [cache.invalidate_area]
+            llm.calls = 0
+            start = time.perf_counter()
+            for query in workload:
+                http.get("/analyze", query_string={"query": query})
+            return (time.perf_counter() - start) / len(workload), llm.calls
+
+        print(f"{app_module}: {requests} requests over {len(QUESTIONS)} questions, fake LLM {llm_latency}s per call")
+        print(f"{'':<16} {'per request':>12} {'LLM calls':>10} {'hit rate':>9}")
+        caches = [("no cache", ResponseCache(MemoryBackend(0))), ("memory", ResponseCache(MemoryBackend()))]
+        if db_path:
+            if os.path.exists(db_path):
+                os.remove(db_path)
+            caches.append(("sqlite", ResponseCache(SQLiteBackend(db_path))))
+        for name, cache in caches:
+            seconds, calls = run(cache)
+            print(f"{name:<16} {seconds * 1000:>10.2f}ms {calls:>10d} {cache.stats()['hit_rate']:>9.1%}")
+
+        # A Supabase change to one Health bill: the refresh drops the Health answers only
+        bill = next(row for row in stub.tables[TABLE_NAME].values()
+                    if row["policyArea"] == "Health" and str(row["lastUpdate"]) >= SINCE
+                    and row["currentStage_description"] != "Royal Assent")
+        bill["currentStage_description"] = "Royal Assent"
+        before = len(cache.backend)
+        app.bill_cache.refresh("Health")
+        dropped = before - len(cache.backend)
+        llm.calls = 0
+        health = http.get("/analyze", query_string={"query": QUESTIONS[0]}).get_json()
+        economy = http.get("/analyze", query_string={"query": QUESTIONS[1]}).get_json()
+        print(f"\nHealth refreshed: {dropped} of {before} cached answers dropped; "
+              f"next Health question hit={health['cache']['hit']}, Economy hit={economy['cache']['hit']} "
+              f"({llm.calls} LLM calls)")
+        print(json.dumps(cache.stats()))
+    if db_path:
+        os.remove(db_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the /analyze response cache with local stubs")
+    parser.add_argument("--app", choices=["kg_api_server", "dynamically_build_kg_example"], default="kg_api_server")
+    parser.add_argument("--csv", default="bills_with_policy_area_full.csv")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Fake LLM seconds per call")
+    parser.add_argument("--db", default="benchmark_responses.db", help="SQLite file to benchmark too ('' to skip)")
+    args = parser.parse_args()
+
+    benchmark(args.app, args.csv, args.requests, args.llm_latency, args.db)
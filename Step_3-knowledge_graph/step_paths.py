@@ -0,0 +1,14 @@
+import os
+import sys
+
+# Puts the other step directories on the import path, once: the Supabase
+# export and the PostgREST stub live in Step 1, the classifiers and the fake
+# LLM in Step 2. Scripts here `import step_paths` before importing from them.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STEP_DIRS = ["Step_1-fetch_data_UK_Parliament_Bills", "Step_2-Data-Augmentation"]
+
+for step_dir in STEP_DIRS:
+    path = os.path.join(ROOT, step_dir)
+    if path not in sys.path:
+        sys.path.append(path)
@@ -5,6 +5,9 @@ from supabase import create_client
 from dotenv import load_dotenv
 import networkx as nx
 
+import step_paths
+from supabase_export import export_dataframe
+
 # Load environment variables
 load_dotenv()
 
@@ -13,20 +16,9 @@ url = os.getenv("SUPABASE_URL")
 key = os.getenv("SUPABASE_API_KEY")
 supabase = create_client(url, key)
 
-# Retrieve all data with pagination
+# Retrieve all data with keyset pagination
 table_name = "all_bills_uk"
-batch_size = 1000
-offset = 0
-all_rows = []
-
-while True:
-    response = supabase.table(table_name).select("*").range(offset, offset + batch_size - 1).execute()
-    if not response.data:
-        break
-    all_rows.extend(response.data)
-    offset += batch_size
-
-df_bills = pd.DataFrame(all_rows)
+df_bills = export_dataframe(supabase, table_name)
 print(f"✅ Loaded {len(df_bills)} bills")
 
 # Basic analysis: Policy Area Rejection Rates
@@ -0,0 +1,168 @@
+import os
+import gc
+import time
+import signal
+import socket
+import argparse
+import importlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+from supabase import create_client
+
+# Production entry point for the Flask APIs (app.run(debug=True) is the
+# single-process dev server). create_app() imports an app module, loads
+# every policy area's bills and graphs, and freezes them out of the garbage
+# collector's reach. That way workers forked afterwards share those pages
+# copy-on-write instead of each fetching and building its own. Run it with:
+#
+#   python wsgi.py --workers 4 --threads 64                              # built-in pre-fork server
+#   gunicorn --preload -w 4 --threads 64 -b 0.0.0.0:5050 "wsgi:create_app()"
+#
+# Threads and pooled HTTP connections don't survive fork safely, so each
+# worker opens its own Supabase client and starts its own background bill
+# refresh on its first request.
+
+APP_MODULE = os.getenv("KG_APP", "kg_api_server")
+PORT = 5050
+# Requests per worker at once. An /analyze request spends most of its time
+# waiting on GPT, so the pool is sized for those waits rather than for CPUs:
+# with 8 threads a 200ms LLM call capped a worker at 40 req/s.
+THREADS = 64
+
+
+def preload(module):
+    errors = module.bill_cache.preload(module.VALID_POLICY_AREAS)
+    for area in module.VALID_POLICY_AREAS:
+        if area not in errors:
+            entry = module.bill_cache.entry(area)
+            module.graph_cache.get(area, entry["data"], entry["version"])
+    # Everything loaded so far is long-lived; keep the GC from touching (and so copying) it in the workers
+    gc.collect()
+    gc.freeze()
+    print(f"📦 Preloaded {len(module.VALID_POLICY_AREAS) - len(errors)} policy areas "
+          f"({sum(len(entry['graph']) for entry in module.graph_cache.entries.values())} triples)")
+
+
+class WorkerInit:
+    # WSGI middleware: the first request a process serves gives it its own Supabase client and bill refresh
+    def __init__(self, app, module):
+        self.app = app
+        self.module = module
+        self.started_pid = None
+        self.lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        if self.started_pid != os.getpid():
+            with self.lock:
+                if self.started_pid != os.getpid():
+                    self.module.sb = create_client(self.module.SUPABASE_URL, self.module.SUPABASE_KEY)
+                    self.module.bill_cache.start(self.module.VALID_POLICY_AREAS, preload=False)
+                    self.started_pid = os.getpid()
+        return self.app(environ, start_response)
+
+
+def create_app(app_module=APP_MODULE, warm=True):
+    module = importlib.import_module(app_module)
+    if warm:
+        preload(module)
+    app = module.create_app()
+    app.wsgi_app = WorkerInit(app.wsgi_app, module)
+    return app
+
+
+class RequestHandler(WSGIRequestHandler):
+    # One request per connection: with keep-alive an idle client would hold one of the pool's threads
+    protocol_version = "HTTP/1.0"
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    # werkzeug's server with a fixed pool of request threads instead of one new thread per request
+    multithread = True
+
+    def __init__(self, host, port, app, threads, fd=None):
+        super().__init__(host, port, app, handler=RequestHandler, fd=fd)
+        self.pool = ThreadPoolExecutor(threads)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self.process_request_thread, request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+
+def run_worker(app, host, port, threads, fd):
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    PooledWSGIServer(host, port, app, threads, fd=fd).serve_forever()
+
+
+def serve(app, host="0.0.0.0", port=PORT, workers=2, threads=THREADS):
+    # Pre-fork: the parent binds the socket and forks the workers, which all accept on it.
+    # A worker that dies is replaced; SIGINT/SIGTERM stops them all.
+    if not hasattr(os, "fork"):
+        print("⚠️ No fork on this platform, serving from one process")
+        PooledWSGIServer(host, port, app, threads).serve_forever()
+        return
+
+    listener = socket.create_server((host, port), backlog=1024)
+    listener.set_inheritable(True)
+    children = set()
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            try:
+                run_worker(app, host, port, threads, listener.fileno())
+            except Exception as e:
+                print(f"⚠️ Worker {os.getpid()} failed: {e}")
+            finally:
+                os._exit(1)
+        children.add(pid)
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    for _ in range(workers):
+        spawn()
+    print(f"🚀 Serving on http://{host}:{port} with {workers} workers x {threads} threads")
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        children.discard(pid)
+        if not stopping:
+            print(f"⚠️ Worker {pid} exited ({status}), starting a new one")
+            time.sleep(0.5)
+            spawn()
+    listener.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a Flask API with preloaded data and pre-forked workers")
+    parser.add_argument("--app", choices=["kg_api_server", "dynamically_build_kg_example"], default=APP_MODULE)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--threads", type=int, default=THREADS)
+    args = parser.parse_args()
+
+    serve(create_app(args.app), args.host, args.port, args.workers, args.threads)